@@ -0,0 +1,145 @@
+import gzip
+import io
+import os
+import uuid
+from typing import Any, List, Optional, Tuple
+import pandas as pd
+from psycopg2.extras import execute_values
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from variables.config import (
+    REDSHIFT_SCHEMA, BULK_LOAD_METHOD, BULK_LOAD_PAGE_SIZE, BULK_LOAD_S3_BUCKET,
+    BULK_LOAD_S3_PREFIX, BULK_LOAD_S3_ENDPOINT_URL, BULK_LOAD_IAM_ROLE
+)
+
+BULK_LOAD_METHODS: List[str] = ["copy", "execute_values", "to_sql"]
+
+# Marcador de NULL en los CSV que se cargan con COPY
+COPY_NULL_MARKER: str = "\\N"
+
+
+def _qualified_name(table: str, schema: Optional[str]) -> str:
+    return f'"{schema}".{table}' if schema else table
+
+
+def _frame_rows(df: pd.DataFrame) -> List[Tuple[Any, ...]]:
+    """Convert a frame to tuples of native Python values, with NaN/NaT as None."""
+    values = df.astype(object).where(df.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+
+def _s3_client() -> Any:
+    """
+    Build the S3 client of the 'copy' backend.
+
+    boto3 is only needed by this backend, so it is imported lazily.
+
+    Returns:
+        Any: A boto3 S3 client pointing to `BULK_LOAD_S3_ENDPOINT_URL` when it is set.
+    """
+    try:
+        import boto3
+    except ImportError as e:
+        raise ImportError("The 'copy' bulk-load method requires boto3 (pip install boto3).") from e
+    return boto3.client("s3", endpoint_url=BULK_LOAD_S3_ENDPOINT_URL)
+
+
+def _copy_credentials() -> Tuple[str, dict]:
+    if BULK_LOAD_IAM_ROLE:
+        return "IAM_ROLE :iam_role", {"iam_role": BULK_LOAD_IAM_ROLE}
+    return (
+        "ACCESS_KEY_ID :access_key_id SECRET_ACCESS_KEY :secret_access_key",
+        {
+            "access_key_id": os.getenv("AWS_ACCESS_KEY_ID", ""),
+            "secret_access_key": os.getenv("AWS_SECRET_ACCESS_KEY", ""),
+        },
+    )
+
+
+def _insert_execute_values(connection: Connection, df: pd.DataFrame, table: str, schema: Optional[str], page_size: int) -> None:
+    # execute_values arma un INSERT multi-fila por página en lugar de un INSERT por fila
+    cursor = connection.connection.cursor()
+    execute_values(
+        cursor,
+        f"INSERT INTO {_qualified_name(table, schema)} ({', '.join(df.columns)}) VALUES %s",
+        _frame_rows(df),
+        page_size=page_size,
+    )
+
+
+def _insert_copy(connection: Connection, df: pd.DataFrame, table: str, schema: Optional[str]) -> None:
+    if not BULK_LOAD_S3_BUCKET:
+        raise ValueError("BULK_LOAD_S3_BUCKET must be set to use the 'copy' bulk-load method.")
+
+    # El frame se serializa como CSV comprimido en memoria y se sube al bucket
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as gz:
+        gz.write(df.to_csv(index=False, header=False, na_rep=COPY_NULL_MARKER).encode("utf-8"))
+    key = f"{BULK_LOAD_S3_PREFIX.strip('/')}/{table}/{uuid.uuid4().hex}.csv.gz"
+
+    client = _s3_client()
+    client.put_object(Bucket=BULK_LOAD_S3_BUCKET, Key=key, Body=buffer.getvalue())
+    try:
+        credentials, params = _copy_credentials()
+        connection.execute(
+            text(
+                f"""
+                COPY {_qualified_name(table, schema)} ({', '.join(df.columns)})
+                FROM :source
+                {credentials}
+                FORMAT AS CSV GZIP
+                NULL AS :null_marker
+                DATEFORMAT 'auto' TIMEFORMAT 'auto'
+                """
+            ),
+            {"source": f"s3://{BULK_LOAD_S3_BUCKET}/{key}", "null_marker": COPY_NULL_MARKER, **params},
+        )
+    finally:
+        client.delete_object(Bucket=BULK_LOAD_S3_BUCKET, Key=key)
+
+
+def bulk_insert(
+    connection: Connection,
+    df: pd.DataFrame,
+    table: str,
+    schema: Optional[str] = REDSHIFT_SCHEMA,
+    method: str = BULK_LOAD_METHOD,
+    page_size: int = BULK_LOAD_PAGE_SIZE,
+) -> int:
+    """
+    Append a DataFrame to a table using the configured bulk-load backend.
+
+    - 'copy': uploads the frame as a gzipped CSV to an S3-compatible bucket and runs a
+      single COPY, the fastest path for large loads.
+    - 'execute_values': multi-row INSERT statements of `page_size` rows each.
+    - 'to_sql': the legacy `DataFrame.to_sql` behavior.
+
+    The load runs on the given connection, so it is part of the caller's transaction.
+
+    Args:
+        connection (Connection): Open SQLAlchemy connection.
+        df (pd.DataFrame): Rows to insert; its columns must match table columns.
+        table (str): Name of the target table.
+        schema (Optional[str]): Schema of the table, None for temporary tables.
+        method (str): One of `BULK_LOAD_METHODS`.
+        page_size (int): Rows per statement of the 'execute_values' backend.
+
+    Returns:
+        int: Number of rows loaded.
+
+    Raises:
+        ValueError: If the method is unknown or the 'copy' backend is not configured.
+    """
+    if method not in BULK_LOAD_METHODS:
+        raise ValueError(f"Unknown bulk-load method '{method}'. Expected one of {BULK_LOAD_METHODS}.")
+    if df.empty:
+        return 0
+
+    if method == "copy":
+        _insert_copy(connection, df, table, schema)
+    elif method == "execute_values":
+        _insert_execute_values(connection, df, table, schema, page_size)
+    else:
+        df.to_sql(table, con=connection, schema=schema, if_exists="append", index=False)
+
+    return len(df)
@@ -1,145 +1,242 @@
+from typing import Dict, List, NamedTuple, Optional, Set
 from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection
+from variables.config import REDSHIFT_SCHEMA
+from variables.connection_redshift import Bind, transaction
 
+MIGRATIONS_TABLE: str = "schema_migrations"
 
-def create_tables(engine: Engine) -> None:
+
+class Migration(NamedTuple):
     """
-    Create tables in the Redshift database if they do not exist.
+    A versioned schema change.
 
-    Args:
-        engine (Engine): SQLAlchemy engine for the database connection.
+    `table` and `column` name the object the migration creates, so a schema built
+    before migrations were tracked is recognized without running the DDL again.
+    The DDL uses the `{schema}` placeholder.
     """
+    version: int
+    description: str
+    ddl: str
+    table: str
+    column: Optional[str] = None
+
 
-    def table_exists(table_name: str) -> bool:
+# Lista versionada de cambios de esquema: solo se agregan migraciones nuevas al final, nunca se editan las aplicadas
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "create crypto_description",
+        """
+        CREATE TABLE "{schema}".crypto_description (
+            id_crypto BIGINT IDENTITY(1,1) PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            symbol VARCHAR(10) NOT NULL UNIQUE,
+            category VARCHAR(50),
+            description VARCHAR(8192),
+            bk_crypto BIGINT,
+            logo VARCHAR(8192),
+            website VARCHAR(8192),
+            reddit VARCHAR(8192),
+            start_date DATE,
+            end_date DATE,
+            is_current INTEGER
+        );
+        """,
+        "crypto_description",
+    ),
+    Migration(
+        2,
+        "create dim_date",
+        """
+        CREATE TABLE "{schema}".dim_date (
+            date DATE NOT NULL PRIMARY KEY,
+            year INT NOT NULL,
+            month INT NOT NULL,
+            week_number INT NOT NULL,
+            day INT NOT NULL,
+            yearmonth VARCHAR(6) NOT NULL,
+            month_name VARCHAR(20) NOT NULL,
+            day_of_week INT NOT NULL,
+            day_of_year INT NOT NULL,
+            week_of_year INT NOT NULL,
+            quarter INT NOT NULL,
+            semester INT NOT NULL,
+            is_weekend BOOLEAN NOT NULL
+        );
+        """,
+        "dim_date",
+    ),
+    Migration(
+        3,
+        "create daily_crypto_prices",
+        """
+        CREATE TABLE "{schema}".daily_crypto_prices (
+            id_record BIGINT IDENTITY(1,1) PRIMARY KEY,
+            date DATE NOT NULL,
+            time TIME NOT NULL,
+            symbol VARCHAR(10) NOT NULL,
+            open_price DECIMAL(18, 8),
+            high_price DECIMAL(18, 8),
+            low_price DECIMAL(18, 8),
+            close_price DECIMAL(18, 8),
+            FOREIGN KEY (symbol) REFERENCES "{schema}".crypto_description(symbol),
+            FOREIGN KEY (date) REFERENCES "{schema}".dim_date(date)
+        );
+        """,
+        "daily_crypto_prices",
+    ),
+    Migration(
+        4,
+        "create crypto_volatility_and_performance",
+        """
+        CREATE TABLE "{schema}".crypto_volatility_and_performance (
+            id_record BIGINT IDENTITY(1,1) PRIMARY KEY,
+            date DATE NOT NULL,
+            symbol VARCHAR(10) NOT NULL,
+            category VARCHAR(50),
+            time_interval VARCHAR(255),
+            low_price DECIMAL(18, 8),
+            high_price DECIMAL(18, 8),
+            volatility DECIMAL(18, 8),
+            open_price DECIMAL(18, 8),
+            close_price DECIMAL(18, 8),
+            return DECIMAL(18, 8),
+            range DECIMAL(18, 8),
+            average_price DECIMAL(18, 8),
+            standard_desviation DECIMAL(18, 8),
+            FOREIGN KEY (symbol) REFERENCES "{schema}".crypto_description(symbol),
+            FOREIGN KEY (date) REFERENCES "{schema}".dim_date(date)
+        );
+        """,
+        "crypto_volatility_and_performance",
+    ),
+    Migration(
+        5,
+        "add change_hash to crypto_description",
         """
-        Check if a table exists in the database schema.
+        ALTER TABLE "{schema}".crypto_description ADD COLUMN change_hash VARCHAR(64);
+        """,
+        "crypto_description",
+        "change_hash",
+    ),
+]
 
-        Args:
-            table_name (str): Name of the table to check.
+# Esquemas ya verificados en este proceso: las siguientes llamadas a create_tables no consultan la base
+_bootstrapped_schemas: Set[str] = set()
 
-        Returns:
-            bool: True if the table exists, False otherwise.
-        """
 
-        with engine.connect() as connection:
-            query = text(
-                """
-                SELECT EXISTS (
-                    SELECT 1
-                    FROM information_schema.tables
-                    WHERE table_schema = '2024_tomas_ignacio_latorre_schema'
-                    AND table_name = :table_name
-                )
-                """
-            )
-            result = connection.execute(query, {"table_name": table_name})
-            return result.fetchone()[0]
+def _fetch_catalog(connection: Connection, schema: str) -> Dict[str, Set[str]]:
+    """
+    Fetch every table of the schema with its columns in a single query.
 
-    with engine.connect() as connection:
-        # Create crypto_description table if it does not exist
-        if not table_exists("crypto_description"):
-            connection.execute(
-                text(
-                    """
-                    CREATE TABLE "2024_tomas_ignacio_latorre_schema".crypto_description (
-                        id_crypto BIGINT IDENTITY(1,1) PRIMARY KEY, 
-                        name VARCHAR(100) NOT NULL, 
-                        symbol VARCHAR(10) NOT NULL UNIQUE,  
-                        category VARCHAR(50),  
-                        description VARCHAR(8192),  
-                        bk_crypto BIGINT,  
-                        logo VARCHAR(8192),   
-                        website VARCHAR(8192),  
-                        reddit VARCHAR(8192),  
-                        start_date DATE,
-                        end_date DATE,
-                        is_current INTEGER
-                    );
-                    """
-                )
-            )
-            print("Table 'crypto_description' created successfully.")
-        else:
-            print("Table 'crypto_description' already exists.")
+    Args:
+        connection (Connection): Open SQLAlchemy connection.
+        schema (str): Schema to inspect.
+
+    Returns:
+        Dict[str, Set[str]]: Column names keyed by table name.
+    """
+    result = connection.execute(
+        text(
+            """
+            SELECT table_name, column_name
+            FROM information_schema.columns
+            WHERE table_schema = :schema
+            """
+        ),
+        {"schema": schema},
+    )
+    catalog: Dict[str, Set[str]] = {}
+    for table_name, column_name in result.fetchall():
+        catalog.setdefault(table_name, set()).add(column_name)
+    return catalog
+
+
+def _already_present(migration: Migration, catalog: Dict[str, Set[str]]) -> bool:
+    if migration.table not in catalog:
+        return False
+    return migration.column is None or migration.column in catalog[migration.table]
 
-        # Create dim_date if it does not exist
-        if not table_exists("dim_date"):
-            connection.execute(
-                text(
-                    """
-                    CREATE TABLE "2024_tomas_ignacio_latorre_schema".dim_date (
-                        date DATE NOT NULL PRIMARY KEY,  
-                        year INT NOT NULL,               
-                        month INT NOT NULL,              
-                        week_number INT NOT NULL,        
-                        day INT NOT NULL,                
-                        yearmonth VARCHAR(6) NOT NULL,   
-                        month_name VARCHAR(20) NOT NULL, 
-                        day_of_week INT NOT NULL,        
-                        day_of_year INT NOT NULL,        
-                        week_of_year INT NOT NULL,       
-                        quarter INT NOT NULL,            
-                        semester INT NOT NULL,           
-                        is_weekend BOOLEAN NOT NULL      
-                    );
-                    """
-                )
-            )
-            print("Table 'dim_date' created successfully.")
-        else:
-            print("Table 'dim_date' already exists.")
 
-        # Create daily_crypto_prices table if it does not exist
-        if not table_exists("daily_crypto_prices"):
+def apply_migrations(
+    engine: Bind,
+    schema: str = REDSHIFT_SCHEMA,
+    migrations: Optional[List[Migration]] = None,
+) -> List[int]:
+    """
+    Bring the schema up to date by applying the pending migrations.
+
+    Applied versions are tracked in the `schema_migrations` table. Objects that
+    already exist (schemas created before migrations were tracked) are recorded
+    as applied without running their DDL.
+
+    Args:
+        engine (Bind): SQLAlchemy engine or open connection for the database.
+        schema (str): Schema that holds the pipeline tables.
+        migrations (Optional[List[Migration]]): Migrations to apply, `MIGRATIONS` by default.
+
+    Returns:
+        List[int]: Versions whose DDL was executed.
+    """
+    migrations = MIGRATIONS if migrations is None else migrations
+    executed: List[int] = []
+
+    with transaction(engine) as connection:
+        catalog = _fetch_catalog(connection, schema)
+
+        if MIGRATIONS_TABLE in catalog:
+            applied = {row[0] for row in connection.execute(text(f'SELECT version FROM "{schema}".{MIGRATIONS_TABLE}'))}
+        else:
             connection.execute(
                 text(
-                    """
-                    CREATE TABLE "2024_tomas_ignacio_latorre_schema".daily_crypto_prices (
-                        id_record BIGINT IDENTITY(1,1) PRIMARY KEY,
-                        date DATE NOT NULL,                
-                        time TIME NOT NULL,                
-                        symbol VARCHAR(10) NOT NULL, 
-                        open_price DECIMAL(18, 8),         
-                        high_price DECIMAL(18, 8),         
-                        low_price DECIMAL(18, 8),          
-                        close_price DECIMAL(18, 8),        
-                        FOREIGN KEY (symbol) REFERENCES "2024_tomas_ignacio_latorre_schema".crypto_description(symbol),
-                        FOREIGN KEY (date) REFERENCES "2024_tomas_ignacio_latorre_schema".dim_date(date)
+                    f"""
+                    CREATE TABLE "{schema}".{MIGRATIONS_TABLE} (
+                        version INT NOT NULL PRIMARY KEY,
+                        description VARCHAR(256),
+                        applied_at TIMESTAMP DEFAULT GETDATE()
                     );
                     """
                 )
             )
-            print("Table 'daily_crypto_prices' created successfully.")
-        else:
-            print("Table 'daily_crypto_prices' already exists.")
+            applied = set()
 
-        # Create crypto_volatility_and_performance table if it does not exist
-        if not table_exists("crypto_volatility_and_performance"):
+        for migration in sorted(migrations, key=lambda m: m.version):
+            if migration.version in applied:
+                continue
+            if _already_present(migration, catalog):
+                print(f"Migration {migration.version} ({migration.description}) already present; recording it.")
+            else:
+                connection.execute(text(migration.ddl.format(schema=schema)))
+                executed.append(migration.version)
+                print(f"Migration {migration.version} ({migration.description}) applied successfully.")
             connection.execute(
                 text(
+                    f"""
+                    INSERT INTO "{schema}".{MIGRATIONS_TABLE} (version, description)
+                    VALUES (:version, :description)
                     """
-                    CREATE TABLE "2024_tomas_ignacio_latorre_schema".crypto_volatility_and_performance (
-                        id_record BIGINT IDENTITY(1,1) PRIMARY KEY,
-                        date DATE NOT NULL,                
-                        symbol VARCHAR(10) NOT NULL, 
-                        category VARCHAR(50),  
-                        time_interval VARCHAR(255),  
-                        low_price DECIMAL(18, 8),         
-                        high_price DECIMAL(18, 8),         
-                        volatility DECIMAL(18, 8),         
-                        open_price DECIMAL(18, 8),         
-                        close_price DECIMAL(18, 8),        
-                        return DECIMAL(18, 8),     
-                        range DECIMAL(18, 8),     
-                        average_price DECIMAL(18, 8),  
-                        standard_desviation DECIMAL(18, 8), 
-
-                        FOREIGN KEY (symbol) REFERENCES "2024_tomas_ignacio_latorre_schema".crypto_description(symbol),
-                        FOREIGN KEY (date) REFERENCES "2024_tomas_ignacio_latorre_schema".dim_date(date)
-                    );
-                    """
-                )
+                ),
+                {"version": migration.version, "description": migration.description},
             )
-            print("Table 'crypto_volatility_and_performance' created successfully.")
-        else:
-            print("Table 'crypto_volatility_and_performance' already exists.")
+
+    return executed
+
+
+def create_tables(engine: Bind) -> None:
+    """
+    Create tables in the Redshift database if they do not exist.
+
+    The schema is inspected with a single catalog query and only the missing
+    migrations are applied. The check runs once per process and schema.
+
+    Args:
+        engine (Bind): SQLAlchemy engine or open connection for the database.
+    """
+    if REDSHIFT_SCHEMA in _bootstrapped_schemas:
+        return
+
+    executed = apply_migrations(engine, REDSHIFT_SCHEMA)
+    if not executed:
+        print(f"Schema '{REDSHIFT_SCHEMA}' is up to date.")
+    _bootstrapped_schemas.add(REDSHIFT_SCHEMA)
@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import uuid
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from staging.candle_schema import candle_frame, candle_timestamps, fragment_schema
+from staging.partitioned_dataset import SILVER_PRICES_DIR
+from variables.config import SILVER_COMPACTION_MIN_FRAGMENTS
+
+MANIFEST_FILE: str = "_manifest.json"
+
+# Natural key of a silver fragment: (date, symbol)
+PartitionKey = Tuple[str, str]
+
+
+def _manifest_path(base_dir: str) -> str:
+    return os.path.join(base_dir, MANIFEST_FILE)
+
+
+def _partition_dir(base_dir: str, key: PartitionKey) -> str:
+    return os.path.join(base_dir, f"date={key[0]}", f"symbol={key[1]}")
+
+
+def _fragments(partition_dir: str) -> List[str]:
+    # Los archivos que empiezan con '.' o '_' (temporales, manifest) no forman parte del dataset
+    if not os.path.isdir(partition_dir):
+        return []
+    return sorted(
+        os.path.join(partition_dir, name)
+        for name in os.listdir(partition_dir)
+        if name.endswith(".parquet") and not name.startswith((".", "_"))
+    )
+
+
+def _candle_ms(df: pd.DataFrame, day: str) -> pd.Series:
+    """Return the candle instants of a partition's rows as epoch milliseconds, for either layout."""
+    return candle_timestamps(df.assign(date=day)).astype("int64")
+
+
+def _stored_candles(partition_dir: str, day: str) -> Set[int]:
+    """Read only the candle key columns of a partition's fragments and return the stored instants."""
+    stored: Set[int] = set()
+    for path in _fragments(partition_dir):
+        fragment = pq.ParquetFile(path)
+        columns = [name for name in ("timestamp", "time") if name in fragment.schema_arrow.names]
+        stored.update(_candle_ms(fragment.read(columns=columns).to_pandas(), day).tolist())
+    return stored
+
+
+def _write_fragment(df: pd.DataFrame, partition_dir: str) -> None:
+    """
+    Write the candles of a partition as a new fragment with the candle schema.
+
+    The file is written to a hidden temporary name and renamed into place, under a unique name.
+    """
+    table = pa.Table.from_pandas(df.drop(columns=["date", "symbol"]), schema=fragment_schema(), preserve_index=False)
+    path = os.path.join(partition_dir, f"part-{uuid.uuid4().hex}.parquet")
+    tmp_path = os.path.join(partition_dir, f".{os.path.basename(path)}.tmp")
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(base_dir: str = SILVER_PRICES_DIR) -> Set[PartitionKey]:
+    """
+    Load the set of (date, symbol) partitions already present in the silver dataset.
+
+    If the manifest does not exist yet (first run or a dataset written before the
+    manifest existed), it is rebuilt once from the directory listing.
+
+    Args:
+        base_dir (str): Root directory of the silver prices dataset.
+
+    Returns:
+        Set[PartitionKey]: Loaded (date 'YYYY-MM-DD', symbol) pairs.
+    """
+    path = _manifest_path(base_dir)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            loaded: Dict[str, List[str]] = json.load(f)["loaded"]
+        return {(day, symbol) for day, symbols in loaded.items() for symbol in symbols}
+
+    keys: Set[PartitionKey] = set()
+    if os.path.isdir(base_dir):
+        for date_dir in os.listdir(base_dir):
+            if not date_dir.startswith("date="):
+                continue
+            for symbol_dir in os.listdir(os.path.join(base_dir, date_dir)):
+                key = (date_dir[len("date="):], symbol_dir[len("symbol="):])
+                if symbol_dir.startswith("symbol=") and _fragments(_partition_dir(base_dir, key)):
+                    keys.add(key)
+    return keys
+
+
+def save_manifest(keys: Iterable[PartitionKey], base_dir: str = SILVER_PRICES_DIR) -> None:
+    """
+    Persist the manifest atomically (write to a temporary file and rename).
+
+    Args:
+        keys (Iterable[PartitionKey]): Loaded (date, symbol) pairs.
+        base_dir (str): Root directory of the silver prices dataset.
+    """
+    loaded: Dict[str, List[str]] = {}
+    for day, symbol in sorted(keys):
+        loaded.setdefault(day, []).append(symbol)
+
+    os.makedirs(base_dir, exist_ok=True)
+    path = _manifest_path(base_dir)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"loaded": loaded}, f)
+    os.replace(tmp_path, path)
+
+
+def append_prices(df: pd.DataFrame, base_dir: str = SILVER_PRICES_DIR) -> pd.DataFrame:
+    """
+    Append the candles of a prices frame that the silver dataset does not have yet.
+
+    A (date, symbol) partition missing from the manifest is written whole. For a partition
+    that is already loaded only its candle key column is read, and the candles whose
+    (date, symbol, timestamp) are not stored yet (late candles, or a partial day being
+    completed) are appended as a new fragment, which `compact_prices` later merges.
+    Each fragment is written with `fragment_schema` under a unique name and committed with
+    an atomic rename, so readers never see a half-written file and existing fragments are
+    never rewritten.
+
+    Args:
+        df (pd.DataFrame): Silver prices with the columns of `candle_schema` (see `candle_frame`).
+        base_dir (str): Root directory of the silver prices dataset.
+
+    Returns:
+        pd.DataFrame: The rows that were appended (empty if everything was already loaded).
+    """
+    if df.empty:
+        return df
+
+    loaded = load_manifest(base_dir)
+    day_keys = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+    written: List[pd.DataFrame] = []
+
+    for (day, symbol), partition_df in df.groupby([day_keys, df["symbol"]], sort=True, observed=True):
+        key = (day, symbol)
+        partition_dir = _partition_dir(base_dir, key)
+        if key in loaded:
+            # Deduplicar por vela: solo se agregan las que todavía no están en la partición
+            new_rows = ~_candle_ms(partition_df, day).isin(_stored_candles(partition_dir, day))
+            partition_df = partition_df[new_rows.to_numpy()]
+            if partition_df.empty:
+                continue
+
+        os.makedirs(partition_dir, exist_ok=True)
+        _write_fragment(partition_df, partition_dir)
+
+        loaded.add(key)
+        written.append(partition_df)
+
+    if not written:
+        return df.iloc[0:0]
+
+    save_manifest(loaded, base_dir)
+    return pd.concat(written, ignore_index=True)
+
+
+def compact_prices(
+    base_dir: str = SILVER_PRICES_DIR,
+    dates: Optional[Iterable[str]] = None,
+    min_fragments: int = SILVER_COMPACTION_MIN_FRAGMENTS,
+) -> int:
+    """
+    Merge the fragments of silver partitions into a single file.
+
+    Only partitions with at least `min_fragments` fragments are rewritten, with the candle
+    schema, also for fragments written before it existed. The compacted file is committed with an atomic rename before the old fragments are removed, so a
+    crash in between leaves duplicated rows that the next compaction removes, never lost ones.
+
+    Args:
+        base_dir (str): Root directory of the silver prices dataset.
+        dates (Optional[Iterable[str]]): Dates ('YYYY-MM-DD') to compact, all of them by default.
+        min_fragments (int): Minimum number of fragments that triggers the compaction of a partition.
+
+    Returns:
+        int: Number of partitions compacted.
+    """
+    keys = load_manifest(base_dir)
+    if dates is not None:
+        selected_dates = set(dates)
+        keys = {key for key in keys if key[0] in selected_dates}
+
+    compacted = 0
+    for key in sorted(keys):
+        fragments = _fragments(_partition_dir(base_dir, key))
+        if len(fragments) < max(min_fragments, 2):
+            continue
+
+        # ParquetFile lee solo el archivo, sin agregar las claves de partición del path; las filas con 'time'
+        # de fragmentos anteriores al esquema de velas se convierten a timestamp
+        merged_df = pd.concat(
+            [candle_frame(pq.ParquetFile(path).read().to_pandas().assign(date=key[0], symbol=key[1])) for path in fragments],
+            ignore_index=True,
+        )
+        merged_df = merged_df.drop_duplicates(subset=["timestamp"], keep="last").sort_values("timestamp")
+        _write_fragment(merged_df, _partition_dir(base_dir, key))
+
+        for path in fragments:
+            os.remove(path)
+        compacted += 1
+
+    if compacted:
+        print(f"Compacted {compacted} partitions of the silver prices dataset.")
+    return compacted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact the fragments of the silver prices dataset.")
+    parser.add_argument("--min-fragments", type=int, default=2, help="Minimum fragments per partition to compact.")
+    args = parser.parse_args()
+    compact_prices(min_fragments=args.min_fragments)
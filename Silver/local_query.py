@@ -0,0 +1,141 @@
+import argparse
+import glob
+import logging
+import os
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+import pandas as pd
+from Silver.parquet_Silver import CRYPTO_SILVER_PATH, DATE_SILVER_PATH
+from staging.partitioned_dataset import SILVER_PRICES_DIR
+
+logger = logging.getLogger(__name__)
+
+# Tablas de silver expuestas al motor de consultas local
+SILVER_TABLES: Dict[str, str] = {
+    "daily_crypto_prices": SILVER_PRICES_DIR,
+    "crypto_description": CRYPTO_SILVER_PATH,
+    "dim_date": DATE_SILVER_PATH,
+}
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _table_source(path: str) -> Optional[str]:
+    """
+    Build the DuckDB scan of a silver table, or None if the table has no data yet.
+
+    Partitioned datasets are read with Hive partitioning, so 'date' and 'symbol'
+    become columns and filters on them prune whole directories; files are unioned by
+    column name, so partitions written before the candle schema (with 'time' instead
+    of 'timestamp') can be queried together with the new ones.
+    """
+    if os.path.isdir(path):
+        pattern = os.path.join(path, "**", "*.parquet")
+        if next(glob.iglob(pattern, recursive=True), None) is None:
+            return None
+        return f"read_parquet({_sql_string(pattern)}, hive_partitioning = true, union_by_name = true)"
+    if os.path.exists(path):
+        return f"read_parquet({_sql_string(path)})"
+    return None
+
+
+def connect(tables: Optional[Dict[str, str]] = None) -> Any:
+    """
+    Open an in-memory DuckDB database with the silver Parquet data registered as views.
+
+    The views scan the Parquet files in place on every query, so they always reflect
+    the latest silver data and nothing is copied into memory up front. Tables without
+    data are skipped with a warning on the module logger. duckdb is only needed by this
+    module, so it is imported lazily.
+
+    Args:
+        tables (Optional[Dict[str, str]]): Paths keyed by view name, `SILVER_TABLES` by default.
+
+    Returns:
+        Any: A `duckdb.DuckDBPyConnection`.
+
+    Raises:
+        ImportError: If duckdb is not installed.
+    """
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("The local query layer requires duckdb (pip install duckdb).") from e
+
+    connection = duckdb.connect(database=":memory:")
+    for name, path in (tables or SILVER_TABLES).items():
+        source = _table_source(path)
+        if source is None:
+            logger.warning("Silver table '%s' has no data yet at '%s'; skipping.", name, path)
+            continue
+        connection.execute(f'CREATE VIEW "{name}" AS SELECT * FROM {source}')
+    return connection
+
+
+def query(
+    sql: str,
+    params: Optional[Sequence[Any]] = None,
+    tables: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """
+    Run a SQL query against the local silver data.
+
+    Example:
+        query("SELECT symbol, MAX(high_price) FROM daily_crypto_prices "
+              "WHERE date >= ? GROUP BY symbol", ["2024-10-01"])
+
+    Args:
+        sql (str): Query over the views in `SILVER_TABLES`.
+        params (Optional[Sequence[Any]]): Positional parameters for the '?' placeholders.
+        tables (Optional[Dict[str, str]]): Paths keyed by view name, `SILVER_TABLES` by default.
+
+    Returns:
+        pd.DataFrame: The query result.
+    """
+    connection = connect(tables)
+    try:
+        return connection.execute(sql, list(params or [])).df()
+    finally:
+        connection.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point: `python -m Silver.local_query "SELECT ... FROM daily_crypto_prices"`.
+
+    Args:
+        argv (Optional[List[str]]): Command line arguments, defaults to `sys.argv`.
+    """
+    parser = argparse.ArgumentParser(description="Run ad-hoc SQL over the local silver Parquet data.")
+    parser.add_argument("sql", nargs="?", help="Query to run; read from --file or stdin when omitted.")
+    parser.add_argument("--file", help="File with the query to run.")
+    parser.add_argument("--csv", action="store_true", help="Print the result as CSV instead of a table.")
+    parser.add_argument("--tables", action="store_true", help="List the available tables and exit.")
+    args = parser.parse_args(argv)
+
+    if args.tables:
+        for name, path in SILVER_TABLES.items():
+            status = "available" if _table_source(path) else "no data"
+            print(f"{name}\t{status}\t{path}")
+        return
+
+    if args.sql:
+        sql = args.sql
+    elif args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            sql = f.read()
+    else:
+        sql = sys.stdin.read()
+
+    result = query(sql)
+    if args.csv:
+        result.to_csv(sys.stdout, index=False)
+    else:
+        with pd.option_context("display.max_rows", 500, "display.width", 200):
+            print(result.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,227 @@
+import numpy as np
 import pandas as pd
 import os
-from typing import Tuple
+from datetime import date as date_type
+from typing import Iterable, List, Optional, Tuple
+from staging.candle_schema import candle_frame, read_candle_partitions, write_candle_partitions
+from staging.partitioned_dataset import STAGING_PRICES_DIR, SILVER_PRICES_DIR, read_partitions
+from Silver.incremental_writer import append_prices, compact_prices
+from variables.coin_registry import get_coin_registry
 from variables.config import DIR_PATH
 
-def load_parquet_files(date: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+# Column order of the daily crypto prices in silver
+PRICE_COLUMNS: List[str] = ["date", "timestamp", "symbol", "open_price", "high_price", "low_price", "close_price"]
+
+# Silver table of coin profiles (one row per version of a profile)
+CRYPTO_SILVER_PATH: str = os.path.join(DIR_PATH, "Silver", "data", "crypto_table_silver.parquet")
+
+# Silver calendar table (dim_date)
+DATE_SILVER_PATH: str = os.path.join(DIR_PATH, "Silver", "data", "date_table_silver.parquet")
+
+# Flat file used before silver prices were partitioned
+LEGACY_SILVER_PRICES_PATH: str = os.path.join(DIR_PATH, "Silver", "data", "daily_crypto_prices_silver.parquet")
+
+
+def _migrate_legacy_silver_prices() -> None:
+    """
+    Move the history of the legacy flat silver prices file into the partitioned dataset, once.
+    """
+    if not os.path.exists(LEGACY_SILVER_PRICES_PATH) or os.path.isdir(SILVER_PRICES_DIR):
+        return
+
+    legacy_df = pd.read_parquet(LEGACY_SILVER_PRICES_PATH)
+    write_candle_partitions(legacy_df, SILVER_PRICES_DIR, "symbol")
+    os.rename(LEGACY_SILVER_PRICES_PATH, f"{LEGACY_SILVER_PRICES_PATH}.migrated")
+    print(f"Migrated {len(legacy_df)} rows from the legacy silver prices file to {SILVER_PRICES_DIR}.")
+
+
+def build_dim_date(dates: Iterable) -> pd.DataFrame:
+    """
+    Build the dim_date rows of a set of dates with vectorized `.dt` operations.
+
+    Args:
+        dates (Iterable): Dates as `date` objects, timestamps or 'YYYY-MM-DD' strings; duplicates are dropped.
+
+    Returns:
+        pd.DataFrame: One row per unique date, sorted, with the columns of the dim_date table.
+    """
+    date_series = pd.Series(pd.to_datetime(pd.Series(dates)).dt.normalize().unique()).sort_values(ignore_index=True)
+    dt = date_series.dt
+    iso_week = dt.isocalendar().week.astype("int64")
+
+    return pd.DataFrame({
+        "date": date_series,
+        "year": dt.year.astype("int64"),
+        "month": dt.month.astype("int64"),
+        "week_number": iso_week,
+        "day": dt.day.astype("int64"),
+        "yearmonth": dt.strftime("%Y%m"),
+        "month_name": dt.month_name(),
+        "day_of_week": (dt.dayofweek + 1).astype("int64"),  # Monday=1, Sunday=7
+        "day_of_year": dt.dayofyear.astype("int64"),
+        "week_of_year": iso_week,
+        "quarter": dt.quarter.astype("int64"),
+        "semester": np.where(dt.month <= 6, 1, 2).astype("int64"),
+        "is_weekend": (dt.dayofweek >= 5).to_numpy(),
+    })
+
+
+def generate_calendar(start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    Pre-generate the dim_date rows of every day in a range in one shot.
+
+    Args:
+        start_date (str): First date of the calendar, in 'YYYY-MM-DD' format.
+        end_date (str): Last date of the calendar (inclusive), in 'YYYY-MM-DD' format.
+
+    Returns:
+        pd.DataFrame: One dim_date row per day of the range.
+    """
+    return build_dim_date(pd.date_range(start_date, end_date, freq="D"))
+
+
+def read_silver_prices(
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    symbols: Optional[List[str]] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Read silver daily crypto prices, opening only the partitions that match the filters.
+
+    Args:
+        start_date (Optional[date_type]): First date to read (inclusive), as a date or 'YYYY-MM-DD'.
+        end_date (Optional[date_type]): Last date to read (inclusive), as a date or 'YYYY-MM-DD'.
+        symbols (Optional[List[str]]): Symbols to read (e.g., ['BTC', 'ETH']).
+        columns (Optional[List[str]]): Physical columns to read as stored; by default every
+            column is read and returned with the candle schema.
+
+    Returns:
+        pd.DataFrame: The matching prices, or an empty DataFrame if there is no silver data yet.
+    """
+    if columns is not None:
+        return read_partitions(SILVER_PRICES_DIR, "symbol", start_date, end_date, symbols, columns)
+    return read_candle_partitions(SILVER_PRICES_DIR, "symbol", start_date, end_date, symbols)[PRICE_COLUMNS]
+
+
+def read_silver_categories() -> pd.DataFrame:
+    """
+    Read the latest category of each symbol from the silver crypto table.
+
+    Returns:
+        pd.DataFrame: 'symbol' and 'category' columns, one row per symbol (empty if
+        the silver crypto table does not exist yet).
+    """
+    if not os.path.exists(CRYPTO_SILVER_PATH):
+        return pd.DataFrame(columns=["symbol", "category"])
+    profiles = pd.read_parquet(CRYPTO_SILVER_PATH, columns=["symbol", "category"])
+    # Las filas se agregan al final, así que la última de cada símbolo es la vigente
+    return profiles.drop_duplicates(subset=["symbol"], keep="last").reset_index(drop=True)
+
+
+def load_parquet_files(
+    dates: List[str],
+    staging_prices_df: Optional[pd.DataFrame] = None,
+    staging_crypto_df: Optional[pd.DataFrame] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """
     Load and update Parquet files for daily crypto prices, crypto data, and dates.
 
+    All the dates of a run are loaded together: the prices of every date are appended
+    to the silver dataset in one pass, and the crypto and dim_date silver tables, which
+    do not depend on the date, are read and written once per run; the dim_date rows of
+    the whole range are generated at once by `generate_calendar`.
+
+    When the staging frames are handed off by the staging task they are used instead
+    of reading the staging Parquet files again.
+
     Args:
-        date (str): The date string used for identifying the Parquet files.
+        dates (List[str]): Dates of the run, in 'YYYY-MM-DD' format.
+        staging_prices_df (Optional[pd.DataFrame]): Staging prices of the run (any dates).
+        staging_crypto_df (Optional[pd.DataFrame]): Staging crypto profiles of the run.
 
     Returns:
         Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         DataFrames for daily crypto prices, crypto data, and date information.
 
     Raises:
-        Exception: If there is an error in processing the Parquet files.
+        FileNotFoundError: If no date of the run has staging prices.
     """
+    daily_crypto_prices_df, loaded_dates = _load_staging_prices(dates, staging_prices_df)
 
-    # Paths for daily crypto prices
-    daily_crypto_prices_path = os.path.join(DIR_PATH,"staging","data",f"daily_crypto_prices_table_{date}_staging.parquet",)
-    daily_silver_path = os.path.join(DIR_PATH, "Silver", "data", "daily_crypto_prices_silver.parquet")
-        
-    # Load daily crypto prices DataFrame
-    daily_crypto_prices_df = pd.read_parquet(daily_crypto_prices_path)
-    daily_crypto_prices_df = daily_crypto_prices_df.rename(columns={"stock_symbol": "symbol"})
-    
-    # Reemplazar valores en la columna 'symbol'
-    replacement_dict = {
-    'bitcoin': 'BTC',
-    'ethereum': 'ETH',
-    'cardano': 'ADA',
-    'dogecoin': 'DOGE',
-    'axie-infinity': 'AXS',
-    'smooth-love-potion': 'SLP'
-    }
-    
-    daily_crypto_prices_df['symbol'] = daily_crypto_prices_df['symbol'].replace(replacement_dict)
+    # Silver is append-only: only the candles not stored yet are written as new fragments of their
+    # (date, symbol) partition, so the cost of a daily load does not grow with the history and a
+    # partial day is completed by a later load; compaction merges the fragments it leaves
+    _migrate_legacy_silver_prices()
+    appended_df = append_prices(daily_crypto_prices_df, SILVER_PRICES_DIR)
+    if appended_df.empty:
+        print("No new data added to daily_crypto_prices silver dataset; these candles are already loaded.")
+    else:
+        print(f"New data added to daily_crypto_prices silver dataset: {len(appended_df)} rows.")
+        compact_prices(SILVER_PRICES_DIR, dates=loaded_dates)
 
-    # Check if Silver file exists and update it
-    if os.path.exists(daily_silver_path):
-        existing_daily_df = pd.read_parquet(daily_silver_path)
-        new_data = daily_crypto_prices_df[
-            ~daily_crypto_prices_df["date"].isin(existing_daily_df["date"])
-        ]
-
-        if not new_data.empty:
-            daily_crypto_prices_df = pd.concat(
-                [existing_daily_df, new_data], ignore_index=True
-            )
-            daily_crypto_prices_df.to_parquet(daily_silver_path, index=False)
-            print("New data added to daily_crypto_prices_table_silver.")
-        else:
-            print("No new data added to daily_crypto_prices_table_silver; data for these dates already exists.")
+    # Los perfiles y el calendario no dependen de la fecha: se actualizan una sola vez por corrida,
+    # con el calendario de todo el rango generado de una vez
+    crypto_description_df = _update_crypto_silver(loaded_dates[-1], staging_crypto_df)
+    dim_date_df = _update_dim_date_silver(generate_calendar(min(dates), max(dates)))
+
+    return daily_crypto_prices_df, crypto_description_df, dim_date_df
+
+
+def _load_staging_prices(
+    dates: List[str],
+    staging_prices_df: Optional[pd.DataFrame] = None,
+) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Read the staging prices of the dates of a run, with the silver columns, and the dates that have them.
+
+    Raises:
+        FileNotFoundError: If no date of the run has staging prices.
+    """
+    if staging_prices_df is not None:
+        # La columna de fechas se convierte una sola vez para todas las fechas de la corrida
+        day_keys = pd.to_datetime(staging_prices_df["date"]).dt.strftime("%Y-%m-%d")
+        daily_crypto_prices_df = staging_prices_df[day_keys.isin(dates).to_numpy()].reset_index(drop=True)
+        if not daily_crypto_prices_df.empty:
+            daily_crypto_prices_df = candle_frame(daily_crypto_prices_df, "stock_symbol")
     else:
-        daily_crypto_prices_df.to_parquet(daily_silver_path, index=False)
-        print("File daily_crypto_prices_table_silver created with initial data.")
+        # Read only the staging partitions of the run (partition pruning on date=YYYY-MM-DD)
+        daily_crypto_prices_df = read_candle_partitions(
+            STAGING_PRICES_DIR, "stock_symbol", start_date=min(dates), end_date=max(dates)
+        )
+    if daily_crypto_prices_df.empty:
+        raise FileNotFoundError(f"No staging prices found for {', '.join(dates)} in {STAGING_PRICES_DIR}.")
+
+    loaded_dates = sorted(day.isoformat() for day in daily_crypto_prices_df["date"].unique())
+    for date in sorted(set(dates) - set(loaded_dates)):
+        print(f"No staging files found for {date}; skipping.")
+
+    daily_crypto_prices_df = daily_crypto_prices_df.rename(columns={"stock_symbol": "symbol"})
+    # Reemplazar el slug de CoinGecko por el símbolo del registro de monedas (sobre las categorías, no cada fila)
+    daily_crypto_prices_df['symbol'] = get_coin_registry().slug_symbols(daily_crypto_prices_df['symbol'])
+    return daily_crypto_prices_df[PRICE_COLUMNS], loaded_dates
 
 
+def _update_crypto_silver(date: str, staging_crypto_df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Add the new crypto profiles of the run to the silver crypto table.
+
+    Args:
+        date (str): Date whose staging crypto file is read when no frame is handed off.
+        staging_crypto_df (Optional[pd.DataFrame]): Staging crypto profiles of the run.
+
+    Returns:
+        pd.DataFrame: The crypto profiles of the run.
+    """
     # Paths for crypto data
     crypto_path = os.path.join(DIR_PATH, "staging", "data", f"crypto_table_{date}_staging.parquet")
-    crypto_silver_path = os.path.join(DIR_PATH, "Silver", "data", "crypto_table_silver.parquet")
+    crypto_silver_path = CRYPTO_SILVER_PATH
 
     # Load crypto data DataFrame
-    crypto_description_df = pd.read_parquet(crypto_path)
+    if staging_crypto_df is not None:
+        crypto_description_df = staging_crypto_df.copy()
+    else:
+        crypto_description_df = pd.read_parquet(crypto_path)
     crypto_description_df = crypto_description_df.rename(columns={"id": "bk_crypto"})
     
     # Check if Silver file exists and update it
@@ -96,26 +254,22 @@ def load_parquet_files(date: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFr
     else:
         crypto_description_df.to_parquet(crypto_silver_path, index=False)
         print("File crypto_table_silver created with initial data.")
-    
-        # Generate date DataFrame with correct dim_date structure
-    unique_dates = pd.to_datetime(daily_crypto_prices_df["date"]).dt.date.unique()
-
-    dim_date_df = pd.DataFrame(pd.to_datetime(unique_dates), columns=["date"])
-    dim_date_df["year"] = dim_date_df["date"].apply(lambda x: x.year)
-    dim_date_df["month"] = dim_date_df["date"].apply(lambda x: x.month)
-    dim_date_df["week_number"] = dim_date_df["date"].apply(lambda x: x.isocalendar()[1])
-    dim_date_df["day"] = dim_date_df["date"].apply(lambda x: x.day)
-    dim_date_df["yearmonth"] = dim_date_df["date"].apply(lambda x: x.strftime("%Y%m"))
-    dim_date_df["month_name"] = dim_date_df["date"].apply(lambda x: x.strftime("%B"))
-    dim_date_df["day_of_week"] = dim_date_df["date"].apply(lambda x: x.weekday() + 1)  # Monday=1, Sunday=7
-    dim_date_df["day_of_year"] = dim_date_df["date"].apply(lambda x: x.timetuple().tm_yday)
-    dim_date_df["week_of_year"] = dim_date_df["date"].apply(lambda x: x.isocalendar()[1])
-    dim_date_df["quarter"] = dim_date_df["date"].apply(lambda x: (x.month - 1) // 3 + 1)
-    dim_date_df["semester"] = dim_date_df["date"].apply(lambda x: 1 if x.month <= 6 else 2)
-    dim_date_df["is_weekend"] = dim_date_df["date"].apply(lambda x: x.weekday() >= 5)
-    
+
+    return crypto_description_df
+
+
+def _update_dim_date_silver(dim_date_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge dim_date rows into the silver calendar table, adding only the missing dates.
+
+    Args:
+        dim_date_df (pd.DataFrame): dim_date rows (see `build_dim_date`).
+
+    Returns:
+        pd.DataFrame: The dim_date rows to load into the warehouse.
+    """
     # Paths for date table
-    date_silver_path = os.path.join(DIR_PATH, "Silver", "data", "date_table_silver.parquet")
+    date_silver_path = DATE_SILVER_PATH
 
     # Check if Silver file exists and update it
     if os.path.exists(date_silver_path):
@@ -132,5 +286,4 @@ def load_parquet_files(date: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFr
         dim_date_df.to_parquet(date_silver_path, index=False)
         print("File date_table_silver created with initial dates.")
 
-    return daily_crypto_prices_df, crypto_description_df, dim_date_df
-    
+    return dim_date_df
@@ -1,157 +1,142 @@
 import pandas as pd
 from datetime import datetime
+from typing import Any, Dict, List
 from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from variables.connection_redshift import Bind, transaction
+from Silver.bulk_loader import bulk_insert
+from staging.candle_schema import warehouse_candles
+from staging.profile_cache import compute_content_hash
 from variables.config import REDSHIFT_SCHEMA
 
-def insert_crypto_description_scd2(engine: Engine, crypto_description_df: pd.DataFrame) -> None:
+# Columns of crypto_description provided by the silver profiles
+SCD2_COLUMNS: List[str] = ["name", "symbol", "category", "description", "bk_crypto", "logo", "website", "reddit"]
+
+# Columns of daily_crypto_prices provided by silver and the natural key of a candle
+PRICE_COLUMNS: List[str] = ["date", "time", "symbol", "open_price", "high_price", "low_price", "close_price"]
+PRICE_KEY_COLUMNS: List[str] = ["date", "time", "symbol"]
+
+
+def _profile_change_hash(row: Dict[str, Any]) -> str:
+    """
+    Return the change hash of a silver profile row, reusing the staging content hash when present.
+
+    Args:
+        row (Dict[str, Any]): Profile row with 'bk_crypto' and the descriptive columns.
+
+    Returns:
+        str: SHA-256 hex digest of the descriptive fields.
+    """
+    if row.get("content_hash"):
+        return row["content_hash"]
+    return compute_content_hash({**row, "id": row["bk_crypto"]})
+
+
+def insert_crypto_description_scd2(engine: Bind, crypto_description_df: pd.DataFrame) -> None:
     """
     Implement Slowly Changing Dimension (SCD) Type 2 in the 'crypto_description' table.
 
+    The incoming profiles are bulk-loaded into a temporary staging table and the SCD2
+    merge runs as two set-based statements in a single transaction: one UPDATE expires
+    the current rows whose change hash differs, and one INSERT adds a new current row for
+    every symbol without one. The number of round trips does not depend on the number of coins.
+
     Args:
-        engine (Engine): SQLAlchemy engine for database connection.
+        engine (Bind): SQLAlchemy engine or open connection for the database.
         crypto_description_df (pd.DataFrame): DataFrame containing crypto data to be inserted.
 
     Raises:
         Exception: If an error occurs during the database operation.
     """
-    with engine.begin() as connection:
-        rows_added = 0
-        rows_updated = 0
-
-        # Filtrar datos que no están en la base de datos
-        existing_symbols = connection.execute(
-            text(f'SELECT symbol FROM "{REDSHIFT_SCHEMA}".crypto_description WHERE is_current = 1')
-        ).fetchall()
-
-        existing_symbols_set = {row[0] for row in existing_symbols}
-
-        # Filtrar el DataFrame para que solo contenga nuevos registros
-        crypto_description_df = crypto_description_df[~crypto_description_df["symbol"].isin(existing_symbols_set)]
-
-        if crypto_description_df.empty:
-            print("No new records to insert; all records are already present in crypto_description.")
-            return
-
-        for _, row in crypto_description_df.iterrows():
-            # Verificar si hay un registro existente actual para el símbolo de criptomonedas
-            result = connection.execute(
-                text(
-                    f"""
-                    SELECT * FROM "{REDSHIFT_SCHEMA}".crypto_description
-                    WHERE symbol = :symbol AND is_current = 1
-                    """
-                ),
-                {"symbol": row["symbol"]},
+    if crypto_description_df.empty:
+        print("No records to process in crypto_description.")
+        return
+
+    stage_df = crypto_description_df[SCD2_COLUMNS].copy()
+    stage_df["change_hash"] = [_profile_change_hash(row) for row in crypto_description_df.to_dict("records")]
+    today = datetime.now().date()
+
+    with transaction(engine) as connection:
+        connection.execute(
+            text(
+                """
+                CREATE TEMP TABLE crypto_description_stage (
+                    name VARCHAR(100),
+                    symbol VARCHAR(10),
+                    category VARCHAR(50),
+                    description VARCHAR(8192),
+                    bk_crypto BIGINT,
+                    logo VARCHAR(8192),
+                    website VARCHAR(8192),
+                    reddit VARCHAR(8192),
+                    change_hash VARCHAR(64)
+                )
+                """
             )
-            current_record = result.fetchone()
-
-            if current_record:
-                # Verificar si se han cambiado valores (excluyendo start_date, end_date, is_current)
-                if (
-                    row["name"] != current_record[1]
-                    or row["category"] != current_record[3]
-                    or row["description"] != current_record[4]
-                    or row["bk_crypto"] != current_record[0]
-                    or row["logo"] != current_record[6]
-                    or row["website"] != current_record[7]
-                    or row["reddit"] != current_record[8]
-                ):
-                    # Marcar el registro existente como no actual y establecer la fecha de finalización
-                    connection.execute(
-                        text(
-                            f"""
-                            UPDATE "{REDSHIFT_SCHEMA}".crypto_description
-                            SET is_current = 0, end_date = :end_date
-                            WHERE symbol = :symbol AND is_current = 1
-                            """
-                        ),
-                        {
-                            "end_date": datetime.now().date(),
-                            "symbol": row["symbol"],
-                        },
-                    )
-                    rows_updated += 1
-
-                    # Insertar un nuevo registro con is_current = 1 y start_date = hoy
-                    connection.execute(
-                        text(
-                            f"""
-                            INSERT INTO "{REDSHIFT_SCHEMA}".crypto_description (
-                                name, symbol, category, description, bk_crypto, logo, website, reddit,
-                                start_date, end_date, is_current
-                            ) VALUES (
-                                :name, :symbol, :category, :description, :bk_crypto, :logo, :website, :reddit,
-                                :start_date, :end_date, :is_current
-                            )
-                            """
-                        ),
-                        {
-                            "name": row["name"],
-                            "symbol": row["symbol"],
-                            "category": row["category"],
-                            "description": row["description"],
-                            "bk_crypto": row["bk_crypto"],
-                            "logo": row["logo"],
-                            "website": row["website"],
-                            "reddit": row["reddit"],
-                            "start_date": datetime.now().date(),
-                            "end_date": datetime.strptime("9999-12-01", "%Y-%m-%d").date(),
-                            "is_current": 1,
-                        },
-                    )
-                    rows_added += 1
-            else:
-                # Insertar un nuevo registro si no existe un registro actual
-                connection.execute(
-                    text(
-                        f"""
-                        INSERT INTO "{REDSHIFT_SCHEMA}".crypto_description (
-                            name, symbol, category, description, bk_crypto, logo, website, reddit,
-                            start_date, end_date, is_current
-                        ) VALUES (
-                            :name, :symbol, :category, :description, :bk_crypto, :logo, :website, :reddit,
-                            :start_date, :end_date, :is_current
-                        )
-                        """
-                    ),
-                    {
-                        "name": row["name"],
-                        "symbol": row["symbol"],
-                        "category": row["category"],
-                        "description": row["description"],
-                        "bk_crypto": row["bk_crypto"],
-                        "logo": row["logo"],
-                        "website": row["website"],
-                        "reddit": row["reddit"],
-                        "start_date": datetime.now().date(),
-                        "end_date": datetime.strptime("9999-12-01", "%Y-%m-%d").date(),
-                        "is_current": 1,
-                    },
+        )
+
+        # Carga masiva de los perfiles entrantes en la tabla temporal
+        bulk_insert(connection, stage_df, "crypto_description_stage", schema=None)
+
+        # Expirar los registros actuales cuyo contenido cambió
+        rows_updated = connection.execute(
+            text(
+                f"""
+                UPDATE "{REDSHIFT_SCHEMA}".crypto_description
+                SET is_current = 0, end_date = :end_date
+                FROM crypto_description_stage s
+                WHERE "{REDSHIFT_SCHEMA}".crypto_description.symbol = s.symbol
+                AND "{REDSHIFT_SCHEMA}".crypto_description.is_current = 1
+                AND COALESCE("{REDSHIFT_SCHEMA}".crypto_description.change_hash, '') <> s.change_hash
+                """
+            ),
+            {"end_date": today},
+        ).rowcount
+
+        # Insertar una versión actual para cada símbolo nuevo o recién expirado
+        rows_added = connection.execute(
+            text(
+                f"""
+                INSERT INTO "{REDSHIFT_SCHEMA}".crypto_description (
+                    {', '.join(SCD2_COLUMNS)}, change_hash, start_date, end_date, is_current
                 )
-                rows_added += 1
-
-        # Imprimir el resultado de la operación
-        if rows_updated > 0:
-            print(f"Updated {rows_updated} records in crypto_description.")
-        if rows_added > 0:
-            print(f"Added {rows_added} new records to crypto_description.")
-        if rows_added == 0 and rows_updated == 0:
-            print("No records were added or updated in crypto_description.")
-
-            
-def insert_date_data(engine: Engine, dim_date_df: pd.DataFrame) -> None:
+                SELECT
+                    {', '.join(f's.{column}' for column in SCD2_COLUMNS)}, s.change_hash,
+                    :start_date, :end_date, 1
+                FROM crypto_description_stage s
+                LEFT JOIN "{REDSHIFT_SCHEMA}".crypto_description cd
+                ON cd.symbol = s.symbol AND cd.is_current = 1
+                WHERE cd.symbol IS NULL
+                """
+            ),
+            {
+                "start_date": today,
+                "end_date": datetime.strptime("9999-12-01", "%Y-%m-%d").date(),
+            },
+        ).rowcount
+
+        connection.execute(text("DROP TABLE crypto_description_stage"))
+
+    # Imprimir el resultado de la operación
+    if rows_updated > 0:
+        print(f"Updated {rows_updated} records in crypto_description.")
+    if rows_added > 0:
+        print(f"Added {rows_added} new records to crypto_description.")
+    if rows_added == 0 and rows_updated == 0:
+        print("No records were added or updated in crypto_description.")
+
+
+def insert_date_data(engine: Bind, dim_date_df: pd.DataFrame) -> None:
     """
     Insert new date records into the 'dim_date' without duplicating existing ones.
 
     Args:
-        engine (Engine): SQLAlchemy engine for database connection.
+        engine (Bind): SQLAlchemy engine or open connection for the database.
         dim_date_df (pd.DataFrame): DataFrame containing date data to be inserted.
 
     Raises:
         Exception: If an error occurs during the database operation.
     """
-    with engine.connect() as connection:
+    with transaction(engine) as connection:
         # Recuperar todas las fechas existentes en la tabla
         result = connection.execute(
             text(
@@ -172,58 +157,79 @@ def insert_date_data(engine: Engine, dim_date_df: pd.DataFrame) -> None:
         # Verificar si hay fechas nuevas para insertar
         if not new_dates_df.empty:
             # Insertar las nuevas fechas en la tabla
-            new_dates_df.to_sql(
-                "dim_date",
-                con=connection,
-                schema=f"{REDSHIFT_SCHEMA}",
-                if_exists="append",
-                index=False,
-            )
+            bulk_insert(connection, new_dates_df, "dim_date")
             print(f"Added {len(new_dates_df)} new dates to dim_date.")
         else:
             print("No new dates were added; all dates are already present in dim_date.")
  
-def insert_daily_crypto_prices(engine: Engine, daily_crypto_prices_df: pd.DataFrame) -> None:
+def insert_daily_crypto_prices(engine: Bind, daily_crypto_prices_df: pd.DataFrame) -> None:
     """
-    Insert or update daily crypto prices data in the 'daily_crypto_prices'.
+    Insert daily crypto prices data in the 'daily_crypto_prices' without duplicating candles.
+
+    The frame is bulk-loaded into a temporary staging table and only the candles whose
+    natural key (date, time, symbol) is missing from the fact table are inserted, with an
+    anti-join restricted to the date window being loaded. Partial days can be completed,
+    re-runs are idempotent and the cost depends on the loaded window, not on the table size.
 
     Args:
-        engine (Engine): SQLAlchemy engine for database connection.
+        engine (Bind): SQLAlchemy engine or open connection for the database.
         daily_crypto_prices_df (pd.DataFrame): DataFrame containing
             daily stock prices data to be inserted.
 
     Raises:
         Exception: If an error occurs during the database operation.
     """
-    
-    with engine.begin() as connection:
-        # Get the latest date from the daily_stock_prices_table
-        result = connection.execute(
+    if daily_crypto_prices_df.empty:
+        print("No new records to add; they were already present in daily_crypto_prices.")
+        return
+
+    # Ensure the 'date' column in daily_crypto_prices_df is in date format; the warehouse keeps
+    # separate DATE and TIME columns, derived here from the candle timestamp
+    prices_df = warehouse_candles(daily_crypto_prices_df)[PRICE_COLUMNS].copy()
+    prices_df["date"] = pd.to_datetime(prices_df["date"]).dt.date
+    # Una misma vela puede venir repetida en el frame (por ejemplo, fechas solapadas de un backfill)
+    prices_df = prices_df.drop_duplicates(subset=PRICE_KEY_COLUMNS, keep="last")
+
+    with transaction(engine) as connection:
+        connection.execute(
             text(
-                f"""
-                SELECT DISTINCT date
-                FROM "{REDSHIFT_SCHEMA}".daily_crypto_prices
+                """
+                CREATE TEMP TABLE daily_crypto_prices_stage (
+                    date DATE NOT NULL,
+                    time TIME NOT NULL,
+                    symbol VARCHAR(10) NOT NULL,
+                    open_price DECIMAL(18, 8),
+                    high_price DECIMAL(18, 8),
+                    low_price DECIMAL(18, 8),
+                    close_price DECIMAL(18, 8)
+                )
                 """
             )
         )
-        # Fetch all distinct dates into a set
-        existing_dates_in_table = {row[0] for row in result.fetchall()}
-        
-        # Ensure the 'date' column in daily_crypto_prices_df is in date format
-        daily_crypto_prices_df["date"] = pd.to_datetime(daily_crypto_prices_df["date"]).dt.date
-        
-        # Filter out rows where the date already exists in the table
-        new_prices_df = daily_crypto_prices_df[~daily_crypto_prices_df["date"].isin(existing_dates_in_table)]
-        
-        # Insert only the new records
-        if not new_prices_df.empty:
-            new_prices_df.to_sql(
-                "daily_crypto_prices",
-                con=connection,
-                schema=f"{REDSHIFT_SCHEMA}",
-                if_exists="append",
-                index=False,
-            )
-            print(f"Added {len(new_prices_df)} records to daily_crypto_prices.")
-        else:
-            print("No new records to add; they were already present in daily_crypto_prices.")
\ No newline at end of file
+        bulk_insert(connection, prices_df, "daily_crypto_prices_stage", schema=None)
+
+        # Anti-join por clave natural, limitado a la ventana de fechas que se está cargando
+        rows_added = connection.execute(
+            text(
+                f"""
+                INSERT INTO "{REDSHIFT_SCHEMA}".daily_crypto_prices ({', '.join(PRICE_COLUMNS)})
+                SELECT {', '.join(f's.{column}' for column in PRICE_COLUMNS)}
+                FROM daily_crypto_prices_stage s
+                LEFT JOIN (
+                    SELECT date, time, symbol
+                    FROM "{REDSHIFT_SCHEMA}".daily_crypto_prices
+                    WHERE date BETWEEN :start_date AND :end_date
+                ) dp
+                ON dp.date = s.date AND dp.time = s.time AND dp.symbol = s.symbol
+                WHERE dp.symbol IS NULL
+                """
+            ),
+            {"start_date": prices_df["date"].min(), "end_date": prices_df["date"].max()},
+        ).rowcount
+
+        connection.execute(text("DROP TABLE daily_crypto_prices_stage"))
+
+    if rows_added > 0:
+        print(f"Added {rows_added} records to daily_crypto_prices.")
+    else:
+        print("No new records to add; they were already present in daily_crypto_prices.")
@@ -8,10 +8,16 @@ from airflow.utils.dates import days_ago
 # Add the parent directory to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from tasks.run_staging import run_staging 
+from staging.price_staging import staging_shards
+from tasks.run_staging import run_staging_fan_in, run_staging_profiles, run_staging_shard
 from tasks.run_silver import run_silver  
 from tasks.run_gold import run_gold  
 from tasks.alert_email import send_status_email, on_failure_callback
+from variables.coin_registry import get_coin_registry
+from variables.config import COINGECKO_POOL, COINMARKETCAP_POOL
+
+# Validar el registro de monedas al cargar el DAG: un error de configuración falla acá y no como filas vacías
+get_coin_registry()
 
 # Default arguments for the DAG
 default_args = {
@@ -32,12 +38,33 @@ with DAG(
     schedule_interval="0 0 * * *",  # Todos los días a las 4 am UTC
     start_date=days_ago(1),
     catchup=False,
+    # Para un backfill, disparar el DAG con {"backfill_start": "YYYY-MM-DD", "backfill_end": "YYYY-MM-DD"}
+    params={"backfill_start": None, "backfill_end": None},
 ) as dag:
 
-    # Task to extract data from the API and generate Parquet files (Staging layer)
+    # Tasks to extract data from the API and generate Parquet files (Staging layer)
+    # Una instancia mapeada por moneda (o shard de monedas): cada una se reintenta sola y el pool
+    # del proveedor limita cuántas consultan CoinGecko al mismo tiempo
+    staging_prices_tasks = PythonOperator.partial(
+        task_id="staging_prices",
+        python_callable=run_staging_shard,
+        pool=COINGECKO_POOL,
+        # Un reintento solo extrae las monedas que no quedaron en el checkpoint de la corrida
+        retry_delay=timedelta(minutes=1),
+    ).expand(op_kwargs=staging_shards())
+
+    staging_profiles_task = PythonOperator(
+        task_id="staging_profiles",
+        python_callable=run_staging_profiles,
+        pool=COINMARKETCAP_POOL,
+        provide_context=True,
+    )
+
+    # Fan-in: corre aunque algún shard haya fallado y arma el manifest que lee silver
     staging_task = PythonOperator(
         task_id="staging_run",
-        python_callable=run_staging,
+        python_callable=run_staging_fan_in,
+        trigger_rule="all_done",
         provide_context=True,
     )
 
@@ -63,4 +90,5 @@ with DAG(
     )
     
     # Define task execution sequence
+    [staging_prices_tasks, staging_profiles_task] >> staging_task
     staging_task >> silver_task >> gold_task >> email_task
@@ -1,22 +1,77 @@
+from datetime import date as date_type, datetime
+from functools import partial
+from typing import Callable, List, Optional
 import pandas as pd
 from sqlalchemy import text
-from sqlalchemy.engine import Engine
-from variables.config import REDSHIFT_SCHEMA
+from sqlalchemy.engine import Connection
+from variables.connection_redshift import Bind, transaction
+from Silver.bulk_loader import bulk_insert
+from Silver.parquet_Silver import read_silver_prices, read_silver_categories
+from gold.interval_kpis import (
+    NO_DATA_SYMBOL,
+    STATE_COLUMNS,
+    daily_state_from_candles,
+    no_data_state,
+    kpis_from_state,
+    interval_kpis,
+    state_window,
+    save_daily_state,
+    load_daily_state,
+)
+from variables.coin_registry import get_coin_registry
+from variables.config import REDSHIFT_SCHEMA, GOLD_ENGINE
 
-def calculate_crypto_volability_and_performance(engine: Engine, date: str) -> None:
+# Modos de cálculo de los KPIs: en el worker con pandas leyendo de Redshift, dentro de Redshift con SQL,
+# o en el worker leyendo directamente el dataset Parquet de silver
+GOLD_ENGINES: List[str] = ["pandas", "warehouse", "parquet"]
+
+# Columns of crypto_volatility_and_performance, in insertion order
+KPI_COLUMNS: List[str] = [
+    'date', 'symbol', 'category', 'time_interval', 'low_price', 'high_price',
+    'volatility', 'open_price', 'close_price', 'return', 'range',
+    'average_price', 'standard_desviation'
+]
+
+
+def calculate_crypto_volability_and_performance(
+    engine: Bind,
+    date: str,
+    gold_engine: str = GOLD_ENGINE,
+    candles_df: Optional[pd.DataFrame] = None,
+) -> None:
     """
     Calculate financial attributes for the 'crypto' layer based on daily crypto data
     and insert the results into the 'crypto_volatility_and_performance' table in the database.
-    
+
+    With the 'warehouse' engine the KPIs are computed inside Redshift by a single
+    INSERT ... SELECT, so no candle data leaves the warehouse; the 'pandas' engine
+    reads the candles and aggregates them in the worker; the 'parquet' engine computes
+    them from the local silver dataset and only loads the small result into Redshift.
+
+    Besides the 'daily' row, the weekly and monthly (to date) and rolling 7/30-day
+    KPIs of the windows ending on the date are inserted, computed from the persisted
+    daily state of each coin.
+
+    The 'pandas' and 'parquet' engines use `candles_df` when the silver task handed
+    off the candles of the run, instead of reading them again; the 'pandas' engine
+    still takes the categories from the current profiles in the warehouse, so the
+    handoff does not change its output. The 'warehouse' engine does not read candles
+    into the worker and ignores it.
+
     Args:
-        engine (Engine): SQLAlchemy engine for database connection.
+        engine (Bind): SQLAlchemy engine or open connection for the database.
         date (str): Date for which the crypto attributes are calculated.
+        gold_engine (str): One of `GOLD_ENGINES`.
+        candles_df (Optional[pd.DataFrame]): Silver candles with their category, covering the date.
 
     Raises:
+        ValueError: If the gold engine is unknown.
         Exception: If there is an issue with the database query or insertion.
     """
+    if gold_engine not in GOLD_ENGINES:
+        raise ValueError(f"Unknown gold engine '{gold_engine}'. Expected one of {GOLD_ENGINES}.")
 
-    with engine.begin() as connection:
+    with transaction(engine) as connection:
         # Check if the date already exists in the crypto_volatility_and_performance table
         check_query = text(f"""
             SELECT 1 FROM "{REDSHIFT_SCHEMA}".crypto_volatility_and_performance
@@ -29,57 +84,323 @@ def calculate_crypto_volability_and_performance(engine: Engine, date: str) -> No
             print(f"Data for the date {date} already exists. No new calculations were made in crypto_volatility_and_performance.")
             return
 
-        # Read data from daily_crypto_prices for the given date and join with crypto_description to get the category
-        query = text(f"""
-            SELECT
-                dp.date,
-                dp.symbol,
-                dp.open_price,
-                dp.high_price,
-                dp.low_price,
-                dp.close_price,
-                cd.category
-            FROM "{REDSHIFT_SCHEMA}".daily_crypto_prices dp
-            LEFT JOIN "{REDSHIFT_SCHEMA}".crypto_description cd
-            ON dp.symbol = cd.symbol
-            WHERE dp.date = :date
-            AND cd.is_current = 1
-        """)
-        df = pd.read_sql_query(query, connection, params={'date': date})
+        if gold_engine == "warehouse":
+            inserted = _insert_kpis_in_warehouse(connection, date)
+        elif gold_engine == "parquet":
+            inserted = _insert_kpis_from_parquet(connection, date, candles_df)
+        else:
+            inserted = _insert_kpis_with_pandas(connection, date, candles_df)
 
-        if df.empty:
+        if inserted == 0:
             print(f"No data available for the {date}.")
             return
 
-        # Calculate daily metrics
-        metrics = df.groupby(['date', 'symbol', 'category']).agg(
-            low_price=('low_price', 'min'),
-            high_price=('high_price', 'max'),
-            open_price=('open_price', 'first'),
-            close_price=('close_price', 'last'),
-            average_price=('close_price', 'mean'),
-            standard_desviation=('close_price', 'std'),
-        ).reset_index()
-
-        # Calculate additional metrics
-        metrics['volatility'] = (metrics['high_price'] - metrics['low_price']) / metrics['close_price']
-        metrics['return'] = (metrics['close_price'] - metrics['open_price']) / metrics['open_price'] * 100
-        metrics['range'] = metrics['high_price'] - metrics['low_price']
-        metrics['time_interval'] = 'daily'
-
-        # Prepare the DataFrame for insertion
-        metrics = metrics[['date', 'symbol', 'category', 'time_interval', 'low_price', 'high_price', 
-                           'volatility', 'open_price', 'close_price', 'return', 'range', 
-                           'average_price', 'standard_desviation']]
-
-        # Insert calculated metrics into the 'crypto_volatility_and_performance' table
-        metrics.to_sql(
-            'crypto_volatility_and_performance',
-            con=connection,
-            schema=f'{REDSHIFT_SCHEMA}',
-            if_exists='append',
-            index=False
-        )
-
         # Log the successful insertion of calculated attributes
         print(f"KPIs successfully inserted for the date {date}.")
+
+
+def _candles_of_date(candles_df: pd.DataFrame, date: str) -> pd.DataFrame:
+    """Select the handed-off candles of one date."""
+    day = datetime.strptime(date, '%Y-%m-%d').date()
+    return candles_df[pd.to_datetime(candles_df['date']).dt.date == day].reset_index(drop=True)
+
+
+def _insert_kpis_with_pandas(connection: Connection, date: str, candles_df: Optional[pd.DataFrame] = None) -> int:
+    """
+    Compute the daily KPIs in the worker with pandas and bulk-load them.
+
+    Args:
+        connection (Connection): Connection with an active transaction.
+        date (str): Date for which the crypto attributes are calculated.
+        candles_df (Optional[pd.DataFrame]): Handed-off candles, read from the warehouse if None;
+            their category is replaced by the current one in the warehouse.
+
+    Returns:
+        int: Number of KPI rows inserted.
+    """
+    if candles_df is not None:
+        # Solo cambia el transporte de las velas: la categoría sigue saliendo de la fila vigente (SCD2) del warehouse
+        candles = _candles_of_date(candles_df, date).drop(columns='category', errors='ignore')
+        candles['symbol'] = candles['symbol'].astype(str)
+        candles = candles.merge(_current_categories(connection), on='symbol', how='inner')
+        return _insert_kpis_from_candles(connection, date, candles)
+
+    # Read data from daily_crypto_prices for the given date and join with crypto_description to get the category
+    query = text(f"""
+        SELECT
+            dp.date,
+            dp.time,
+            dp.symbol,
+            dp.open_price,
+            dp.high_price,
+            dp.low_price,
+            dp.close_price,
+            cd.category
+        FROM "{REDSHIFT_SCHEMA}".daily_crypto_prices dp
+        LEFT JOIN "{REDSHIFT_SCHEMA}".crypto_description cd
+        ON dp.symbol = cd.symbol
+        WHERE dp.date = :date
+        AND cd.is_current = 1
+    """)
+    df = pd.read_sql_query(query, connection, params={'date': date})
+    return _insert_kpis_from_candles(connection, date, df)
+
+
+def _current_categories(connection: Connection) -> pd.DataFrame:
+    """Read the category of the current (SCD2) profile of each symbol from the warehouse."""
+    query = text(f"""
+        SELECT symbol, category
+        FROM "{REDSHIFT_SCHEMA}".crypto_description
+        WHERE is_current = 1
+    """)
+    return pd.read_sql_query(query, connection)
+
+
+def _insert_kpis_from_candles(
+    connection: Connection,
+    date: str,
+    candles_df: pd.DataFrame,
+    recover_state: Optional[Callable[[date_type, date_type], pd.DataFrame]] = None,
+) -> int:
+    """
+    Compute the daily and interval KPIs of a date from its candles and bulk-load them.
+
+    Args:
+        connection (Connection): Connection with an active transaction.
+        date (str): Date for which the crypto attributes are calculated.
+        candles_df (pd.DataFrame): Candles of the date with their category.
+        recover_state (Optional[Callable[[date_type, date_type], pd.DataFrame]]): Passed
+            to `_insert_interval_kpis`.
+
+    Returns:
+        int: Number of KPI rows inserted.
+    """
+    if candles_df.empty:
+        return 0
+
+    # Reduce the candles to the daily running state and derive the daily metrics from it
+    state = daily_state_from_candles(candles_df)
+    metrics = kpis_from_state(state, date, 'daily')
+
+    # Insert calculated metrics into the 'crypto_volatility_and_performance' table
+    inserted = bulk_insert(connection, metrics[KPI_COLUMNS], 'crypto_volatility_and_performance')
+    return inserted + _insert_interval_kpis(connection, date, state, recover_state)
+
+
+def _silver_candles(start_date: date_type, end_date: date_type) -> pd.DataFrame:
+    """
+    Read the silver candles of a date range with their current category.
+
+    Only the date and symbol partitions of the range and of the coins in the registry
+    are opened. Candles of symbols without a category are dropped, like the join with
+    the current profiles in the warehouse.
+
+    Args:
+        start_date (date_type): First date (inclusive).
+        end_date (date_type): Last date (inclusive).
+
+    Returns:
+        pd.DataFrame: Candles with 'date', 'timestamp', 'symbol', 'category' and the prices.
+    """
+    candles = read_silver_prices(start_date, end_date, symbols=get_coin_registry().symbols)
+    if candles.empty:
+        return candles
+    candles['symbol'] = candles['symbol'].astype(str)
+    return candles.merge(read_silver_categories(), on='symbol', how='inner')
+
+
+def _silver_daily_state(start_date: date_type, end_date: date_type) -> pd.DataFrame:
+    """Compute the daily states of a date range from the silver dataset."""
+    return daily_state_from_candles(_silver_candles(start_date, end_date))
+
+
+def _insert_kpis_from_parquet(connection: Connection, date: str, candles_df: Optional[pd.DataFrame] = None) -> int:
+    """
+    Compute the KPIs from the local silver Parquet dataset and bulk-load the result.
+
+    No candle is read from the warehouse: the only warehouse traffic is the insert of
+    the KPI rows, so the task keeps working while the warehouse is slow to query.
+
+    Args:
+        connection (Connection): Connection with an active transaction.
+        date (str): Date for which the crypto attributes are calculated.
+        candles_df (Optional[pd.DataFrame]): Handed-off candles, read from the silver dataset if None.
+
+    Returns:
+        int: Number of KPI rows inserted.
+    """
+    if candles_df is not None:
+        candles = _candles_of_date(candles_df, date)
+    else:
+        day = datetime.strptime(date, '%Y-%m-%d').date()
+        candles = _silver_candles(day, day)
+    return _insert_kpis_from_candles(connection, date, candles, recover_state=_silver_daily_state)
+
+
+def _candles_query(condition: str) -> str:
+    """
+    Build the query of the candles matching `condition`, with the first open and last
+    close by time of each (date, symbol) attached to every row.
+    """
+    return f"""
+        SELECT
+            dp.date,
+            dp.symbol,
+            cd.category,
+            dp.low_price,
+            dp.high_price,
+            dp.close_price,
+            FIRST_VALUE(dp.open_price) OVER (
+                PARTITION BY dp.date, dp.symbol ORDER BY dp.time
+                ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+            ) AS first_open,
+            LAST_VALUE(dp.close_price) OVER (
+                PARTITION BY dp.date, dp.symbol ORDER BY dp.time
+                ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+            ) AS last_close
+        FROM "{REDSHIFT_SCHEMA}".daily_crypto_prices dp
+        JOIN "{REDSHIFT_SCHEMA}".crypto_description cd
+        ON dp.symbol = cd.symbol AND cd.is_current = 1
+        WHERE {condition}
+    """
+
+
+def _daily_state_in_warehouse(connection: Connection, start_date: date_type, end_date: date_type) -> pd.DataFrame:
+    """
+    Compute the daily running state of a date range inside Redshift.
+
+    Only one small row per (date, symbol) crosses the network.
+
+    Args:
+        connection (Connection): Connection with an active transaction.
+        start_date (date_type): First date (inclusive).
+        end_date (date_type): Last date (inclusive).
+
+    Returns:
+        pd.DataFrame: Daily states with the columns in `STATE_COLUMNS`.
+    """
+    query = text(f"""
+        SELECT
+            date,
+            symbol,
+            MAX(category) AS category,
+            COUNT(close_price) AS count,
+            AVG(CAST(close_price AS DOUBLE PRECISION)) AS mean_close,
+            VAR_POP(CAST(close_price AS DOUBLE PRECISION)) * COUNT(close_price) AS m2_close,
+            MAX(first_open) AS open_price,
+            MAX(last_close) AS close_price,
+            MIN(low_price) AS low_price,
+            MAX(high_price) AS high_price
+        FROM ({_candles_query("dp.date BETWEEN :start_date AND :end_date")}) candles
+        GROUP BY date, symbol
+    """)
+    state = pd.read_sql_query(query, connection, params={'start_date': start_date, 'end_date': end_date})
+    numeric = ['mean_close', 'm2_close', 'open_price', 'close_price', 'low_price', 'high_price']
+    state[numeric] = state[numeric].astype('float64')
+    return state[STATE_COLUMNS]
+
+
+def _insert_interval_kpis(
+    connection: Connection,
+    date: str,
+    day_state: pd.DataFrame,
+    recover_state: Optional[Callable[[date_type, date_type], pd.DataFrame]] = None,
+) -> int:
+    """
+    Persist the state of the new day and insert the weekly, monthly and rolling KPIs
+    of the windows that end on it.
+
+    The windows are computed from the persisted daily states, so history is never
+    rescanned; days of the window missing from the local state (e.g. loaded before it
+    existed) are computed once by `recover_state` and persisted. Recovered days without
+    candles are persisted as `NO_DATA_SYMBOL` markers, so they are not queried again.
+
+    Args:
+        connection (Connection): Connection with an active transaction.
+        date (str): Day whose windows are updated.
+        day_state (pd.DataFrame): Daily state of `date`.
+        recover_state (Optional[Callable[[date_type, date_type], pd.DataFrame]]): Function that
+            computes the daily states of a date range, in the warehouse by default.
+
+    Returns:
+        int: Number of interval KPI rows inserted.
+    """
+    save_daily_state(day_state)
+    window = state_window(date)
+    state = load_daily_state(window['start_date'], window['end_date'], include_no_data=True)
+
+    known_dates = set(pd.to_datetime(state['date']).dt.date) if not state.empty else set()
+    state = state[state['symbol'] != NO_DATA_SYMBOL]
+    missing = [
+        day.date() for day in pd.date_range(window['start_date'], window['end_date'], freq='D')
+        if day.date() not in known_dates
+    ]
+    if missing:
+        recover_state = recover_state or partial(_daily_state_in_warehouse, connection)
+        recovered = recover_state(min(missing), max(missing))
+        recovered = recovered[pd.to_datetime(recovered['date']).dt.date.isin(missing)]
+        # Los días sin velas se guardan como marcadores para no volver a consultarlos
+        recovered_dates = set(pd.to_datetime(recovered['date']).dt.date)
+        save_daily_state(no_data_state([day for day in missing if day not in recovered_dates]))
+        if not recovered.empty:
+            save_daily_state(recovered)
+            state = pd.concat([state, recovered], ignore_index=True)
+
+    kpis = interval_kpis(state, date)
+    if kpis.empty:
+        return 0
+    return bulk_insert(connection, kpis[KPI_COLUMNS], 'crypto_volatility_and_performance')
+
+
+def _insert_kpis_in_warehouse(connection: Connection, date: str) -> int:
+    """
+    Compute the daily KPIs inside Redshift with a single INSERT ... SELECT.
+
+    Open and close are the first and last candles by time, taken with window
+    functions over each (date, symbol) partition.
+
+    Args:
+        connection (Connection): Connection with an active transaction.
+        date (str): Date for which the crypto attributes are calculated.
+
+    Returns:
+        int: Number of KPI rows inserted.
+    """
+    columns = ', '.join(f'"{column}"' for column in KPI_COLUMNS)
+    query = text(f"""
+        INSERT INTO "{REDSHIFT_SCHEMA}".crypto_volatility_and_performance ({columns})
+        SELECT
+            date,
+            symbol,
+            category,
+            'daily',
+            low_price,
+            high_price,
+            (high_price - low_price) / NULLIF(close_price, 0),
+            open_price,
+            close_price,
+            (close_price - open_price) / NULLIF(open_price, 0) * 100,
+            high_price - low_price,
+            average_price,
+            standard_desviation
+        FROM (
+            SELECT
+                date,
+                symbol,
+                category,
+                MIN(low_price) AS low_price,
+                MAX(high_price) AS high_price,
+                MAX(first_open) AS open_price,
+                MAX(last_close) AS close_price,
+                AVG(close_price) AS average_price,
+                STDDEV_SAMP(close_price) AS standard_desviation
+            FROM ({_candles_query("dp.date = :date")}) candles
+            GROUP BY date, symbol, category
+        ) daily
+    """)
+    inserted = connection.execute(query, {'date': date}).rowcount
+    if inserted == 0:
+        return 0
+
+    day = datetime.strptime(date, '%Y-%m-%d').date()
+    return inserted + _insert_interval_kpis(connection, date, _daily_state_in_warehouse(connection, day, day))
@@ -0,0 +1,249 @@
+import os
+from datetime import date as date_type, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from gold.kpi_kernel import candle_state
+from staging.partitioned_dataset import DateLike, read_partitions, to_date, write_partitions
+from variables.config import DIR_PATH
+
+# Estado diario por moneda persistido en gold/data/daily_kpi_state/date=YYYY-MM-DD/symbol=XXX/part-0.parquet
+GOLD_STATE_DIR: str = os.path.join(DIR_PATH, "gold", "data", "daily_kpi_state")
+
+# Running state of one (date, symbol): enough to merge any set of days without the candles.
+# mean_close/m2_close are the mean and the sum of squared deviations of the close price.
+STATE_COLUMNS: List[str] = [
+    "date", "symbol", "category", "count", "mean_close", "m2_close",
+    "open_price", "close_price", "low_price", "high_price",
+]
+
+# Símbolo de las filas que marcan un día sin velas (antes del inicio del pipeline o un hueco):
+# el día queda registrado en el estado y no se vuelve a recuperar en cada corrida
+NO_DATA_SYMBOL: str = "NO_DATA"
+
+# Intervals computed from the persisted state, besides 'daily'
+INTERVALS: List[str] = ["weekly", "monthly", "rolling_7d", "rolling_30d"]
+
+
+def window_start(interval: str, day: date_type) -> date_type:
+    """
+    Return the first day of the window of an interval that ends on `day`.
+
+    'weekly' and 'monthly' are week-to-date (ISO week, from Monday) and month-to-date
+    windows; the rolling intervals cover the last 7 or 30 days including `day`.
+
+    Args:
+        interval (str): 'daily' or one of `INTERVALS`.
+        day (date_type): Last day of the window.
+
+    Returns:
+        date_type: First day of the window.
+
+    Raises:
+        ValueError: If the interval is unknown.
+    """
+    if interval == "daily":
+        return day
+    if interval == "weekly":
+        return day - timedelta(days=day.weekday())
+    if interval == "monthly":
+        return day.replace(day=1)
+    if interval == "rolling_7d":
+        return day - timedelta(days=6)
+    if interval == "rolling_30d":
+        return day - timedelta(days=29)
+    raise ValueError(f"Unknown time interval '{interval}'.")
+
+
+def daily_state_from_candles(candles_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce the candles of one or more days to their per-day running state.
+
+    The candles do not need to be sorted: open and close are found by time with the
+    linear-time kernel of `gold.kpi_kernel`.
+
+    Args:
+        candles_df (pd.DataFrame): Candles with 'date', 'timestamp' (or 'time'), 'symbol',
+            'category' and the open/high/low/close prices.
+
+    Returns:
+        pd.DataFrame: One row per (date, symbol) with the columns in `STATE_COLUMNS`.
+    """
+    if candles_df.empty:
+        return pd.DataFrame(columns=STATE_COLUMNS)
+    state = candle_state(candles_df, ["date", "symbol"])
+    # El estado es chico: el símbolo categórico de las velas se guarda como texto
+    state["symbol"] = state["symbol"].astype(str)
+    return state[STATE_COLUMNS]
+
+
+def merge_state(state_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge the daily states of a window into one state per symbol.
+
+    Counts, means and squared deviations are combined with the parallel variance
+    formula, open and close come from the first and last day of the window and the
+    category from the last day.
+
+    Args:
+        state_df (pd.DataFrame): Daily states with the columns in `STATE_COLUMNS`.
+
+    Returns:
+        pd.DataFrame: One row per symbol with 'symbol', 'category', 'count', 'mean_close',
+        'm2_close', 'open_price', 'close_price', 'low_price' and 'high_price'.
+    """
+    df = state_df.sort_values(["symbol", "date"], kind="stable").reset_index(drop=True)
+    grouped = df.groupby("symbol", sort=True)
+
+    merged = grouped.agg(
+        category=("category", "last"),
+        count=("count", "sum"),
+        open_price=("open_price", "first"),
+        close_price=("close_price", "last"),
+        low_price=("low_price", "min"),
+        high_price=("high_price", "max"),
+    )
+    weighted_sum = (df["count"] * df["mean_close"]).groupby(df["symbol"]).sum()
+    merged["mean_close"] = weighted_sum / merged["count"]
+    deviation = df["mean_close"] - df["symbol"].map(merged["mean_close"])
+    merged["m2_close"] = (df["m2_close"] + df["count"] * deviation ** 2).groupby(df["symbol"]).sum()
+    return merged.reset_index()
+
+
+def kpis_from_state(state_df: pd.DataFrame, day: DateLike, interval: str) -> pd.DataFrame:
+    """
+    Compute the KPIs of an interval ending on `day` from the persisted daily states.
+
+    Args:
+        state_df (pd.DataFrame): Daily states covering at least the window of the interval.
+        day (DateLike): Last day of the window, used as the 'date' of the KPI rows.
+        interval (str): 'daily' or one of `INTERVALS`.
+
+    Returns:
+        pd.DataFrame: Rows with the columns of 'crypto_volatility_and_performance'.
+    """
+    day = to_date(day)
+    start = window_start(interval, day)
+    dates = pd.to_datetime(state_df["date"]).dt.date if not state_df.empty else pd.Series(dtype=object)
+    window = state_df[(dates >= start) & (dates <= day)]
+    if window.empty:
+        return pd.DataFrame()
+
+    merged = merge_state(window)
+    count = merged["count"].to_numpy(dtype="float64")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(merged["m2_close"].to_numpy(dtype="float64") / (count - 1))
+    std[count < 2] = np.nan
+
+    kpis = pd.DataFrame({
+        "date": day,
+        "symbol": merged["symbol"],
+        "category": merged["category"],
+        "time_interval": interval,
+        "low_price": merged["low_price"],
+        "high_price": merged["high_price"],
+        "volatility": (merged["high_price"] - merged["low_price"]) / merged["close_price"],
+        "open_price": merged["open_price"],
+        "close_price": merged["close_price"],
+        "return": (merged["close_price"] - merged["open_price"]) / merged["open_price"] * 100,
+        "range": merged["high_price"] - merged["low_price"],
+        "average_price": merged["mean_close"],
+        "standard_desviation": std,
+    })
+    return kpis
+
+
+def interval_kpis(state_df: pd.DataFrame, day: DateLike, intervals: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Compute the KPIs of every multi-day interval ending on `day`.
+
+    Args:
+        state_df (pd.DataFrame): Daily states covering the widest window.
+        day (DateLike): Last day of the windows.
+        intervals (Optional[List[str]]): Intervals to compute, `INTERVALS` by default.
+
+    Returns:
+        pd.DataFrame: KPI rows of all the intervals (empty if there is no state).
+    """
+    frames = [kpis_from_state(state_df, day, interval) for interval in (intervals or INTERVALS)]
+    frames = [frame for frame in frames if not frame.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def state_window(day: DateLike, intervals: Optional[List[str]] = None) -> Dict[str, date_type]:
+    """
+    Return the range of daily states needed to compute the intervals ending on `day`.
+
+    Args:
+        day (DateLike): Last day of the windows.
+        intervals (Optional[List[str]]): Intervals to compute, `INTERVALS` by default.
+
+    Returns:
+        Dict[str, date_type]: 'start_date' and 'end_date' of the range.
+    """
+    day = to_date(day)
+    return {
+        "start_date": min(window_start(interval, day) for interval in (intervals or INTERVALS)),
+        "end_date": day,
+    }
+
+
+def no_data_state(days: List[date_type]) -> pd.DataFrame:
+    """
+    Build the marker states of days that have no candles.
+
+    Args:
+        days (List[date_type]): Days without candles.
+
+    Returns:
+        pd.DataFrame: One `NO_DATA_SYMBOL` row per day, with a zero count.
+    """
+    return pd.DataFrame({
+        "date": list(days),
+        "symbol": NO_DATA_SYMBOL,
+        "category": "",
+        "count": np.zeros(len(days), dtype="int64"),
+        **{column: np.full(len(days), np.nan) for column in STATE_COLUMNS[4:]},
+    })[STATE_COLUMNS]
+
+
+def save_daily_state(state_df: pd.DataFrame, base_dir: str = GOLD_STATE_DIR) -> None:
+    """
+    Persist daily states, replacing the partitions of the dates and symbols they contain.
+
+    Args:
+        state_df (pd.DataFrame): Daily states with the columns in `STATE_COLUMNS`.
+        base_dir (str): Root directory of the state dataset.
+    """
+    if state_df.empty:
+        return
+    df = state_df[STATE_COLUMNS].copy()
+    df["date"] = pd.to_datetime(df["date"]).dt.date
+    write_partitions(df, base_dir, "symbol")
+
+
+def load_daily_state(
+    start_date: DateLike,
+    end_date: DateLike,
+    base_dir: str = GOLD_STATE_DIR,
+    include_no_data: bool = False,
+) -> pd.DataFrame:
+    """
+    Load the persisted daily states of a date range.
+
+    Args:
+        start_date (DateLike): First date (inclusive).
+        end_date (DateLike): Last date (inclusive).
+        base_dir (str): Root directory of the state dataset.
+        include_no_data (bool): Keep the `NO_DATA_SYMBOL` markers of days without candles.
+
+    Returns:
+        pd.DataFrame: Daily states with the columns in `STATE_COLUMNS` (empty if none).
+    """
+    df = read_partitions(base_dir, "symbol", start_date, end_date)
+    if df.empty:
+        return pd.DataFrame(columns=STATE_COLUMNS)
+    df["symbol"] = df["symbol"].astype(str)
+    if not include_no_data:
+        df = df[df["symbol"] != NO_DATA_SYMBOL]
+    return df[STATE_COLUMNS].reset_index(drop=True)
@@ -0,0 +1,120 @@
+from typing import List, Tuple
+import numpy as np
+import pandas as pd
+
+
+def time_to_seconds(times: pd.Series) -> np.ndarray:
+    """
+    Convert a column of candle times to seconds since midnight.
+
+    Accepts 'HH:MM:SS' strings, `datetime.time` objects (as returned by the warehouse)
+    and timedeltas.
+
+    Args:
+        times (pd.Series): Candle times.
+
+    Returns:
+        np.ndarray: float64 seconds since midnight.
+    """
+    if pd.api.types.is_timedelta64_dtype(times):
+        return times.dt.total_seconds().to_numpy(dtype="float64")
+    return pd.to_timedelta(times.astype(str)).dt.total_seconds().to_numpy(dtype="float64")
+
+
+def candle_order(candles_df: pd.DataFrame) -> np.ndarray:
+    """
+    Return the value that orders candles in time.
+
+    Candles with the compact schema carry a UTC timestamp, used directly as int64
+    milliseconds; candles read from the warehouse carry a 'time' column instead.
+
+    Args:
+        candles_df (pd.DataFrame): Candles with 'timestamp' or 'time'.
+
+    Returns:
+        np.ndarray: float64 order values (exact for millisecond timestamps).
+    """
+    if "timestamp" in candles_df.columns:
+        timestamps = pd.to_datetime(candles_df["timestamp"], utc=True).astype("datetime64[ms, UTC]")
+        return timestamps.to_numpy(dtype="datetime64[ms]").view("int64").astype("float64")
+    return time_to_seconds(candles_df["time"])
+
+
+def group_first_last(codes: np.ndarray, n_groups: int, order: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find, for every group, the row with the smallest and the largest `order` value.
+
+    Runs in linear time with unbuffered ufunc reductions instead of sorting the rows.
+    Ties are broken by row position (the first row for the minimum, the last one for
+    the maximum), so the result does not depend on anything but the input.
+
+    Args:
+        codes (np.ndarray): Group code of each row, in [0, n_groups).
+        n_groups (int): Number of groups.
+        order (np.ndarray): Value that orders the rows of a group (e.g. the candle time).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Row positions of the first and last row of each group.
+    """
+    positions = np.arange(len(codes))
+
+    group_min = np.full(n_groups, np.inf)
+    group_max = np.full(n_groups, -np.inf)
+    np.minimum.at(group_min, codes, order)
+    np.maximum.at(group_max, codes, order)
+
+    first = np.full(n_groups, len(codes))
+    last = np.full(n_groups, -1)
+    is_first = order == group_min[codes]
+    is_last = order == group_max[codes]
+    np.minimum.at(first, codes[is_first], positions[is_first])
+    np.maximum.at(last, codes[is_last], positions[is_last])
+    return first, last
+
+
+def candle_state(candles_df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """
+    Reduce candles to per-group running state in a single vectorized pass.
+
+    Open and close are the open of the earliest candle and the close of the latest
+    candle by time; the category is taken from the latest candle.
+
+    Args:
+        candles_df (pd.DataFrame): Candles with the `keys` columns, 'timestamp' or 'time',
+            'category' and the open/high/low/close prices, in any row order.
+        keys (List[str]): Columns that identify a group, e.g. ['date', 'symbol'].
+
+    Returns:
+        pd.DataFrame: One row per group, ordered by the keys, with the key columns,
+        'category', 'count', 'mean_close', 'm2_close', 'open_price', 'close_price',
+        'low_price' and 'high_price'.
+    """
+    codes, uniques = pd.MultiIndex.from_frame(candles_df[keys]).factorize(sort=True)
+    n_groups = len(uniques)
+
+    close = candles_df["close_price"].to_numpy(dtype="float64")
+    valid = ~np.isnan(close)
+    count = np.bincount(codes[valid], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(codes[valid], weights=close[valid], minlength=n_groups) / count
+    deviation = close[valid] - mean[codes[valid]]
+    m2 = np.bincount(codes[valid], weights=deviation * deviation, minlength=n_groups)
+
+    low = np.full(n_groups, np.inf)
+    high = np.full(n_groups, -np.inf)
+    # fmin/fmax ignoran los NaN, igual que min/max de pandas
+    np.fmin.at(low, codes, candles_df["low_price"].to_numpy(dtype="float64"))
+    np.fmax.at(high, codes, candles_df["high_price"].to_numpy(dtype="float64"))
+
+    first, last = group_first_last(codes, n_groups, candle_order(candles_df))
+
+    state = uniques.to_frame(index=False, name=keys)
+    state["category"] = candles_df["category"].to_numpy()[last]
+    state["count"] = count
+    state["mean_close"] = mean
+    state["m2_close"] = m2
+    state["open_price"] = candles_df["open_price"].to_numpy(dtype="float64")[first]
+    state["close_price"] = close[last]
+    state["low_price"] = low
+    state["high_price"] = high
+    return state
@@ -1,40 +1,43 @@
+import numpy as np
 import pandas as pd
 import requests
-import time
-from datetime import datetime
-from typing import Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from staging.http_client import request_json
+from variables.config import (
+    COINGECKO_API_URL,
+    COINMARKETCAP_API_URL,
+    CMC_PROFILE_BATCH_SIZE,
+    BACKFILL_WINDOW_DAYS,
+    BACKFILL_CANDLE_INTERVAL,
+)
 
 
-def get_crypto_ohlc_data(coin: str, date: str) -> pd.DataFrame:
+def get_crypto_ohlc_data(coin: str, date: str, base_url: str = COINGECKO_API_URL) -> pd.DataFrame:
     """
     Obtiene los precios OHLC de una criptomoneda para una fecha específica desde la API de CoinGecko.
 
     Args:
         coin (str): El nombre de la criptomoneda (e.g., 'ethereum', 'bitcoin').
         date (str): La fecha para la cual se obtienen los precios en formato 'YYYY-MM-DD'.
+        base_url (str): URL base de la API de CoinGecko (configurable para usar un servidor stub).
 
     Returns:
-        pd.DataFrame: Un DataFrame con las columnas 'date', 'time_hh_mm_ss', 'stock_symbol', 
-                      'open_price', 'high_price', 'low_price', 'close_price', y 'volume'.
+        pd.DataFrame: Un DataFrame con las columnas 'date', 'timestamp', 'stock_symbol',
+                      'open_price', 'high_price', 'low_price' y 'close_price'.
                       Devuelve un DataFrame vacío si no se encuentran datos.
     """
     # Definir la URL de la API y los parámetros para la solicitud. No es necesario API KEY porque es pública y gratuita dicha API
-    API_URL = "https://api.coingecko.com/api/v3"
     COIN_OHLC = f"/coins/{coin}/ohlc"
     OHLC_PARAMS = {
         "vs_currency": "usd", # Indicamos la moneda en que queremos ver la cotización
         "days": 1  # Se puede ajustar según la API
     }
 
-    url: str = API_URL + COIN_OHLC
+    url: str = base_url + COIN_OHLC
 
     try:
-        # Make a GET request to the REST API
-        response: requests.Response = requests.get(url, params=OHLC_PARAMS)
-        # Make sure the request was successful
-        response.raise_for_status()
-        # Python automáticamente convierte los json en diccionario
-        data: Optional[Dict] = response.json()
+        # GET a través de la sesión compartida: respeta el rate limiter de CoinGecko y reintenta con backoff
+        data: Optional[Dict] = request_json("coingecko", url, params=OHLC_PARAMS)
     
     # Esta parte del código es un bloque de manejo de excepciones en Python, utilizado para gestionar errores que puedan ocurrir durante la ejecución
     # de una solicitud HTTP con la librería requests al aplicar el GET request. La variable e almacena el mensaje de error específico generado por la excepción.
@@ -42,42 +45,191 @@ def get_crypto_ohlc_data(coin: str, date: str) -> pd.DataFrame:
         print(f"Error al realizar la solicitud a la API de CoinGecko: {e}")
         return pd.DataFrame()
 
-    # Crear una lista de diccionarios para almacenar las filas
-    rows = []
-
-    # Procesar los datos y crear las filas
-    for price_info in data:
-        # Obtener el timestamp y convertirlo a fecha
-        timestamp = price_info[0]
-        time = datetime.fromtimestamp(timestamp / 1000)
-        
-        # Filtrar los datos por la fecha especificada porque sino te trae los datos del día de hoy
-        target_date = datetime.strptime(date, "%Y-%m-%d").date()
-        
-        if time.date() == target_date:
-            # Crear un diccionario con la estructura solicitada
-            row = {
-                "date": time.date(),  # Agregar la fecha
-                "time": time.strftime("%H:%M:%S"),  # Agregar el tiempo en formato hh:mm:ss
-                "stock_symbol": coin,  # El nombre de la criptomoneda
-                "open_price": float(price_info[1]),  # Precio de apertura
-                "high_price": float(price_info[2]),  # Precio más alto
-                "low_price": float(price_info[3]),  # Precio más bajo
-                "close_price": float(price_info[4])  # Precio de cierre
-            }
-            rows.append(row)
+    # Decodificar la respuesta completa de una sola vez y filtrar la fecha pedida,
+    # porque la API también devuelve velas del día de hoy
+    prices = parse_ohlc_payload(data, coin, [date])
 
     # Si no se encuentran datos para la fecha, retornar DataFrame vacío
-    if not rows:
+    if prices.empty:
         print(f"No se encontraron datos de {coin} para la fecha {date}.")
+
+    return prices
+
+
+def market_chart_windows(start_date: str, end_date: str, window_days: int = BACKFILL_WINDOW_DAYS) -> List[Tuple[int, int]]:
+    """
+    Divide un rango de fechas en ventanas para /coins/{id}/market_chart/range.
+
+    CoinGecko elige la granularidad según el largo de la ventana: para rangos históricos devuelve
+    precios por hora en ventanas de hasta 90 días y diarios por encima (los precios cada 5 minutos
+    solo existen para el último día), así que con la ventana por defecto un año son ~5 solicitudes.
+
+    Args:
+        start_date (str): Primera fecha del rango en formato 'YYYY-MM-DD'.
+        end_date (str): Última fecha del rango (inclusive) en formato 'YYYY-MM-DD'.
+        window_days (int): Días de cada ventana.
+
+    Returns:
+        List[Tuple[int, int]]: Pares (from, to) en segundos UNIX, de medianoche UTC a medianoche UTC.
+    """
+    window = pd.Timedelta(days=max(window_days, 1))
+    start = pd.Timestamp(start_date, tz="UTC")
+    stop = pd.Timestamp(end_date, tz="UTC") + pd.Timedelta(days=1)
+
+    windows: List[Tuple[int, int]] = []
+    while start < stop:
+        end = min(start + window, stop)
+        windows.append((int(start.timestamp()), int(end.timestamp())))
+        start = end
+    return windows
+
+
+def get_crypto_ohlc_range(
+    coin: str,
+    start_date: str,
+    end_date: str,
+    base_url: str = COINGECKO_API_URL,
+    window_days: int = BACKFILL_WINDOW_DAYS,
+) -> pd.DataFrame:
+    """
+    Obtiene los precios OHLC de una criptomoneda para un rango de fechas históricas.
+
+    El endpoint /ohlc solo cuenta días hacia atrás desde hoy y engrosa las velas a 4 días para
+    rangos largos, así que para un backfill se usa /market_chart/range con ventanas `from`/`to`
+    calculadas desde el rango pedido. Los precios de todas las ventanas se agrupan en velas de
+    `BACKFILL_CANDLE_INTERVAL` (por hora, la granularidad de los precios históricos) y las fechas
+    que quedan sin velas se informan.
+
+    Args:
+        coin (str): El nombre de la criptomoneda (e.g., 'ethereum', 'bitcoin').
+        start_date (str): Primera fecha del rango en formato 'YYYY-MM-DD'.
+        end_date (str): Última fecha del rango (inclusive) en formato 'YYYY-MM-DD'.
+        base_url (str): URL base de la API de CoinGecko.
+        window_days (int): Días de cada solicitud (ver `market_chart_windows`).
+
+    Returns:
+        pd.DataFrame: Las velas de todas las fechas del rango, con las mismas columnas que
+                      `get_crypto_ohlc_data`. Devuelve un DataFrame vacío si no hay datos.
+    """
+    url: str = f"{base_url}/coins/{coin}/market_chart/range"
+    prices: List[Any] = []
+    for start, end in market_chart_windows(start_date, end_date, window_days):
+        params = {"vs_currency": "usd", "from": start, "to": end}
+        try:
+            data = request_json("coingecko", url, params=params)
+        except requests.exceptions.RequestException as e:
+            print(f"Error al realizar la solicitud a la API de CoinGecko: {e}")
+            return pd.DataFrame()
+        prices.extend((data or {}).get("prices") or [])
+
+    dates = pd.date_range(start_date, end_date, freq="D").strftime("%Y-%m-%d")
+    candles = parse_market_chart_payload(prices, coin, dates)
+    if candles.empty:
+        print(f"No se encontraron datos de {coin} entre {start_date} y {end_date}.")
+        return candles
+
+    missing = sorted(set(dates) - set(candles["date"].astype(str)))
+    if missing:
+        print(f"Advertencia: {coin} no tiene velas para {len(missing)} fecha(s) del rango: {', '.join(missing)}")
+    return candles
+
+
+def parse_market_chart_payload(
+    prices: Any,
+    coin: str,
+    dates: Iterable[str],
+    interval: str = BACKFILL_CANDLE_INTERVAL,
+) -> pd.DataFrame:
+    """
+    Agrupa los precios de /market_chart/range en velas OHLC.
+
+    Cada vela cubre `interval` y lleva el timestamp de su cierre, como las velas de /ohlc:
+    la vela de la 01:00 UTC contiene los precios posteriores a las 00:00 y hasta la 01:00.
+    Si los precios vienen más espaciados que `interval`, las velas se arman con ese espaciado
+    en lugar de generar velas de un solo punto.
+
+    Args:
+        prices (Any): Lista `prices` de la respuesta, `[[timestamp_ms, precio], ...]`, posiblemente
+            con puntos repetidos en los bordes de las ventanas.
+        coin (str): El nombre de la criptomoneda (e.g., 'ethereum', 'bitcoin').
+        dates (Iterable[str]): Fechas a conservar en formato 'YYYY-MM-DD'.
+        interval (str): Duración de cada vela (alias de frecuencia de pandas).
+
+    Returns:
+        pd.DataFrame: Las mismas columnas que `parse_ohlc_payload`, o vacío si no hay velas.
+    """
+    if not prices:
         return pd.DataFrame()
 
-    # Crear DataFrame a partir de la lista de diccionarios
-    return pd.DataFrame(rows)
+    points = np.asarray(prices, dtype="float64")
+    if points.ndim != 2 or points.shape[1] < 2:
+        print(f"Respuesta de market_chart inesperada para {coin}.")
+        return pd.DataFrame()
+
+    series = pd.Series(points[:, 1], index=pd.to_datetime(points[:, 0].astype("int64"), unit="ms", utc=True))
+    series = series[~series.index.duplicated()].sort_index()
+
+    # No se arman velas más finas que la separación real de los precios (p. ej. 30 minutos sobre precios por hora)
+    step = pd.Timedelta(interval)
+    if len(series) > 1:
+        spacing = series.index.to_series().diff().median().ceil("min")
+        if spacing > step:
+            print(f"Advertencia: los precios de {coin} vienen cada {spacing}; se arman velas de {spacing} en lugar de {step}.")
+            step = spacing
+    candles = series.resample(step, closed="right", label="right").ohlc().dropna()
+    if candles.empty:
+        return pd.DataFrame()
+
+    payload = np.column_stack([candles.index.as_unit("ms").asi8, candles.to_numpy()])
+    return parse_ohlc_payload(payload, coin, dates)
+
+
+def parse_ohlc_payload(data: Any, coin: str, dates: Iterable[str]) -> pd.DataFrame:
+    """
+    Convierte la respuesta OHLC de CoinGecko en un DataFrame de forma vectorizada.
+
+    El arreglo JSON `[[timestamp_ms, open, high, low, close], ...]` se convierte en un arreglo de
+    NumPy una única vez, los timestamps se pasan a UTC con `pd.to_datetime` y las fechas pedidas
+    se filtran con una máscara booleana, sin recorrer las velas en Python.
+
+    Args:
+        data (Any): Respuesta JSON de /coins/{id}/ohlc (o un arreglo de NumPy con la misma forma).
+        coin (str): El nombre de la criptomoneda (e.g., 'ethereum', 'bitcoin').
+        dates (Iterable[str]): Fechas a conservar en formato 'YYYY-MM-DD'.
+
+    Returns:
+        pd.DataFrame: Un DataFrame con las columnas 'date', 'timestamp', 'stock_symbol', 'open_price',
+                      'high_price', 'low_price' y 'close_price', o vacío si no hay velas para esas fechas.
+    """
+    if data is None or len(data) == 0:
+        return pd.DataFrame()
+
+    candles = np.asarray(data, dtype="float64")
+    if candles.ndim != 2 or candles.shape[1] < 5:
+        print(f"Respuesta OHLC inesperada para {coin}.")
+        return pd.DataFrame()
+
+    timestamps = pd.to_datetime(candles[:, 0].astype("int64"), unit="ms", utc=True)
+    target_dates = pd.to_datetime(list(dates), utc=True)
+    mask = np.asarray(timestamps.normalize().isin(target_dates))
+
+    if not mask.any():
+        return pd.DataFrame()
+
+    selected = timestamps[mask]
+    return pd.DataFrame({
+        "date": selected.date,  # Fecha de la vela
+        "timestamp": selected.as_unit("ms"),  # Instante de la vela en UTC, con precisión de milisegundos
+        "stock_symbol": coin,  # El nombre de la criptomoneda
+        "open_price": candles[mask, 1],  # Precio de apertura
+        "high_price": candles[mask, 2],  # Precio más alto
+        "low_price": candles[mask, 3],  # Precio más bajo
+        "close_price": candles[mask, 4],  # Precio de cierre
+    })
 
 # Traemos los datos descriptivos de cada una de las coins elegidas para analizar
-def create_crypto_table(coin_id: str, api_key: str) -> pd.DataFrame:
-    url: str = f"https://pro-api.coinmarketcap.com/v1/cryptocurrency/info?id={coin_id}"
+def create_crypto_table(coin_id: str, api_key: str, base_url: str = COINMARKETCAP_API_URL) -> pd.DataFrame:
+    url: str = f"{base_url}/v1/cryptocurrency/info?id={coin_id}"
 
     headers = {
         'Accepts': 'application/json',
@@ -85,28 +237,35 @@ def create_crypto_table(coin_id: str, api_key: str) -> pd.DataFrame:
     }
 
     try:
-        response: requests.Response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        data: Dict = response.json()
+        # Los 429 se reintentan dentro de request_json con backoff acotado que respeta Retry-After
+        data: Dict = request_json("coinmarketcap", url, headers=headers)
 
         if 'data' not in data or coin_id not in data['data']:
             print(f"Datos no disponibles para el ID de moneda {coin_id}.")
             return pd.DataFrame()
 
-    except requests.exceptions.HTTPError as e:
-        if response.status_code == 429:  # Too Many Requests
-            print("Demasiadas solicitudes. Esperando antes de reintentar...")
-            time.sleep(60)  # Esperar 1 minuto
-            return create_crypto_table(coin_id, api_key)  # Reintentar la solicitud
-        else:
-            print(f"Error al realizar la solicitud a la API de CoinMarketCap: {e}")
-            return pd.DataFrame()
+    except requests.exceptions.RequestException as e:
+        print(f"Error al realizar la solicitud a la API de CoinMarketCap: {e}")
+        return pd.DataFrame()
     except Exception as e:
         print(f"Error general: {e}")
         return pd.DataFrame()
 
-    coin_info = data['data'][coin_id]
-    result = {
+    return pd.DataFrame([parse_coin_profile(data['data'][coin_id])])
+
+
+def parse_coin_profile(coin_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convierte la información de una moneda devuelta por CoinMarketCap en una fila del perfil.
+
+    Args:
+        coin_info (Dict[str, Any]): Entrada de `data` de la respuesta de /v1/cryptocurrency/info.
+
+    Returns:
+        Dict[str, Any]: Fila con las columnas 'symbol', 'id', 'name', 'category', 'description',
+                        'logo', 'website' y 'reddit'.
+    """
+    return {
         'symbol': coin_info['symbol'],
         'id': coin_info['id'],
         'name': coin_info['name'],
@@ -117,4 +276,67 @@ def create_crypto_table(coin_id: str, api_key: str) -> pd.DataFrame:
         'reddit': coin_info['urls'].get('reddit', ['No disponible'])[0] if coin_info['urls'].get('reddit') else 'No disponible'
     }
 
-    return pd.DataFrame([result])
\ No newline at end of file
+
+def chunk_ids(coin_ids: List[str], chunk_size: int = CMC_PROFILE_BATCH_SIZE) -> List[List[str]]:
+    """
+    Divide la lista de IDs en bloques para las solicitudes multi-id, descartando duplicados.
+
+    Args:
+        coin_ids (List[str]): IDs de CoinMarketCap.
+        chunk_size (int): Cantidad máxima de IDs por solicitud.
+
+    Returns:
+        List[List[str]]: Bloques de IDs en el orden original.
+    """
+    unique_ids = list(dict.fromkeys(coin_ids))
+    size = max(chunk_size, 1)
+    return [unique_ids[i:i + size] for i in range(0, len(unique_ids), size)]
+
+
+def fetch_crypto_profiles(
+    coin_ids: List[str],
+    api_key: str,
+    chunk_size: int = CMC_PROFILE_BATCH_SIZE,
+    base_url: str = COINMARKETCAP_API_URL,
+) -> pd.DataFrame:
+    """
+    Obtiene los perfiles de varias monedas con solicitudes multi-id a CoinMarketCap.
+
+    Cada bloque de `chunk_size` IDs se pide en una única llamada (`id=1,74,1027`) y la respuesta
+    se separa en las mismas filas por moneda que devuelve `create_crypto_table`. Si un bloque falla
+    (por ejemplo, porque CoinMarketCap rechaza la solicitud completa ante un ID inválido), se vuelve
+    a pedir ese bloque moneda por moneda.
+
+    Args:
+        coin_ids (List[str]): IDs de CoinMarketCap.
+        api_key (str): API KEY de CoinMarketCap.
+        chunk_size (int): Cantidad máxima de IDs por solicitud.
+        base_url (str): URL base de la API de CoinMarketCap.
+
+    Returns:
+        pd.DataFrame: Un DataFrame con una fila por moneda encontrada, o vacío si no hay datos.
+    """
+    headers = {
+        'Accepts': 'application/json',
+        'X-CMC_PRO_API_KEY': api_key,
+    }
+    url: str = f"{base_url}/v1/cryptocurrency/info"
+    rows: List[Dict[str, Any]] = []
+
+    for chunk in chunk_ids(coin_ids, chunk_size):
+        try:
+            data: Dict = request_json("coinmarketcap", url, params={"id": ",".join(chunk)}, headers=headers)
+        except requests.exceptions.RequestException as e:
+            print(f"Error en la solicitud multi-id a CoinMarketCap ({e}). Reintentando moneda por moneda...")
+            frames = [create_crypto_table(cid, api_key, base_url) for cid in chunk]
+            rows.extend(row for frame in frames if not frame.empty for row in frame.to_dict("records"))
+            continue
+
+        chunk_data = (data.get('data') or {}) if isinstance(data, dict) else {}
+        for cid in chunk:
+            if cid not in chunk_data:
+                print(f"Datos no disponibles para el ID de moneda {cid}.")
+                continue
+            rows.append(parse_coin_profile(chunk_data[cid]))
+
+    return pd.DataFrame(rows)
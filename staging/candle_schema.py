@@ -0,0 +1,191 @@
+from typing import List, Optional
+import pandas as pd
+import pyarrow as pa
+from staging.partitioned_dataset import DateLike, read_partitions, write_partitions
+from variables.config import CANDLE_PRICE_DTYPE
+
+# Tipos de precio admitidos para las velas: float64 (exacto) o float32 (la mitad de memoria y disco)
+PRICE_TYPES = {"float64": pa.float64(), "float32": pa.float32()}
+
+CANDLE_PRICE_COLUMNS: List[str] = ["open_price", "high_price", "low_price", "close_price"]
+
+
+def _price_type(price_dtype: Optional[str]) -> pa.DataType:
+    price_dtype = price_dtype or CANDLE_PRICE_DTYPE
+    if price_dtype not in PRICE_TYPES:
+        raise ValueError(f"Unknown candle price dtype '{price_dtype}'. Expected one of {list(PRICE_TYPES)}.")
+    return PRICE_TYPES[price_dtype]
+
+
+def candle_schema(symbol_column: str = "symbol", price_dtype: Optional[str] = None) -> pa.Schema:
+    """
+    Build the Arrow schema of candle data.
+
+    A candle is identified by a single UTC timestamp with millisecond precision and a
+    dictionary-encoded symbol; 'date' is the Hive partition key, so inside the Parquet
+    files only the timestamp and the prices are stored.
+
+    Args:
+        symbol_column (str): Name of the symbol column ('stock_symbol' in staging).
+        price_dtype (Optional[str]): 'float64' or 'float32', `CANDLE_PRICE_DTYPE` by default.
+
+    Returns:
+        pa.Schema: Schema with 'date', 'timestamp', the symbol column and the prices.
+
+    Raises:
+        ValueError: If the price dtype is unknown.
+    """
+    price_type = _price_type(price_dtype)
+    return pa.schema(
+        [
+            ("date", pa.date32()),
+            ("timestamp", pa.timestamp("ms", tz="UTC")),
+            (symbol_column, pa.dictionary(pa.int32(), pa.string())),
+        ]
+        + [(column, price_type) for column in CANDLE_PRICE_COLUMNS]
+    )
+
+
+def candle_timestamps(df: pd.DataFrame) -> pd.Series:
+    """
+    Return the timestamps of candles, built from 'date' and the legacy 'time' column where missing.
+
+    Args:
+        df (pd.DataFrame): Candles with 'timestamp', or 'date' and 'time', or both.
+
+    Returns:
+        pd.Series: datetime64[ms, UTC] timestamps.
+    """
+    timestamps = (
+        pd.to_datetime(df["timestamp"], utc=True)
+        if "timestamp" in df.columns
+        else pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns, UTC]")
+    )
+    if "time" in df.columns:
+        missing = timestamps.isna() & df["time"].notna()
+        if missing.any():
+            legacy = df.loc[missing]
+            timestamps.loc[missing] = pd.to_datetime(
+                pd.to_datetime(legacy["date"]).dt.strftime("%Y-%m-%d") + " " + legacy["time"].astype(str),
+                utc=True,
+            )
+    return timestamps.astype("datetime64[ms, UTC]")
+
+
+def candle_frame(df: pd.DataFrame, symbol_column: str = "symbol", price_dtype: Optional[str] = None) -> pd.DataFrame:
+    """
+    Cast candles to the compact in-memory types of `candle_schema`.
+
+    The symbol becomes a categorical, the timestamp a datetime64[ms, UTC] column and the
+    prices the configured float type. Candles written before the schema existed carry
+    a 'HH:MM:SS' 'time' column instead of the timestamp; it is converted and dropped.
+
+    Args:
+        df (pd.DataFrame): Candles with 'date', 'timestamp' (or 'time'), the symbol column
+            and the prices.
+        symbol_column (str): Name of the symbol column.
+        price_dtype (Optional[str]): 'float64' or 'float32', `CANDLE_PRICE_DTYPE` by default.
+
+    Returns:
+        pd.DataFrame: Candles with the columns of `candle_schema`, in its order.
+    """
+    price_type = _price_type(price_dtype).to_pandas_dtype()
+    symbols = df[symbol_column]
+    if not isinstance(symbols.dtype, pd.CategoricalDtype):
+        symbols = symbols.astype(str).astype("category")
+    return pd.DataFrame({
+        "date": pd.to_datetime(df["date"]).dt.date,
+        "timestamp": candle_timestamps(df),
+        symbol_column: symbols,
+        **{column: df[column].astype(price_type) for column in CANDLE_PRICE_COLUMNS},
+    })
+
+
+def fragment_schema(symbol_column: str = "symbol", price_dtype: Optional[str] = None) -> pa.Schema:
+    """
+    Build the schema of the candle Parquet files, `candle_schema` without the partition keys.
+
+    Args:
+        symbol_column (str): Name of the symbol column.
+        price_dtype (Optional[str]): 'float64' or 'float32', `CANDLE_PRICE_DTYPE` by default.
+
+    Returns:
+        pa.Schema: Schema with 'timestamp' and the prices.
+    """
+    schema = candle_schema(symbol_column, price_dtype)
+    return pa.schema([field for field in schema if field.name not in ("date", symbol_column)])
+
+
+def write_candle_partitions(df: pd.DataFrame, base_dir: str, symbol_column: str) -> pd.DataFrame:
+    """
+    Write candles into their date/symbol partitions with the candle schema enforced.
+
+    Args:
+        df (pd.DataFrame): Candles, in any layout accepted by `candle_frame`.
+        base_dir (str): Root directory of the dataset.
+        symbol_column (str): Name of the symbol column used as second partition key.
+
+    Returns:
+        pd.DataFrame: The candles as written, with the types of `candle_frame`.
+    """
+    if df.empty:
+        return df
+    df = candle_frame(df, symbol_column)
+    write_partitions(df, base_dir, symbol_column, schema=candle_schema(symbol_column))
+    return df
+
+
+def read_candle_partitions(
+    base_dir: str,
+    symbol_column: str,
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+    symbols: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Read candles with partition pruning and return them with the candle schema.
+
+    The dataset is opened with an explicit schema that also includes the legacy 'time'
+    column, so partitions written before and after the schema can be read together.
+
+    Args:
+        base_dir (str): Root directory of the dataset.
+        symbol_column (str): Name of the symbol partition key.
+        start_date (Optional[DateLike]): First date to read (inclusive).
+        end_date (Optional[DateLike]): Last date to read (inclusive).
+        symbols (Optional[List[str]]): Symbols to read.
+
+    Returns:
+        pd.DataFrame: Candles with the columns of `candle_schema` (empty if there are none).
+    """
+    schema = candle_schema(symbol_column)
+    dataset_schema = pa.schema(
+        [schema.field("timestamp"), ("time", pa.string())]
+        + [schema.field(column) for column in CANDLE_PRICE_COLUMNS]
+        + [("date", pa.date32()), (symbol_column, pa.string())]
+    )
+    df = read_partitions(base_dir, symbol_column, start_date, end_date, symbols, schema=dataset_schema)
+    if df.empty:
+        return pd.DataFrame(columns=schema.names)
+    return candle_frame(df, symbol_column)
+
+
+def warehouse_candles(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert candles to the column types of the warehouse 'daily_crypto_prices' table.
+
+    Redshift keeps separate DATE and TIME columns, so the 'time' column is derived from
+    the timestamp at this boundary only; frames that already have it are left as is.
+
+    Args:
+        df (pd.DataFrame): Candles with 'date', 'timestamp' or 'time', 'symbol' and the prices.
+
+    Returns:
+        pd.DataFrame: Candles with 'date', 'time' ('HH:MM:SS'), a string 'symbol' and float64 prices.
+    """
+    if "time" not in df.columns:
+        df = df.assign(time=pd.to_datetime(df["timestamp"], utc=True).dt.strftime("%H:%M:%S"))
+    return df.assign(
+        symbol=df["symbol"].astype(str),
+        **{column: df[column].astype("float64") for column in CANDLE_PRICE_COLUMNS},
+    )
@@ -0,0 +1,134 @@
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+from variables.config import DIR_PATH, STAGING_CHECKPOINT_TTL_HOURS
+
+# Un directorio por corrida (rango de fechas) y un archivo JSON por moneda completada
+CHECKPOINT_DIR: str = os.path.join(DIR_PATH, "staging", "data", "checkpoints")
+
+# Registro de una moneda: {"coin", "rows_by_date", "handoff", "completed_at"}
+CoinCheckpoint = Dict[str, Any]
+
+
+class StagingCheckpoint:
+    """
+    Per-coin completion state of a staging run.
+
+    A coin is recorded once its candles are in the staging partitions, together with
+    the rows written per date and its handoff entry. A retried run (in the same task or
+    a new Airflow attempt) skips the recorded coins and only extracts the missing ones.
+    Each coin has its own file, written atomically, so the mapped staging tasks of a
+    run can record their coins at the same time.
+
+    Args:
+        dates (List[str]): Dates covered by the run, in 'YYYY-MM-DD' format.
+        base_dir (str): Root directory of the checkpoints.
+        ttl_hours (float): Hours a record is trusted; older records are extracted again.
+    """
+
+    def __init__(
+        self,
+        dates: List[str],
+        base_dir: str = CHECKPOINT_DIR,
+        ttl_hours: float = STAGING_CHECKPOINT_TTL_HOURS,
+    ) -> None:
+        self.path = os.path.join(base_dir, f"{dates[0]}_{dates[-1]}")
+        self.ttl_hours = ttl_hours
+
+    def _coin_path(self, coin: str) -> str:
+        return os.path.join(self.path, f"{coin}.json")
+
+    def get(self, coin: str) -> Optional[CoinCheckpoint]:
+        """
+        Return the record of a coin, or None if it is missing, unreadable or expired.
+        """
+        path = self._coin_path(coin)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"No se pudo leer el checkpoint de {coin} ({e}); se vuelve a extraer.")
+            return None
+        if time.time() - record["completed_at"] > self.ttl_hours * 3600:
+            return None
+        return record
+
+    def completed(self, coins: List[str]) -> Dict[str, CoinCheckpoint]:
+        """
+        Return the records of the coins already completed in this run.
+
+        Args:
+            coins (List[str]): Coins of the run.
+
+        Returns:
+            Dict[str, CoinCheckpoint]: Records keyed by coin, in the order of `coins`.
+        """
+        records = {coin: self.get(coin) for coin in coins}
+        return {coin: record for coin, record in records.items() if record is not None}
+
+    def mark_done(self, coin: str, rows_by_date: Dict[str, int], handoff: Optional[Dict[str, Any]]) -> CoinCheckpoint:
+        """
+        Record a coin as completed.
+
+        Args:
+            coin (str): CoinGecko slug.
+            rows_by_date (Dict[str, int]): Candles written per date.
+            handoff (Optional[Dict[str, Any]]): Handoff entry of the coin's candles.
+
+        Returns:
+            CoinCheckpoint: The stored record.
+        """
+        record = {"coin": coin, "rows_by_date": rows_by_date, "handoff": handoff, "completed_at": time.time()}
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = f"{self._coin_path(coin)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp_path, self._coin_path(coin))
+        return record
+
+
+def completeness_ratio(completed: int, expected: int) -> float:
+    """
+    Fraction of the expected coins that were staged.
+
+    Args:
+        completed (int): Coins with candles.
+        expected (int): Coins of the run.
+
+    Returns:
+        float: Ratio between 0 and 1 (1 when no coin was expected).
+    """
+    return completed / expected if expected else 1.0
+
+
+def prune_checkpoints(base_dir: str = CHECKPOINT_DIR, ttl_hours: float = STAGING_CHECKPOINT_TTL_HOURS) -> int:
+    """
+    Remove the coin records older than the TTL and the run directories left empty.
+
+    Args:
+        base_dir (str): Root directory of the checkpoints.
+        ttl_hours (float): Hours a record is kept.
+
+    Returns:
+        int: Number of records removed.
+    """
+    if not os.path.isdir(base_dir):
+        return 0
+    cutoff = time.time() - ttl_hours * 3600
+    removed = 0
+    for run in os.listdir(base_dir):
+        run_dir = os.path.join(base_dir, run)
+        if not os.path.isdir(run_dir):
+            continue
+        for name in os.listdir(run_dir):
+            path = os.path.join(run_dir, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        # El directorio también debe ser viejo: uno vacío recién creado pertenece a una corrida en curso
+        if not os.listdir(run_dir) and os.path.getmtime(run_dir) < cutoff:
+            os.rmdir(run_dir)
+    return removed
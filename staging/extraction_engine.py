@@ -0,0 +1,164 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, Optional, Tuple, TypeVar
+from variables.config import (
+    COINGECKO_REQUESTS_PER_MINUTE, COINGECKO_BURST,
+    COINMARKETCAP_REQUESTS_PER_MINUTE, COINMARKETCAP_BURST,
+    EXTRACTION_MAX_WORKERS
+)
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to respect the request quota of an API provider.
+
+    Tokens are refilled continuously at `requests_per_minute / 60` tokens per second,
+    up to `capacity` tokens. Each request consumes one token; when the bucket is empty
+    the caller blocks until a token becomes available.
+
+    Args:
+        requests_per_minute (float): Sustained number of requests allowed per minute.
+        capacity (int): Maximum number of requests that can be issued in a burst.
+    """
+
+    def __init__(self, requests_per_minute: float, capacity: int) -> None:
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be greater than zero.")
+        self.rate: float = requests_per_minute / 60.0
+        self.capacity: float = float(max(capacity, 1))
+        self._tokens: float = self.capacity
+        self._last_refill: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token from the bucket, waiting if necessary.
+
+        Returns:
+            float: The number of seconds the caller waited for the token.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+
+                wait_time = (1 - self._tokens) / self.rate
+
+            # Dormir fuera del lock para que otros hilos puedan consultar el bucket
+            time.sleep(wait_time)
+            waited += wait_time
+
+
+# Cuota de cada proveedor: (solicitudes por minuto, ráfaga)
+PROVIDER_QUOTAS: Dict[str, Tuple[float, int]] = {
+    "coingecko": (COINGECKO_REQUESTS_PER_MINUTE, COINGECKO_BURST),
+    "coinmarketcap": (COINMARKETCAP_REQUESTS_PER_MINUTE, COINMARKETCAP_BURST),
+}
+
+# Un bucket por proveedor, compartido por todos los hilos del proceso
+RATE_LIMITERS: Dict[str, TokenBucket] = {
+    provider: TokenBucket(requests_per_minute, burst)
+    for provider, (requests_per_minute, burst) in PROVIDER_QUOTAS.items()
+}
+
+
+def get_rate_limiter(provider: str) -> TokenBucket:
+    """
+    Return the shared token bucket of an API provider.
+
+    Args:
+        provider (str): Provider name (e.g., 'coingecko', 'coinmarketcap').
+
+    Returns:
+        TokenBucket: The rate limiter associated with the provider.
+
+    Raises:
+        KeyError: If the provider has no rate limiter configured.
+    """
+    return RATE_LIMITERS[provider]
+
+
+def split_rate_limit(provider: str, parts: int) -> TokenBucket:
+    """
+    Give this process 1/parts of the request quota of a provider.
+
+    Each process has its own token bucket, so when `parts` tasks hit the same provider
+    at once (the slots of its Airflow pool) each one must use a share of the quota for
+    the total to stay within it.
+
+    Args:
+        provider (str): Provider name (e.g., 'coingecko', 'coinmarketcap').
+        parts (int): Number of processes sharing the quota.
+
+    Returns:
+        TokenBucket: The new rate limiter of the provider in this process.
+    """
+    parts = max(parts, 1)
+    requests_per_minute, burst = PROVIDER_QUOTAS[provider]
+    RATE_LIMITERS[provider] = TokenBucket(requests_per_minute / parts, max(burst // parts, 1))
+    return RATE_LIMITERS[provider]
+
+
+def run_concurrently(
+    tasks: Dict[str, Callable[[], T]],
+    max_workers: int = EXTRACTION_MAX_WORKERS,
+) -> Iterator[Tuple[str, Optional[T], Optional[Exception]]]:
+    """
+    Run extraction tasks on a bounded thread pool and yield their results as they finish.
+
+    The tasks are expected to call `get_rate_limiter(...).acquire()` before hitting
+    their provider, so the pool size only bounds concurrency while the token buckets
+    bound the request rate of each provider.
+
+    At most `max_workers` tasks are submitted ahead of the consumer and each result is
+    released once it has been yielded, so the results held in memory at any time are
+    those of the running tasks plus the one being consumed, not all of them.
+
+    Args:
+        tasks (Dict[str, Callable[[], T]]): Zero-argument callables keyed by a task label.
+        max_workers (int): Maximum number of threads running at the same time.
+
+    Yields:
+        Tuple[str, Optional[T], Optional[Exception]]: The task label, its result (None if it
+        failed) and the exception raised by the task (None if it succeeded).
+    """
+    if not tasks:
+        return
+
+    workers = max(1, min(max_workers, len(tasks)))
+    queued = iter(tasks.items())
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight: Dict[Future, str] = {}
+
+        def submit_next() -> None:
+            for label, task in queued:
+                in_flight[executor.submit(task)] = label
+                return
+
+        for _ in range(workers):
+            submit_next()
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            while done:
+                future = done.pop()
+                # Sacar el future del diccionario para no retener su resultado hasta el final
+                label = in_flight.pop(future)
+                error = future.exception()
+                result = None if error is not None else future.result()
+                future = None
+                submit_next()
+
+                if error is not None:
+                    print(f"Error en la tarea de extracción '{label}': {error}")
+                yield label, result, error
+                result = None
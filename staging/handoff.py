@@ -0,0 +1,202 @@
+import hashlib
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+import pandas as pd
+import pyarrow as pa
+from variables.config import DIR_PATH, HANDOFF_TTL_HOURS
+
+# Archivos Arrow IPC (Feather v2) que una tarea deja para la siguiente
+HANDOFF_DIR: str = os.path.join(DIR_PATH, "staging", "data", "handoff")
+
+# Entrada de manifest: {"path", "sha256", "bytes", "rows"}; un manifest agrupa entradas por nombre
+HandoffEntry = Dict[str, Any]
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HandoffWriter:
+    """
+    Incremental writer of a handoff file.
+
+    Frames are appended as record batches as they arrive, so memory stays bounded by
+    one frame. The file is uncompressed, which lets readers memory-map it and use the
+    buffers without decoding. On close it is renamed to a content-addressed name, so
+    identical outputs share one file and a manifest entry always points to the exact
+    bytes it was created for.
+    """
+
+    def __init__(self, name: str, base_dir: str = HANDOFF_DIR, schema: Optional[pa.Schema] = None) -> None:
+        self.name = name
+        self.base_dir = base_dir
+        self._tmp_path = os.path.join(base_dir, f".{name}-{uuid.uuid4().hex}.arrow.tmp")
+        self._writer: Optional[pa.ipc.RecordBatchFileWriter] = None
+        self._schema: Optional[pa.Schema] = schema
+        self._categories: Dict[str, List[Any]] = {}
+        self._rows = 0
+
+    def _extend_categories(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Un archivo IPC admite un solo diccionario por columna: las categorías de cada frame se
+        # agregan al final de las ya escritas, así pyarrow emite solo el delta del diccionario
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                seen = self._categories.setdefault(column, [])
+                known = set(seen)
+                seen.extend(value for value in df[column].cat.categories if value not in known)
+                df = df.assign(**{column: df[column].cat.set_categories(seen)})
+        return df
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Append a frame to the handoff file.
+
+        Args:
+            df (pd.DataFrame): Rows to append; unless a schema was given, the first frame fixes it.
+        """
+        if df.empty:
+            return
+        table = pa.Table.from_pandas(self._extend_categories(df), schema=self._schema, preserve_index=False)
+        if self._writer is None:
+            os.makedirs(self.base_dir, exist_ok=True)
+            self._schema = self._schema or table.schema
+            options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self._writer = pa.ipc.new_file(self._tmp_path, self._schema, options=options)
+        self._writer.write_table(table)
+        self._rows += table.num_rows
+
+    def close(self) -> Optional[HandoffEntry]:
+        """
+        Finish the file and commit it under its content-addressed name.
+
+        Returns:
+            Optional[HandoffEntry]: The manifest entry, or None if nothing was written.
+        """
+        if self._writer is None:
+            return None
+        self._writer.close()
+        self._writer = None
+
+        sha256 = _file_sha256(self._tmp_path)
+        path = os.path.join(self.base_dir, f"{self.name}-{sha256[:16]}.arrow")
+        if os.path.exists(path):
+            os.remove(self._tmp_path)
+        else:
+            os.replace(self._tmp_path, path)
+
+        prune_handoffs(self.base_dir)
+        return {"path": path, "sha256": sha256, "bytes": os.path.getsize(path), "rows": self._rows}
+
+
+def write_handoff(df: pd.DataFrame, name: str, base_dir: str = HANDOFF_DIR) -> Optional[HandoffEntry]:
+    """
+    Write a frame as a handoff file.
+
+    Args:
+        df (pd.DataFrame): Data to hand off.
+        name (str): Name of the output (e.g. 'staging_prices').
+        base_dir (str): Directory of the handoff files.
+
+    Returns:
+        Optional[HandoffEntry]: The manifest entry, or None for an empty frame.
+    """
+    writer = HandoffWriter(name, base_dir)
+    writer.write(df)
+    return writer.close()
+
+
+def read_handoff(entry: Optional[HandoffEntry]) -> Optional[pd.DataFrame]:
+    """
+    Memory-map a handoff file and return its data.
+
+    The Arrow buffers are used in place; only the conversion to pandas materializes
+    the columns. A missing or different file (for example, when the downstream task
+    runs on another worker) is not an error: the caller falls back to its regular read.
+
+    Args:
+        entry (Optional[HandoffEntry]): Manifest entry written by the upstream task.
+
+    Returns:
+        Optional[pd.DataFrame]: The handed-off data, or None if it is not available.
+    """
+    if not entry:
+        return None
+    path = entry["path"]
+    if not os.path.exists(path) or os.path.getsize(path) != entry["bytes"]:
+        print(f"Handoff file '{path}' is not available; falling back to the regular read.")
+        return None
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def read_handoffs(entries: Optional[List[HandoffEntry]]) -> Optional[pd.DataFrame]:
+    """
+    Memory-map several handoff files of the same output and return their data as one frame.
+
+    Args:
+        entries (Optional[List[HandoffEntry]]): Manifest entries, e.g. one per staging shard.
+
+    Returns:
+        Optional[pd.DataFrame]: The concatenated data, or None if there are no entries or
+        any of them is not available (the caller then reads everything the regular way).
+    """
+    frames: List[pd.DataFrame] = []
+    for entry in entries or []:
+        df = read_handoff(entry)
+        if df is None:
+            return None
+        frames.append(df)
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+
+def pull_manifest(context: Dict[str, Any], task_id: str) -> Dict[str, Any]:
+    """
+    Get the handoff manifest returned by an upstream task.
+
+    Inside Airflow the manifest is the XCom return value of the task; outside of it
+    (e.g. a local backfill) it is looked up in `context['manifests']`.
+
+    Args:
+        context (Dict[str, Any]): Task context.
+        task_id (str): Id of the upstream task.
+
+    Returns:
+        Dict[str, Any]: The manifest, or an empty dict if there is none.
+    """
+    ti = context.get("ti")
+    if ti is not None:
+        manifest = ti.xcom_pull(task_ids=task_id)
+    else:
+        manifest = (context.get("manifests") or {}).get(task_id)
+    return manifest or {}
+
+
+def prune_handoffs(base_dir: str = HANDOFF_DIR, ttl_hours: float = HANDOFF_TTL_HOURS) -> int:
+    """
+    Remove handoff files older than the TTL.
+
+    Args:
+        base_dir (str): Directory of the handoff files.
+        ttl_hours (float): Hours a handoff file is kept.
+
+    Returns:
+        int: Number of files removed.
+    """
+    if not os.path.isdir(base_dir):
+        return 0
+    cutoff = time.time() - ttl_hours * 3600
+    removed = 0
+    for name in os.listdir(base_dir):
+        path = os.path.join(base_dir, name)
+        if name.endswith((".arrow", ".arrow.tmp")) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            removed += 1
+    return removed
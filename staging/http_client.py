@@ -0,0 +1,208 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from staging.extraction_engine import get_rate_limiter
+from variables.config import (
+    EXTRACTION_MAX_WORKERS, HTTP_TIMEOUT_SECONDS, HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE_SECONDS, HTTP_BACKOFF_MAX_SECONDS
+)
+
+# Códigos de estado que justifican reintentar la solicitud
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RequestMetrics:
+    """
+    Thread-safe collector of per-request latency metrics, grouped by provider.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, List[float]] = {}
+        self._errors: Dict[str, int] = {}
+        self._retries: Dict[str, int] = {}
+
+    def record(self, provider: str, latency: float, failed: bool = False, retried: bool = False) -> None:
+        """
+        Record the outcome of a single HTTP attempt.
+
+        Args:
+            provider (str): Provider the request was sent to.
+            latency (float): Time in seconds the attempt took.
+            failed (bool): Whether the attempt ended in an error.
+            retried (bool): Whether the attempt is going to be retried.
+        """
+        with self._lock:
+            self._latencies.setdefault(provider, []).append(latency)
+            if failed:
+                self._errors[provider] = self._errors.get(provider, 0) + 1
+            if retried:
+                self._retries[provider] = self._retries.get(provider, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize the recorded metrics.
+
+        Returns:
+            Dict[str, Dict[str, float]]: For each provider, the number of requests, errors
+            and retries, and the mean, p50, p95 and max latency in seconds.
+        """
+        with self._lock:
+            result = {}
+            for provider, latencies in self._latencies.items():
+                ordered = sorted(latencies)
+                result[provider] = {
+                    "requests": len(ordered),
+                    "errors": self._errors.get(provider, 0),
+                    "retries": self._retries.get(provider, 0),
+                    "mean_s": sum(ordered) / len(ordered),
+                    "p50_s": ordered[int(0.50 * (len(ordered) - 1))],
+                    "p95_s": ordered[int(0.95 * (len(ordered) - 1))],
+                    "max_s": ordered[-1],
+                }
+            return result
+
+    def reset(self) -> None:
+        """Discard every recorded metric."""
+        with self._lock:
+            self._latencies.clear()
+            self._errors.clear()
+            self._retries.clear()
+
+
+REQUEST_METRICS = RequestMetrics()
+
+
+@lru_cache(maxsize=1)
+def get_session() -> requests.Session:
+    """
+    Return the process-wide pooled HTTP session.
+
+    The session keeps connections alive between requests, so consecutive calls to the
+    same provider reuse the TCP+TLS connection instead of handshaking each time. The
+    pool is sized to the number of extraction workers.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    session = requests.Session()
+    # Los reintentos los maneja request_json para poder respetar Retry-After y el rate limiter
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(EXTRACTION_MAX_WORKERS, 1), max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept": "application/json"})
+    return session
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """
+    Parse the Retry-After header of a response, either in seconds or as an HTTP date.
+
+    Args:
+        response (requests.Response): The throttled response.
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the header is missing or invalid.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _backoff_seconds(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """
+    Compute the wait before the next attempt using exponential backoff with full jitter.
+
+    Args:
+        attempt (int): Zero-based number of the attempt that just failed.
+        base (float): Base delay in seconds.
+        cap (float): Maximum delay in seconds.
+        retry_after (Optional[float]): Delay requested by the server, if any.
+
+    Returns:
+        float: Seconds to wait, never more than `cap`.
+    """
+    if retry_after is not None:
+        return min(retry_after, cap)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def request_json(
+    provider: str,
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    max_retries: int = HTTP_MAX_RETRIES,
+    backoff_base: float = HTTP_BACKOFF_BASE_SECONDS,
+    backoff_max: float = HTTP_BACKOFF_MAX_SECONDS,
+    timeout: float = HTTP_TIMEOUT_SECONDS,
+) -> Any:
+    """
+    Send a GET request through the pooled session and return the decoded JSON body.
+
+    Every attempt takes a token from the provider's rate limiter. Throttling (429),
+    server errors and connection failures are retried a bounded number of times with
+    exponential backoff and jitter, honoring the Retry-After header when present.
+
+    Args:
+        provider (str): Provider name, used for rate limiting and metrics.
+        url (str): Full URL of the endpoint.
+        params (Optional[Dict[str, Any]]): Query string parameters.
+        headers (Optional[Dict[str, str]]): Extra request headers.
+        max_retries (int): Maximum number of retries after the first attempt.
+        backoff_base (float): Base delay in seconds of the exponential backoff.
+        backoff_max (float): Maximum delay in seconds between attempts.
+        timeout (float): Timeout in seconds of each attempt.
+
+    Returns:
+        Any: The decoded JSON response.
+
+    Raises:
+        requests.exceptions.RequestException: If the request still fails after all retries.
+    """
+    limiter = get_rate_limiter(provider)
+
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        start = time.perf_counter()
+        is_last_attempt = attempt == max_retries
+
+        try:
+            response = get_session().get(url, params=params, headers=headers, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            REQUEST_METRICS.record(provider, time.perf_counter() - start, failed=True, retried=not is_last_attempt)
+            if is_last_attempt:
+                raise
+            delay = _backoff_seconds(attempt, backoff_base, backoff_max)
+            print(f"Error de conexión con {provider} ({e}). Reintentando en {delay:.1f} segundos...")
+            time.sleep(delay)
+            continue
+
+        latency = time.perf_counter() - start
+        if response.status_code in RETRYABLE_STATUS_CODES and not is_last_attempt:
+            REQUEST_METRICS.record(provider, latency, failed=True, retried=True)
+            delay = _backoff_seconds(attempt, backoff_base, backoff_max, _retry_after_seconds(response))
+            print(f"{provider} respondió {response.status_code}. Reintentando en {delay:.1f} segundos...")
+            time.sleep(delay)
+            continue
+
+        REQUEST_METRICS.record(provider, latency, failed=response.status_code >= 400)
+        response.raise_for_status()
+        return response.json()
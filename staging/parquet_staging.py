@@ -1,58 +1,285 @@
 import os
-import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import pandas as pd
 from airflow.exceptions import AirflowException
 from dotenv import load_dotenv
 from staging.api_extract_data import (
     get_crypto_ohlc_data,
-    create_crypto_table,
+    get_crypto_ohlc_range,
+    fetch_crypto_profiles,
+    chunk_ids,
 )
-from variables.config import DIR_PATH, COINS_LIST, coin_id, API_KEY_COINMARKETCAP
+from staging.checkpoint import CoinCheckpoint, prune_checkpoints
+from staging.extraction_engine import run_concurrently
+from staging.handoff import write_handoff
+from staging.http_client import REQUEST_METRICS
+from staging.partitioned_dataset import STAGING_PRICES_DIR
+from staging.price_staging import (
+    StagingIncompleteError,
+    check_completeness,
+    finalize_shards,
+    merge_records,
+    stage_prices,
+)
+from staging.profile_cache import (
+    load_profile_cache,
+    save_profile_cache,
+    stale_profile_ids,
+    update_profile_cache,
+    cached_profiles_frame,
+)
+from variables.coin_registry import get_coin_registry
+from variables.config import DIR_PATH, API_KEY_COINMARKETCAP
 
 
-def parquet_create_staging(date: str) -> None:
+def parquet_create_staging(date: str) -> Dict[str, Any]:
     """
     Creates Parquet files for daily cryptocurrency prices and cryptocurrency profiles.
 
     Args:
         date (str): The date for which the data is retrieved, in 'YYYY-MM-DD' format.
-    
+
+    Returns:
+        Dict[str, Any]: Handoff manifest of the run (see `_create_staging_files`).
+
+    Raises:
+        AirflowException: If the share of coins with prices is below `STAGING_MIN_COMPLETENESS`.
+    """
+    return _create_staging_files(*_prices_fetcher(date))
+
+
+def parquet_create_staging_range(start_date: str, end_date: str) -> Dict[str, Any]:
+    """
+    Creates the staging Parquet files of every date in a range, for historical backfills.
+
+    Each coin is requested in windows of `BACKFILL_WINDOW_DAYS` days (see
+    `get_crypto_ohlc_range`) and the candles are split into the same per-date
+    partitions that the daily run produces.
+
+    Args:
+        start_date (str): First date of the range, in 'YYYY-MM-DD' format.
+        end_date (str): Last date of the range (inclusive), in 'YYYY-MM-DD' format.
+
+    Returns:
+        Dict[str, Any]: Handoff manifest of the run (see `_create_staging_files`).
+
+    Raises:
+        AirflowException: If the share of coins with prices is below `STAGING_MIN_COMPLETENESS`.
+    """
+    return _create_staging_files(*_prices_fetcher(start_date, end_date))
+
+
+def parquet_stage_prices(coins: List[str], start_date: str, end_date: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract the prices of a shard of coins and write their staging partitions.
+
+    Used by the mapped per-shard tasks of the DAG: every shard runs, and is retried,
+    on its own, and `parquet_finalize_staging` combines the results. Coins completed by
+    a previous attempt are taken from the run checkpoint instead of being extracted again.
+
+    Args:
+        coins (List[str]): CoinGecko slugs of the shard.
+        start_date (str): Date to extract, or first date of a backfill range, in 'YYYY-MM-DD' format.
+        end_date (Optional[str]): Last date of a backfill range (inclusive).
+
+    Returns:
+        Dict[str, Any]: Shard manifest with the 'coins', the 'rows_by_date' written and the
+        'prices' handoff entries.
+
     Raises:
-        AirflowException: If no valid data is retrieved for any cryptocurrency prices.
-    """
-    daily_crypto_prices_table = pd.DataFrame()
-    crypto_table = pd.DataFrame()
-
-    # Obtener precios diarios de criptomonedas y perfiles
-    for coin in COINS_LIST:
-        # Obtener precios diarios
-        price_data = get_crypto_ohlc_data(coin, date)
-        if not price_data.empty:
-            daily_crypto_prices_table = pd.concat([daily_crypto_prices_table, price_data], ignore_index=True)
-        else:
-            print(f"No se encontraron datos de precios para la moneda: {coin}")
-        time.sleep(15)  # Espera 15 segundos entre solicitudes
-
-    for cid in coin_id:
-        # Crear tabla de perfiles de criptomonedas
-        profile_data = create_crypto_table(cid, API_KEY_COINMARKETCAP)
-        if not profile_data.empty:
-            crypto_table = pd.concat([crypto_table, profile_data], ignore_index=True)
-        else:
-            print(f"No se encontraron datos de perfil para el ID de moneda: {cid}")
+        AirflowException: If a coin of the shard still has no prices after `STAGING_COIN_RETRIES` rounds.
+    """
+    dates, fetch_prices = _prices_fetcher(start_date, end_date)
+    records = stage_prices(coins, dates, fetch_prices)
+    _print_request_metrics()
+
+    # Fallar la tarea del shard para que Airflow reintente solo estas monedas
+    missing = [coin for coin in coins if coin not in records]
+    if missing:
+        raise AirflowException(f"No se pudieron recuperar precios de las monedas: {', '.join(missing)}.")
+    rows_by_date, price_entries = merge_records(dates, records.values())
+    return {"coins": list(coins), "rows_by_date": rows_by_date, "prices": price_entries}
+
+
+def parquet_stage_profiles() -> Dict[str, Any]:
+    """
+    Refresh the stale CoinMarketCap profiles of the registry in the profile cache.
+
+    Returns:
+        Dict[str, Any]: Number of profile rows 'refreshed'.
+    """
+    profile_cache = load_profile_cache()
+    profile_frames: List[pd.DataFrame] = []
+    for label, data, _ in run_concurrently(_profile_tasks(profile_cache)):
+        _add_profiles(profile_frames, label.split(":", 1)[1], data)
+    _print_request_metrics()
+    _save_profiles(profile_cache, profile_frames)
+    return {"refreshed": int(sum(len(frame) for frame in profile_frames))}
+
+
+def parquet_finalize_staging(dates: List[str]) -> Dict[str, Any]:
+    """
+    Combine the coins staged by the per-shard price tasks into the manifest of the run.
+
+    The coins are taken from the run checkpoint, so those completed by a shard that
+    failed on another coin are included too. The crypto tables of every date with
+    prices are written from the profile cache (refreshed by `parquet_stage_profiles`).
+
+    Args:
+        dates (List[str]): Dates covered by the run, in 'YYYY-MM-DD' format.
+
+    Returns:
+        Dict[str, Any]: Handoff manifest of the run (see `_create_staging_files`).
+
+    Raises:
+        AirflowException: If the share of coins with prices is below `STAGING_MIN_COMPLETENESS`
+            or there are no profiles.
+    """
+    try:
+        rows_by_date, price_entries = finalize_shards(get_coin_registry().slugs, dates)
+    except StagingIncompleteError as e:
+        raise AirflowException(str(e)) from e
+    prune_checkpoints()
+    return _write_crypto_tables(rows_by_date, price_entries, load_profile_cache())
+
+
+def _prices_fetcher(start_date: str, end_date: Optional[str] = None) -> Tuple[List[str], Callable[[str], pd.DataFrame]]:
+    """Return the dates of a run and the function that extracts the candles of a coin for them."""
+    if end_date is None:
+        return [start_date], partial(get_crypto_ohlc_data, date=start_date)
+    dates = pd.date_range(start_date, end_date, freq="D").strftime("%Y-%m-%d").tolist()
+    return dates, partial(get_crypto_ohlc_range, start_date=start_date, end_date=end_date)
+
+
+def _profile_tasks(profile_cache: Dict[str, Dict[str, Any]]) -> Dict[str, Callable[[], pd.DataFrame]]:
+    # Los perfiles casi no cambian: solo se piden los que faltan en el cache o superaron el TTL,
+    # en bloques multi-id (una solicitud por bloque en lugar de una por moneda)
+    cmc_ids = get_coin_registry().cmc_ids
+    stale_ids = stale_profile_ids(profile_cache, cmc_ids)
+    print(f"Perfiles a actualizar desde CoinMarketCap: {len(stale_ids)} de {len(cmc_ids)}.")
+    return {
+        f"profile:{','.join(chunk)}": partial(fetch_crypto_profiles, chunk, API_KEY_COINMARKETCAP)
+        for chunk in chunk_ids(stale_ids)
+    }
+
+
+def _check_completeness(coins: List[str], records: Dict[str, CoinCheckpoint]) -> float:
+    """
+    Gate the run on the share of coins with prices (see `check_completeness`).
+
+    Raises:
+        AirflowException: If no coin has prices or the share is below `STAGING_MIN_COMPLETENESS`.
+    """
+    try:
+        return check_completeness(coins, records)
+    except StagingIncompleteError as e:
+        raise AirflowException(str(e)) from e
+
+
+def _add_profiles(profile_frames: List[pd.DataFrame], ids: str, data: Optional[pd.DataFrame]) -> None:
+    if data is not None and not data.empty:
+        profile_frames.append(data)
+    else:
+        print(f"No se encontraron datos de perfil para los IDs de moneda: {ids}")
+
+
+def _save_profiles(profile_cache: Dict[str, Dict[str, Any]], profile_frames: List[pd.DataFrame]) -> Dict[str, Dict[str, Any]]:
+    if profile_frames:
+        profile_cache = update_profile_cache(profile_cache, pd.concat(profile_frames, ignore_index=True))
+        save_profile_cache(profile_cache)
+    return profile_cache
+
+
+def _print_request_metrics() -> None:
+    # Métricas de latencia por proveedor de esta corrida
+    for provider, metrics in REQUEST_METRICS.summary().items():
+        print(f"Métricas HTTP de {provider}: {metrics}")
+
+
+def _create_staging_files(dates: List[str], fetch_prices: Callable[[str], pd.DataFrame]) -> Dict[str, Any]:
+    """
+    Extract prices and profiles concurrently and write the staging data of each date.
+
+    Besides the staging Parquet files, the prices and profiles are written once as
+    Arrow IPC handoff files, so silver can memory-map them instead of decoding the
+    Parquet files again. Each coin is recorded in the run checkpoint once staged, so a
+    retry of the task only extracts the coins that are still missing.
+
+    Args:
+        dates (List[str]): Dates covered by the run, in 'YYYY-MM-DD' format.
+        fetch_prices (Callable[[str], pd.DataFrame]): Function that returns the candles of a coin.
+
+    Returns:
+        Dict[str, Any]: Handoff manifest with the 'dates' for which staging files were
+        created, the list of 'prices' handoff entries and the 'profiles' handoff entry.
+
+    Raises:
+        AirflowException: If too few coins have prices or no profiles could be retrieved.
+    """
+    # Las solicitudes a CoinGecko y CoinMarketCap corren en paralelo; cada proveedor
+    # respeta su propia cuota mediante su token bucket
+    profile_cache = load_profile_cache()
+    profile_frames: List[pd.DataFrame] = []
+    coins = get_coin_registry().slugs
+    records = stage_prices(
+        coins,
+        dates,
+        fetch_prices,
+        extra_tasks=_profile_tasks(profile_cache),
+        on_extra=lambda _, ids, data: _add_profiles(profile_frames, ids, data),
+    )
+    _print_request_metrics()
+    profile_cache = _save_profiles(profile_cache, profile_frames)
+
+    _check_completeness(coins, records)
+    rows_by_date, price_entries = merge_records(dates, records.values())
+    prune_checkpoints()
+    return _write_crypto_tables(rows_by_date, price_entries, profile_cache)
+
+
+def _write_crypto_tables(
+    rows_by_date: Dict[str, int],
+    price_entries: List[Dict[str, Any]],
+    profile_cache: Dict[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Write the crypto table of every date with prices and build the manifest of the run.
+
+    Raises:
+        AirflowException: If no prices or no profiles are available.
+    """
+    registry = get_coin_registry()
+    # Si un perfil vencido no se pudo refrescar se usa la última versión en cache
+    crypto_table = cached_profiles_frame(profile_cache, registry.cmc_ids)
 
     # Verificar si las tablas están vacías
-    if daily_crypto_prices_table.empty:
-        raise AirflowException("No se pudieron recuperar datos de precios diarios para ninguna moneda.")
     if crypto_table.empty:
         raise AirflowException("No se pudieron recuperar datos de perfil para ninguna moneda.")
 
-    # Guardar precios diarios en un archivo Parquet
-    daily_crypto_prices_file = os.path.join(DIR_PATH, "staging", "data", f"daily_crypto_prices_table_{date}_staging.parquet")
-    daily_crypto_prices_table.to_parquet(daily_crypto_prices_file, index=False)
-    print(f"Archivo '{daily_crypto_prices_file}' creado exitosamente.")
+    # Un símbolo de CoinMarketCap distinto al del registro dejaría los precios sin perfil en gold
+    mismatches = registry.profile_mismatches(crypto_table)
+    if mismatches:
+        raise AirflowException("Los perfiles no coinciden con el registro de monedas: " + " ".join(mismatches))
+
+    written_dates: List[str] = []
+    for day, rows in rows_by_date.items():
+        if rows == 0:
+            print(f"No se encontraron datos de precios para la fecha {day}.")
+            continue
+        print(f"Partición '{STAGING_PRICES_DIR}/date={day}' creada exitosamente con {rows} filas.")
+
+        # Guardar perfiles de criptomonedas en un archivo Parquet
+        crypto_table_file = os.path.join(DIR_PATH, "staging", "data", f"crypto_table_{day}_staging.parquet")
+        crypto_table.to_parquet(crypto_table_file, index=False)
+        print(f"Archivo '{crypto_table_file}' creado exitosamente.")
+        written_dates.append(day)
+
+    if not written_dates:
+        raise AirflowException("No se pudieron recuperar datos de precios diarios para ninguna moneda.")
 
-    # Guardar perfiles de criptomonedas en un archivo Parquet
-    crypto_table_file = os.path.join(DIR_PATH, "staging", "data", f"crypto_table_{date}_staging.parquet")
-    crypto_table.to_parquet(crypto_table_file, index=False)
-    print(f"Archivo '{crypto_table_file}' creado exitosamente.")
+    return {
+        "dates": written_dates,
+        "prices": price_entries,
+        "profiles": write_handoff(crypto_table, "staging_profiles"),
+    }
@@ -0,0 +1,167 @@
+import os
+from datetime import date as date_type, datetime
+from typing import List, Optional, Union
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from variables.config import DIR_PATH
+
+# Datasets particionados al estilo Hive por fecha y una segunda clave: <base>/date=YYYY-MM-DD/<key>=XXX/part-*.parquet.
+# Los precios de staging y silver usan la moneda como segunda clave
+STAGING_PRICES_DIR: str = os.path.join(DIR_PATH, "staging", "data", "daily_crypto_prices")
+SILVER_PRICES_DIR: str = os.path.join(DIR_PATH, "Silver", "data", "daily_crypto_prices")
+
+DateLike = Union[str, date_type]
+
+
+def date_key_partitioning(key_column: str) -> ds.Partitioning:
+    """
+    Build the Hive partitioning of a dataset partitioned by date and then by a second key.
+
+    Args:
+        key_column (str): Name of the second key (the symbol column for prices: 'stock_symbol'
+            in staging, 'symbol' in silver).
+
+    Returns:
+        ds.Partitioning: Hive partitioning with a date32 'date' key and a string second key.
+    """
+    return ds.partitioning(pa.schema([("date", pa.date32()), (key_column, pa.string())]), flavor="hive")
+
+
+def to_date(value: DateLike) -> date_type:
+    """
+    Convert a 'YYYY-MM-DD' string (or a date, returned as is) to a date.
+
+    Args:
+        value (DateLike): Date or 'YYYY-MM-DD' string.
+
+    Returns:
+        date_type: The date.
+    """
+    return value if isinstance(value, date_type) else datetime.strptime(str(value), "%Y-%m-%d").date()
+
+
+def partition_filter(
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+    keys: Optional[List[str]] = None,
+    key_column: str = "symbol",
+) -> Optional[ds.Expression]:
+    """
+    Build a dataset filter on the partition keys, so only matching partitions are read.
+
+    Args:
+        start_date (Optional[DateLike]): First date to read (inclusive).
+        end_date (Optional[DateLike]): Last date to read (inclusive).
+        keys (Optional[List[str]]): Values of the second key to read.
+        key_column (str): Name of the second partition key.
+
+    Returns:
+        Optional[ds.Expression]: The filter expression, or None to read everything.
+    """
+    expression: Optional[ds.Expression] = None
+
+    def combine(condition: ds.Expression) -> None:
+        nonlocal expression
+        expression = condition if expression is None else expression & condition
+
+    if start_date is not None:
+        combine(ds.field("date") >= pa.scalar(to_date(start_date), type=pa.date32()))
+    if end_date is not None:
+        combine(ds.field("date") <= pa.scalar(to_date(end_date), type=pa.date32()))
+    if keys:
+        combine(ds.field(key_column).isin(list(keys)))
+
+    return expression
+
+
+def write_partitions(
+    df: pd.DataFrame,
+    base_dir: str,
+    key_column: str,
+    basename_template: str = "part-{i}.parquet",
+    schema: Optional[pa.Schema] = None,
+) -> None:
+    """
+    Write a frame into its date/key partitions.
+
+    Partitions touched by the frame are replaced, so re-running a date is idempotent;
+    every other partition is left untouched.
+
+    Args:
+        df (pd.DataFrame): Rows with a 'date' column and the key column.
+        base_dir (str): Root directory of the dataset.
+        key_column (str): Name of the column used as second partition key.
+        basename_template (str): Name template of the files written in each partition.
+        schema (Optional[pa.Schema]): Schema the frame is converted to, inferred by default.
+    """
+    if df.empty:
+        return
+
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    table = table.set_column(
+        table.schema.get_field_index("date"), "date", pc.cast(table.column("date"), pa.date32())
+    )
+    ds.write_dataset(
+        table,
+        base_dir,
+        format="parquet",
+        partitioning=date_key_partitioning(key_column),
+        basename_template=basename_template,
+        existing_data_behavior="delete_matching",
+    )
+
+
+def read_partitions(
+    base_dir: str,
+    key_column: str,
+    start_date: Optional[DateLike] = None,
+    end_date: Optional[DateLike] = None,
+    keys: Optional[List[str]] = None,
+    columns: Optional[List[str]] = None,
+    schema: Optional[pa.Schema] = None,
+) -> pd.DataFrame:
+    """
+    Read a date/key partitioned dataset using partition pruning and predicate pushdown.
+
+    Only the partitions matching the date range and keys are opened, and only the
+    requested columns are decoded.
+
+    Args:
+        base_dir (str): Root directory of the dataset.
+        key_column (str): Name of the second partition key.
+        start_date (Optional[DateLike]): First date to read (inclusive).
+        end_date (Optional[DateLike]): Last date to read (inclusive).
+        keys (Optional[List[str]]): Values of the second key to read.
+        columns (Optional[List[str]]): Columns to read, all of them by default.
+        schema (Optional[pa.Schema]): Dataset schema including the partition keys; files
+            missing one of its columns read it as nulls. Inferred from a file by default.
+
+    Returns:
+        pd.DataFrame: Matching rows (partition keys come last), or an empty DataFrame
+        if the dataset does not exist yet.
+    """
+    if not os.path.isdir(base_dir):
+        return pd.DataFrame()
+
+    dataset = ds.dataset(base_dir, format="parquet", partitioning=date_key_partitioning(key_column), schema=schema)
+    table = dataset.to_table(
+        columns=columns,
+        filter=partition_filter(start_date, end_date, keys, key_column),
+    )
+    return table.to_pandas()
+
+
+def has_prices_partition(base_dir: str, date: DateLike) -> bool:
+    """
+    Check whether a date partition already exists in a prices dataset.
+
+    Args:
+        base_dir (str): Root directory of the dataset.
+        date (DateLike): Date of the partition.
+
+    Returns:
+        bool: True if the 'date=YYYY-MM-DD' directory exists.
+    """
+    return os.path.isdir(os.path.join(base_dir, f"date={to_date(date).isoformat()}"))
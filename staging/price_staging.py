@@ -0,0 +1,239 @@
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+from staging.api_extract_data import chunk_ids
+from staging.candle_schema import candle_schema, write_candle_partitions
+from staging.checkpoint import CHECKPOINT_DIR, CoinCheckpoint, StagingCheckpoint, completeness_ratio
+from staging.extraction_engine import run_concurrently
+from staging.handoff import HandoffWriter
+from staging.partitioned_dataset import STAGING_PRICES_DIR
+from variables.coin_registry import get_coin_registry
+from variables.config import (
+    STAGING_COIN_RETRIES,
+    STAGING_COIN_SHARD_SIZE,
+    STAGING_MIN_COMPLETENESS,
+    STAGING_RETRY_BACKOFF_MAX_SECONDS,
+    STAGING_RETRY_BACKOFF_SECONDS,
+)
+
+
+class StagingIncompleteError(RuntimeError):
+    """Raised when too few coins of a staging run have prices."""
+
+
+def retry_delay(
+    attempt: int,
+    base_seconds: float = STAGING_RETRY_BACKOFF_SECONDS,
+    max_seconds: float = STAGING_RETRY_BACKOFF_MAX_SECONDS,
+) -> float:
+    """
+    Seconds to wait before a retry round: exponential backoff capped at `max_seconds`.
+
+    Args:
+        attempt (int): Retry round, starting at 1.
+        base_seconds (float): Wait before the first retry round.
+        max_seconds (float): Maximum wait.
+
+    Returns:
+        float: Seconds to wait.
+    """
+    return min(base_seconds * 2 ** (attempt - 1), max_seconds)
+
+
+def staging_shards(shard_size: int = STAGING_COIN_SHARD_SIZE, coins: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Split the coins into the shards of the mapped staging task.
+
+    Args:
+        shard_size (int): Coins per shard.
+        coins (Optional[List[str]]): CoinGecko slugs (the coins of the registry by default).
+
+    Returns:
+        List[Dict[str, Any]]: The `op_kwargs` of each mapped task instance.
+    """
+    coins = get_coin_registry().slugs if coins is None else coins
+    return [{"coins": shard} for shard in chunk_ids(coins, shard_size)]
+
+
+def stage_prices(
+    coins: List[str],
+    dates: List[str],
+    fetch_prices: Callable[[str], pd.DataFrame],
+    extra_tasks: Optional[Dict[str, Callable[[], Any]]] = None,
+    on_extra: Optional[Callable[[str, str, Any], None]] = None,
+    retries: int = STAGING_COIN_RETRIES,
+    checkpoint_dir: str = CHECKPOINT_DIR,
+) -> Dict[str, CoinCheckpoint]:
+    """
+    Extract the candles of the coins that the run checkpoint does not have yet.
+
+    Coins without candles are requested again, alone, in up to `retries` rounds with
+    exponential backoff between them (see `retry_delay`), so a transient error costs a
+    few seconds and one request instead of a new attempt of the whole task.
+
+    Args:
+        coins (List[str]): CoinGecko slugs.
+        dates (List[str]): Dates covered by the run.
+        fetch_prices (Callable[[str], pd.DataFrame]): Function that returns the candles of a coin.
+        extra_tasks (Optional[Dict[str, Callable[[], Any]]]): Other extraction tasks (e.g. the
+            profiles) to run concurrently with the first round.
+        on_extra (Optional[Callable[[str, str, Any], None]]): Receives the kind, key and result
+            of each extra task.
+        retries (int): Retry rounds for the coins still without candles.
+        checkpoint_dir (str): Root directory of the run checkpoints.
+
+    Returns:
+        Dict[str, CoinCheckpoint]: Records of the coins with candles, keyed by coin.
+    """
+    checkpoint = StagingCheckpoint(dates, checkpoint_dir)
+    records = checkpoint.completed(coins)
+    if records:
+        print(f"Monedas ya completadas en un intento anterior: {', '.join(records)}")
+
+    tasks: Dict[str, Callable[[], Any]] = dict(extra_tasks or {})
+    pending = [coin for coin in coins if coin not in records]
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            delay = retry_delay(attempt)
+            print(f"Reintento {attempt}/{retries} de {', '.join(pending)} en {delay:.1f} s.")
+            time.sleep(delay)
+
+        tasks.update({f"prices:{coin}": partial(fetch_prices, coin) for coin in pending})
+        for label, data, _ in run_concurrently(tasks):
+            kind, key = label.split(":", 1)
+            if kind != "prices":
+                if on_extra is not None:
+                    on_extra(kind, key, data)
+                continue
+            record = stage_coin(key, data, dates, checkpoint)
+            if record is not None:
+                records[key] = record
+
+        tasks = {}
+        pending = [coin for coin in pending if coin not in records]
+        if not pending:
+            break
+    return records
+
+
+def stage_coin(
+    coin: str,
+    data: Optional[pd.DataFrame],
+    dates: List[str],
+    checkpoint: StagingCheckpoint,
+) -> Optional[CoinCheckpoint]:
+    """
+    Write the candles of a coin to staging and record it in the checkpoint.
+
+    Args:
+        coin (str): CoinGecko slug.
+        data (Optional[pd.DataFrame]): Candles of the coin (None or empty if the extraction failed).
+        dates (List[str]): Dates covered by the run.
+        checkpoint (StagingCheckpoint): Checkpoint of the run.
+
+    Returns:
+        Optional[CoinCheckpoint]: The record of the coin, or None if it has no candles.
+    """
+    if data is None or data.empty:
+        print(f"No se encontraron datos de precios para la moneda: {coin}")
+        return None
+
+    # Cada moneda se escribe en sus particiones date=YYYY-MM-DD/stock_symbol=<coin> apenas llega,
+    # así la memoria queda acotada al payload de una moneda en lugar de la tabla acumulada.
+    # Esquema compacto: timestamp en ms UTC, símbolo como diccionario y precios tipados
+    data = write_candle_partitions(data, STAGING_PRICES_DIR, "stock_symbol")
+    handoff = HandoffWriter("staging_prices", schema=candle_schema("stock_symbol"))
+    handoff.write(data)
+
+    counts = data["date"].astype(str).value_counts()
+    rows_by_date = {day: int(counts.get(day, 0)) for day in dates}
+    return checkpoint.mark_done(coin, rows_by_date, handoff.close())
+
+
+def merge_records(
+    dates: List[str],
+    records: Iterable[CoinCheckpoint],
+) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+    """
+    Add up the rows per date of the staged coins and collect their handoff entries.
+
+    Args:
+        dates (List[str]): Dates covered by the run.
+        records (Iterable[CoinCheckpoint]): Records of the staged coins.
+
+    Returns:
+        Tuple[Dict[str, int], List[Dict[str, Any]]]: Rows per date and the price handoff entries.
+    """
+    rows_by_date: Dict[str, int] = {day: 0 for day in dates}
+    price_entries: List[Dict[str, Any]] = []
+    for record in records:
+        for day, rows in record["rows_by_date"].items():
+            rows_by_date[day] = rows_by_date.get(day, 0) + int(rows)
+        if record["handoff"]:
+            price_entries.append(record["handoff"])
+    return rows_by_date, price_entries
+
+
+def check_completeness(
+    coins: List[str],
+    records: Dict[str, CoinCheckpoint],
+    min_ratio: float = STAGING_MIN_COMPLETENESS,
+) -> float:
+    """
+    Gate the run on the share of coins with prices.
+
+    Args:
+        coins (List[str]): Coins of the run.
+        records (Dict[str, CoinCheckpoint]): Records of the staged coins.
+        min_ratio (float): Minimum share of coins with prices.
+
+    Returns:
+        float: Share of coins with prices.
+
+    Raises:
+        StagingIncompleteError: If no coin has prices or the share is below `min_ratio`.
+    """
+    missing = [coin for coin in coins if coin not in records]
+    ratio = completeness_ratio(len(coins) - len(missing), len(coins))
+    print(f"Completitud de staging: {len(coins) - len(missing)}/{len(coins)} monedas ({ratio:.0%}).")
+    if missing:
+        print(f"Monedas sin precios en esta corrida: {', '.join(missing)}")
+
+    if not records:
+        raise StagingIncompleteError("No se pudieron recuperar datos de precios diarios para ninguna moneda.")
+    if ratio < min_ratio:
+        raise StagingIncompleteError(
+            f"Solo se recuperaron precios del {ratio:.0%} de las monedas (mínimo {min_ratio:.0%}); "
+            f"faltan: {', '.join(missing)}."
+        )
+    return ratio
+
+
+def finalize_shards(
+    coins: List[str],
+    dates: List[str],
+    checkpoint_dir: str = CHECKPOINT_DIR,
+    min_ratio: float = STAGING_MIN_COMPLETENESS,
+) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+    """
+    Combine the coins staged by the price shards of a run, including failed shards.
+
+    The coins are taken from the run checkpoint, so those completed by a shard that
+    failed on another coin are included too, and the run is gated on their share.
+
+    Args:
+        coins (List[str]): Coins of the run.
+        dates (List[str]): Dates covered by the run.
+        checkpoint_dir (str): Root directory of the run checkpoints.
+        min_ratio (float): Minimum share of coins with prices.
+
+    Returns:
+        Tuple[Dict[str, int], List[Dict[str, Any]]]: Rows per date and the price handoff entries.
+
+    Raises:
+        StagingIncompleteError: If no coin has prices or the share is below `min_ratio`.
+    """
+    records = StagingCheckpoint(dates, checkpoint_dir).completed(coins)
+    check_completeness(coins, records, min_ratio)
+    return merge_records(dates, records.values())
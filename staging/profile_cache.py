@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import pandas as pd
+from variables.config import DIR_PATH, PROFILE_CACHE_TTL_HOURS
+
+PROFILE_CACHE_PATH: str = os.path.join(DIR_PATH, "staging", "data", "profile_cache.json")
+
+# Columnas del perfil que forman parte del hash de contenido
+PROFILE_FIELDS: List[str] = ['symbol', 'id', 'name', 'category', 'description', 'logo', 'website', 'reddit']
+
+
+def compute_content_hash(profile: Dict[str, Any]) -> str:
+    """
+    Compute a stable SHA-256 hash of the descriptive fields of a coin profile.
+
+    Args:
+        profile (Dict[str, Any]): Profile row with the columns in `PROFILE_FIELDS`.
+
+    Returns:
+        str: Hex digest of the profile content.
+    """
+    content = {field: str(profile.get(field)) for field in PROFILE_FIELDS}
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_profile_cache(path: str = PROFILE_CACHE_PATH) -> Dict[str, Dict[str, Any]]:
+    """
+    Load the on-disk profile cache.
+
+    Args:
+        path (str): Location of the JSON cache file.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Cache entries keyed by CoinMarketCap id. Each entry holds
+        'profile', 'content_hash', 'fetched_at' and, once silver loaded it, 'loaded_hash'.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"No se pudo leer el cache de perfiles ({e}); se vuelve a generar.")
+        return {}
+
+
+def save_profile_cache(cache: Dict[str, Dict[str, Any]], path: str = PROFILE_CACHE_PATH) -> None:
+    """
+    Persist the profile cache atomically (write to a temporary file and rename).
+
+    Args:
+        cache (Dict[str, Dict[str, Any]]): Cache entries keyed by CoinMarketCap id.
+        path (str): Location of the JSON cache file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def stale_profile_ids(
+    cache: Dict[str, Dict[str, Any]],
+    coin_ids: List[str],
+    ttl_hours: float = PROFILE_CACHE_TTL_HOURS,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """
+    Return the ids whose cached profile is missing or older than the TTL.
+
+    Args:
+        cache (Dict[str, Dict[str, Any]]): Cache entries keyed by CoinMarketCap id.
+        coin_ids (List[str]): Configured CoinMarketCap ids.
+        ttl_hours (float): Hours a cached profile stays fresh.
+        now (Optional[datetime]): Reference time, defaults to the current UTC time.
+
+    Returns:
+        List[str]: Ids that need to be fetched again, in the configured order.
+    """
+    now = now or datetime.now(timezone.utc)
+    expiry = timedelta(hours=ttl_hours)
+    stale = []
+    for cid in dict.fromkeys(coin_ids):
+        entry = cache.get(cid)
+        if entry is None or now - datetime.fromisoformat(entry["fetched_at"]) >= expiry:
+            stale.append(cid)
+    return stale
+
+
+def update_profile_cache(
+    cache: Dict[str, Dict[str, Any]],
+    profiles_df: pd.DataFrame,
+    now: Optional[datetime] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Store freshly fetched profiles in the cache, keeping the hash last loaded by silver.
+
+    Args:
+        cache (Dict[str, Dict[str, Any]]): Cache entries keyed by CoinMarketCap id.
+        profiles_df (pd.DataFrame): Profiles returned by CoinMarketCap.
+        now (Optional[datetime]): Fetch time, defaults to the current UTC time.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The updated cache.
+    """
+    fetched_at = (now or datetime.now(timezone.utc)).isoformat()
+    for profile in profiles_df.to_dict("records"):
+        cid = str(profile["id"])
+        previous = cache.get(cid, {})
+        cache[cid] = {
+            "profile": {field: profile.get(field) for field in PROFILE_FIELDS},
+            "content_hash": compute_content_hash(profile),
+            "fetched_at": fetched_at,
+            "loaded_hash": previous.get("loaded_hash"),
+        }
+    return cache
+
+
+def cached_profiles_frame(cache: Dict[str, Dict[str, Any]], coin_ids: List[str]) -> pd.DataFrame:
+    """
+    Build the staging profile table from the cache.
+
+    Args:
+        cache (Dict[str, Dict[str, Any]]): Cache entries keyed by CoinMarketCap id.
+        coin_ids (List[str]): Configured CoinMarketCap ids.
+
+    Returns:
+        pd.DataFrame: One row per cached id with the profile columns plus 'content_hash'.
+    """
+    rows = [
+        {**cache[cid]["profile"], "content_hash": cache[cid]["content_hash"]}
+        for cid in dict.fromkeys(coin_ids)
+        if cid in cache
+    ]
+    return pd.DataFrame(rows, columns=PROFILE_FIELDS + ["content_hash"]) if rows else pd.DataFrame()
+
+
+def select_changed_profiles(crypto_description_df: pd.DataFrame, path: str = PROFILE_CACHE_PATH) -> pd.DataFrame:
+    """
+    Keep only the profiles whose content hash differs from the one last loaded into silver.
+
+    Args:
+        crypto_description_df (pd.DataFrame): Silver profiles with 'bk_crypto' and 'content_hash'.
+        path (str): Location of the JSON cache file.
+
+    Returns:
+        pd.DataFrame: Profiles that are new or changed since the last SCD2 load.
+    """
+    if crypto_description_df.empty or "content_hash" not in crypto_description_df.columns:
+        return crypto_description_df
+
+    cache = load_profile_cache(path)
+    loaded = crypto_description_df["bk_crypto"].astype(str).map(
+        lambda cid: cache.get(cid, {}).get("loaded_hash")
+    )
+    return crypto_description_df[crypto_description_df["content_hash"] != loaded]
+
+
+def mark_profiles_loaded(crypto_description_df: pd.DataFrame, path: str = PROFILE_CACHE_PATH) -> None:
+    """
+    Record the content hash of the profiles that were just loaded by the SCD2 process.
+
+    Args:
+        crypto_description_df (pd.DataFrame): Loaded profiles with 'bk_crypto' and 'content_hash'.
+        path (str): Location of the JSON cache file.
+    """
+    if crypto_description_df.empty or "content_hash" not in crypto_description_df.columns:
+        return
+
+    cache = load_profile_cache(path)
+    for cid, content_hash in zip(crypto_description_df["bk_crypto"].astype(str), crypto_description_df["content_hash"]):
+        if cid in cache:
+            cache[cid]["loaded_hash"] = content_hash
+    save_profile_cache(cache, path)
@@ -0,0 +1,49 @@
+import argparse
+from typing import Any, Dict, List, Optional
+from tasks.run_staging import run_staging
+from tasks.run_silver import run_silver
+from tasks.run_gold import run_gold
+
+
+def run_backfill(start_date: str, end_date: str) -> None:
+    """
+    Rebuild the history of a date range through staging, silver and gold.
+
+    Each coin is extracted for the whole range in windows of `BACKFILL_WINDOW_DAYS`
+    days and grouped in hourly candles (`BACKFILL_CANDLE_INTERVAL`), split into
+    per-date staging files and silver and gold load all dates in one run, instead
+    of triggering one DAG run per date.
+
+    Args:
+        start_date (str): First date of the range, in 'YYYY-MM-DD' format.
+        end_date (str): Last date of the range (inclusive), in 'YYYY-MM-DD' format.
+    """
+    context: Dict[str, Any] = {
+        "ds": end_date,
+        "params": {"backfill_start": start_date, "backfill_end": end_date},
+    }
+
+    # Fuera de Airflow los manifests de handoff se pasan en el contexto en lugar de XCom
+    context["manifests"] = {}
+    context["manifests"]["staging_run"] = run_staging(**context)
+    context["manifests"]["silver_run"] = run_silver(**context)
+    run_gold(**context)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point: `python -m tasks.run_backfill --start 2024-01-01 --end 2024-12-31`.
+
+    Args:
+        argv (Optional[List[str]]): Command line arguments, defaults to `sys.argv`.
+    """
+    parser = argparse.ArgumentParser(description="Backfill crypto prices for a range of dates.")
+    parser.add_argument("--start", required=True, help="First date of the range (YYYY-MM-DD).")
+    parser.add_argument("--end", required=True, help="Last date of the range, inclusive (YYYY-MM-DD).")
+    args = parser.parse_args(argv)
+
+    run_backfill(args.start, args.end)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+
+
+def get_backfill_range(context: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """
+    Read the backfill date range from the DAG params, if one was requested.
+
+    Args:
+        context (Dict[str, Any]): Airflow context; the range comes from the
+            `backfill_start` and `backfill_end` params (overridable with the run conf).
+
+    Returns:
+        Optional[Tuple[str, str]]: The (start, end) dates in 'YYYY-MM-DD' format,
+        or None for a regular daily run.
+
+    Raises:
+        ValueError: If only one bound is given, a date is invalid or start is after end.
+    """
+    params = context.get("params") or {}
+    start, end = params.get("backfill_start"), params.get("backfill_end")
+
+    if not start and not end:
+        return None
+    if not start or not end:
+        raise ValueError("Both backfill_start and backfill_end must be provided for a backfill run.")
+
+    start_date = datetime.strptime(str(start), "%Y-%m-%d").date()
+    end_date = datetime.strptime(str(end), "%Y-%m-%d").date()
+    if start_date > end_date:
+        raise ValueError(f"backfill_start ({start}) must not be after backfill_end ({end}).")
+
+    return start_date.isoformat(), end_date.isoformat()
+
+
+def resolve_run_dates(context: Dict[str, Any]) -> List[str]:
+    """
+    Return the dates processed by a DAG run: the backfill range if requested, else `ds`.
+
+    Args:
+        context (Dict[str, Any]): Airflow context.
+
+    Returns:
+        List[str]: Dates in 'YYYY-MM-DD' format, in ascending order.
+    """
+    backfill_range = get_backfill_range(context)
+    if backfill_range is None:
+        return [context["ds"]]
+
+    start, end = backfill_range
+    return pd.date_range(start, end, freq="D").strftime("%Y-%m-%d").tolist()
@@ -1,6 +1,7 @@
-from sqlalchemy.engine import Engine
-from variables.connection_redshift import create_redshift_engine
+from variables.connection_redshift import get_redshift_engine
 from gold.crypto_volability_and_performance import calculate_crypto_volability_and_performance
+from staging.handoff import pull_manifest, read_handoff
+from tasks.run_dates import resolve_run_dates
 
 
 def run_gold(**context) -> None:
@@ -13,6 +14,9 @@ def run_gold(**context) -> None:
         2. Calculate stock attributes based on daily stock prices for the given date.
         3. Insert the calculated attributes into the relevant table in Redshift.
 
+    The candles handed off by the silver task are memory-mapped once and shared by
+    every date of the run; without them each date reads its candles again.
+
     Args:
         None
 
@@ -21,10 +25,12 @@ def run_gold(**context) -> None:
         or the database connection.
     """
     
-    conn: Engine = create_redshift_engine()
-
-    # Calculate stock attributes and insert them into Redshift
-    calculate_crypto_volability_and_performance(conn, context["ds"])
+    # Calculate stock attributes and insert them into Redshift (every date of a backfill),
+    # reusing a single connection of the shared engine
+    candles_df = read_handoff(pull_manifest(context, "silver_run").get("candles"))
+    with get_redshift_engine().connect() as conn:
+        for date in resolve_run_dates(context):
+            calculate_crypto_volability_and_performance(conn, date, candles_df=candles_df)
 
 if __name__ == "__main__":
     run_gold()
\ No newline at end of file
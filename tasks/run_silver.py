@@ -1,45 +1,79 @@
-from sqlalchemy.engine import Engine
-from variables.connection_redshift import create_redshift_engine
+from variables.connection_redshift import get_redshift_engine
 from Silver.create_tables_redshift import create_tables
-from Silver.parquet_Silver import load_parquet_files
+from Silver.parquet_Silver import load_parquet_files, read_silver_categories
+from staging.handoff import pull_manifest, read_handoff, read_handoffs, write_handoff
+from staging.profile_cache import select_changed_profiles, mark_profiles_loaded
+from tasks.run_dates import resolve_run_dates
 from Silver.table_insert_sql import (
     insert_crypto_description_scd2,
     insert_date_data,
     insert_daily_crypto_prices
 )
+from typing import Any, Dict
 import pandas as pd
 
 
-def run_silver(**context) -> None:
+def run_silver(**context) -> Dict[str, Any]:
     """
     Run the silver layer process, which includes creating tables,
     loading Parquet files, and inserting data into Redshift tables.
 
     Steps:
-        1. Create necessary tables in the Redshift database.
-        2. Load data from Parquet files.
+        1. Load data from Parquet files.
+        2. Create necessary tables in the Redshift database.
         3. Insert stock, date, and daily stock prices data into Redshift.
+        4. Hand off the candles of the run to the gold task.
+
+    For a backfill run every date of the range is loaded from the staging files in
+    one pass and the resulting frames are inserted into Redshift in bulk. Table creation and
+    all the inserts share a single connection of the process-wide engine.
+
+    The staging frames are memory-mapped from the handoff files listed in the
+    manifest of the staging task, falling back to the staging Parquet files when
+    they are not available.
+
+    Returns:
+        Dict[str, Any]: Handoff manifest with the silver 'candles' (prices with their
+        current category) for the gold task.
 
     Raises:
         Exception: If there are issues with any of the steps,
         it will propagate the exception.
     """
     
-    conn: Engine = create_redshift_engine()
+    # Step 1: Load Parquet files into DataFrames (o los frames que dejó la tarea de staging)
+    staging_manifest = pull_manifest(context, "staging_run")
+    staging_prices_df = read_handoffs(staging_manifest.get("prices"))
+    staging_crypto_df = read_handoff(staging_manifest.get("profiles"))
+
+    # Todas las fechas de la corrida se cargan juntas; las que no tienen staging se informan y se omiten
+    daily_crypto_prices_df, crypto_description_df, dim_date_df = load_parquet_files(
+        resolve_run_dates(context), staging_prices_df, staging_crypto_df
+    )
 
-    # Step 1: Create tables in the Redshift database if they don't exist
-    create_tables(conn)
+    # Una sola conexión del engine compartido para la creación de tablas y todas las inserciones
+    with get_redshift_engine().connect() as conn:
+        # Step 2: Create tables in the Redshift database if they don't exist
+        create_tables(conn)
 
-    # Step 2: Load Parquet files into DataFrames
-    daily_crypto_prices_df: pd.DataFrame
-    crypto_description_df: pd.DataFrame
-    dim_date_df: pd.DataFrame
-    daily_crypto_prices_df, crypto_description_df, dim_date_df = load_parquet_files(context["ds"])
+        # Step 3: Insert data into Redshift tables
+        # Solo los perfiles cuyo hash cambió desde la última carga pasan por el proceso SCD2
+        changed_profiles_df: pd.DataFrame = select_changed_profiles(crypto_description_df)
+        if changed_profiles_df.empty:
+            print("Crypto profiles unchanged since the last load; skipping SCD2 processing.")
+        else:
+            insert_crypto_description_scd2(conn, changed_profiles_df)
+            mark_profiles_loaded(changed_profiles_df)
+        insert_date_data(conn, dim_date_df)
+        insert_daily_crypto_prices(conn, daily_crypto_prices_df)
 
-    # Step 3: Insert data into Redshift tables
-    insert_crypto_description_scd2(conn, crypto_description_df)
-    insert_date_data(conn, dim_date_df)
-    insert_daily_crypto_prices(conn, daily_crypto_prices_df)
+    # Step 4: Hand off the candles with their current category to the gold task
+    candles_df = daily_crypto_prices_df.drop_duplicates(subset=["timestamp", "symbol"])
+    categories_df = read_silver_categories()
+    # Las categorías se alinean al símbolo categórico, así el handoff conserva el diccionario
+    categories_df["symbol"] = categories_df["symbol"].astype(candles_df["symbol"].dtype)
+    candles_df = candles_df.merge(categories_df.dropna(subset=["symbol"]), on="symbol", how="inner")
+    return {"candles": write_handoff(candles_df, "silver_candles")}
 
 if __name__ == "__main__":
     run_silver()
\ No newline at end of file
@@ -1,10 +1,18 @@
-from staging.parquet_staging import parquet_create_staging
-from typing import Any
+from staging.extraction_engine import split_rate_limit
+from staging.parquet_staging import (
+    parquet_create_staging,
+    parquet_create_staging_range,
+    parquet_finalize_staging,
+    parquet_stage_prices,
+    parquet_stage_profiles,
+)
+from tasks.run_dates import get_backfill_range, resolve_run_dates
+from variables.config import COINGECKO_POOL_SLOTS, COINMARKETCAP_POOL_SLOTS
+from typing import Any, Dict, List
 from airflow.exceptions import AirflowException
 from dotenv import load_dotenv
-from variables.config import DIR_PATH, COINS_LIST, coin_id, API_KEY_COINMARKETCAP,DATE_STR
 
-def run_staging(**context: Any) -> None:    
+def run_staging(**context: Any) -> Dict[str, Any]:    
     """
     Executes the staging layer task, which generates parquet files with stock or coin
     data retrieved from external APIs. This function is designed to be executed within an Airflow DAG task, utilizing the 
@@ -16,17 +24,81 @@ def run_staging(**context: Any) -> None:
         **context (Any): A dictionary containing execution context information provided
         by Airflow. The `context` can include various parameters such as the execution 
         date (`ds`), task identifier, and other dynamic data relevant to the task.
+        When the `backfill_start` and `backfill_end` params are set, every date of
+        that range is extracted instead of `ds` only.
 
     Raises:
         AirflowException: If an error occurs during the parquet creation process, this 
         exception is raised to signal task failure in the DAG, allowing Airflow to 
         handle retries, notifications, and other failure-handling mechanisms.
+
+    Returns:
+        Dict[str, Any]: Handoff manifest of the staging outputs; Airflow pushes it to
+        XCom so the silver task can memory-map the frames instead of re-reading them.
     """
     try:
-        parquet_create_staging(context["ds"])
+        backfill_range = get_backfill_range(context)
+        if backfill_range is not None:
+            return parquet_create_staging_range(*backfill_range)
+        return parquet_create_staging(context["ds"])
     except AirflowException as e:
         raise e  # Forzar a cancelar a la tarea si se cancela el DAG
 
 
+def run_staging_shard(coins: List[str], **context: Any) -> Dict[str, Any]:
+    """
+    Extract the prices of a shard of coins; one mapped task instance of the DAG.
+
+    The instances run in the CoinGecko pool, so at most `COINGECKO_POOL_SLOTS` of them
+    hit the API at once and each one uses that share of the request quota. A shard
+    that fails is retried on its own, without re-extracting the other coins.
+
+    Args:
+        coins (List[str]): CoinGecko slugs of the shard.
+        **context (Any): Airflow context (`ds` and the backfill params).
+
+    Returns:
+        Dict[str, Any]: Shard manifest, pushed to XCom for the fan-in task.
+    """
+    split_rate_limit("coingecko", COINGECKO_POOL_SLOTS)
+    backfill_range = get_backfill_range(context)
+    if backfill_range is not None:
+        return parquet_stage_prices(coins, *backfill_range)
+    return parquet_stage_prices(coins, context["ds"])
+
+
+def run_staging_profiles(**context: Any) -> Dict[str, Any]:
+    """
+    Refresh the stale CoinMarketCap profiles, in parallel with the price shards.
+
+    Args:
+        **context (Any): Airflow context.
+
+    Returns:
+        Dict[str, Any]: Number of profile rows refreshed.
+    """
+    split_rate_limit("coinmarketcap", COINMARKETCAP_POOL_SLOTS)
+    return parquet_stage_profiles()
+
+
+def run_staging_fan_in(**context: Any) -> Dict[str, Any]:
+    """
+    Combine the mapped price shards into the staging manifest read by silver.
+
+    It runs once every shard has finished, even if some of them failed after their
+    retries: the coins staged are read from the run checkpoint, the missing ones are
+    reported and the run goes on if their share reaches `STAGING_MIN_COMPLETENESS`.
+
+    Args:
+        **context (Any): Airflow context.
+
+    Returns:
+        Dict[str, Any]: Handoff manifest of the staging outputs (see `run_staging`).
+
+    Raises:
+        AirflowException: If too few coins have prices or there are no profiles.
+    """
+    return parquet_finalize_staging(resolve_run_dates(context))
+
 if __name__ == "__main__":
     run_staging()
\ No newline at end of file
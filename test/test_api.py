@@ -1,21 +1,29 @@
+import calendar
 import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
-from datetime import datetime, timedelta
-from staging.api_extract_data import get_crypto_ohlc_data, create_crypto_table
+from datetime import datetime, timedelta, timezone
+from staging.api_extract_data import (
+    get_crypto_ohlc_data,
+    create_crypto_table,
+    fetch_crypto_profiles,
+    chunk_ids,
+    parse_ohlc_payload,
+)
 
 class TestCryptoDataFunctions(unittest.TestCase):
     
     def setUp(self):
-        # Calcular la fecha de ayer
-        self.yesterday = (datetime.now() - timedelta(days=1)).date()
+        # Calcular la fecha de ayer en UTC y su medianoche UTC en milisegundos (el parser agrupa los días en UTC)
+        self.yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).date()
+        self.yesterday_ms = calendar.timegm(self.yesterday.timetuple()) * 1000
     
-    @patch('staging.api_extract_data.requests.get')
+    @patch('staging.http_client.requests.Session.get')
     def test_get_crypto_ohlc_data_success(self, mock_get: MagicMock)-> None:
         # Simular una respuesta exitosa de la API de CoinGecko
         mock_response = MagicMock()
         mock_response.json.return_value = [
-            [int(self.yesterday.strftime("%s")) * 1000, 4000, 4050, 3950, 4025, 1000]  # Ejemplo de datos OHLC
+            [self.yesterday_ms, 4000, 4050, 3950, 4025, 1000]  # Ejemplo de datos OHLC
         ]
         mock_response.status_code = 200
         mock_get.return_value = mock_response
@@ -26,7 +34,7 @@ class TestCryptoDataFunctions(unittest.TestCase):
         # Comprobar el resultado
         expected_data = {
             'date': [pd.Timestamp(self.yesterday)],  # Asegurarse de que sea un Timestamp
-            'time': ['00:00:00'],
+            'timestamp': pd.to_datetime([self.yesterday_ms], unit='ms', utc=True).as_unit('ms'),
             'stock_symbol': ['ethereum'],
             'open_price': [4000.0],
             'high_price': [4050.0],
@@ -39,7 +47,7 @@ class TestCryptoDataFunctions(unittest.TestCase):
         result['date'] = pd.to_datetime(result['date'])  # Convierte a datetime si es necesario
         pd.testing.assert_frame_equal(result, expected_df)
 
-    @patch('staging.api_extract_data.requests.get')
+    @patch('staging.http_client.requests.Session.get')
     def test_get_crypto_ohlc_data_no_data(self, mock_get: MagicMock):
         # Simular una respuesta vacía de la API de CoinGecko
         mock_response = MagicMock()
@@ -54,7 +62,7 @@ class TestCryptoDataFunctions(unittest.TestCase):
         expected_df = pd.DataFrame()
         pd.testing.assert_frame_equal(result, expected_df)
 
-    @patch('staging.api_extract_data.requests.get')
+    @patch('staging.http_client.requests.Session.get')
     def test_create_crypto_table_success(self, mock_get: MagicMock):
         # Simular una respuesta exitosa de la API de CoinMarketCap
         mock_response = MagicMock()
@@ -96,7 +104,7 @@ class TestCryptoDataFunctions(unittest.TestCase):
 
         pd.testing.assert_frame_equal(result, expected_df)
 
-    @patch('staging.api_extract_data.requests.get')
+    @patch('staging.http_client.requests.Session.get')
     def test_create_crypto_table_no_data(self, mock_get: MagicMock):
         # Simular una respuesta sin datos de la API de CoinMarketCap
         mock_response = MagicMock()
@@ -114,7 +122,7 @@ class TestCryptoDataFunctions(unittest.TestCase):
         expected_df = pd.DataFrame()
         pd.testing.assert_frame_equal(result, expected_df)
 
-    @patch('staging.api_extract_data.requests.get')
+    @patch('staging.http_client.requests.Session.get')
     def test_create_crypto_table_http_error(self, mock_get: MagicMock):
         # Simular un error HTTP (ej. 404 Not Found)
         mock_response = MagicMock()
@@ -129,5 +137,52 @@ class TestCryptoDataFunctions(unittest.TestCase):
         expected_df = pd.DataFrame()
         pd.testing.assert_frame_equal(result, expected_df)
 
+    @patch('staging.http_client.requests.Session.get')
+    def test_fetch_crypto_profiles_batches_ids(self, mock_get: MagicMock):
+        # Simular una respuesta multi-id de la API de CoinMarketCap
+        def coin(cid: str, symbol: str) -> dict:
+            return {
+                'symbol': symbol,
+                'id': int(cid),
+                'name': symbol.title(),
+                'description': f'Descripción de {symbol}',
+                'logo': f'https://logo/{cid}.png',
+                'urls': {'website': [f'https://{symbol}.org'], 'reddit': []}
+            }
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.side_effect = [
+            {'data': {'1': coin('1', 'BTC'), '74': coin('74', 'DOGE')}},
+            {'data': {'1027': coin('1027', 'ETH')}},
+        ]
+        mock_get.return_value = mock_response
+
+        result = fetch_crypto_profiles(['1', '74', '1027', '74'], 'fake_api_key', chunk_size=2)
+
+        # Dos solicitudes para tres IDs únicos, con los IDs separados por comas
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args_list[0].kwargs['params'], {'id': '1,74'})
+        self.assertEqual(result['symbol'].tolist(), ['BTC', 'DOGE', 'ETH'])
+        self.assertEqual(result['reddit'].tolist(), ['No disponible'] * 3)
+        self.assertEqual(result['category'].tolist(), ['No disponible'] * 3)
+
+    def test_parse_ohlc_payload_filters_dates(self):
+        # Velas de tres días consecutivos en UTC, cada 12 horas
+        start = int(pd.Timestamp('2024-10-01', tz='UTC').timestamp()) * 1000
+        half_day = 12 * 60 * 60 * 1000
+        data = [[start + i * half_day, i, i + 2, i - 1, i + 1] for i in range(6)]
+
+        result = parse_ohlc_payload(data, 'bitcoin', ['2024-10-02', '2024-10-03'])
+
+        self.assertEqual([str(d) for d in result['date']], ['2024-10-02', '2024-10-02', '2024-10-03', '2024-10-03'])
+        self.assertEqual(result['timestamp'].dt.strftime('%H:%M:%S').tolist(), ['00:00:00', '12:00:00', '00:00:00', '12:00:00'])
+        self.assertEqual(str(result['timestamp'].dtype), 'datetime64[ms, UTC]')
+        self.assertEqual(result['open_price'].tolist(), [2.0, 3.0, 4.0, 5.0])
+        self.assertTrue(parse_ohlc_payload(data, 'bitcoin', ['2024-09-30']).empty)
+
+    def test_chunk_ids(self):
+        self.assertEqual(chunk_ids(['1', '2', '3', '2', '4'], 3), [['1', '2', '3'], ['4']])
+
 if __name__ == '__main__':
     unittest.main()
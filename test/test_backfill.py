@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from staging.api_extract_data import get_crypto_ohlc_range, market_chart_windows, parse_market_chart_payload
+from tasks.run_dates import get_backfill_range, resolve_run_dates
+
+
+class TestBackfillDates(unittest.TestCase):
+
+    def test_daily_run_uses_ds(self) -> None:
+        context = {"ds": "2024-10-01", "params": {"backfill_start": None, "backfill_end": None}}
+
+        self.assertIsNone(get_backfill_range(context))
+        self.assertEqual(resolve_run_dates(context), ["2024-10-01"])
+
+    def test_backfill_run_expands_range(self) -> None:
+        context = {"ds": "2024-10-01", "params": {"backfill_start": "2024-02-27", "backfill_end": "2024-03-01"}}
+
+        self.assertEqual(
+            resolve_run_dates(context),
+            ["2024-02-27", "2024-02-28", "2024-02-29", "2024-03-01"],
+        )
+
+    def test_invalid_ranges_are_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            get_backfill_range({"params": {"backfill_start": "2024-03-01"}})
+        with self.assertRaises(ValueError):
+            get_backfill_range({"params": {"backfill_start": "2024-03-02", "backfill_end": "2024-03-01"}})
+
+    def test_market_chart_windows_cover_range(self) -> None:
+        day = 24 * 3600
+        start = int(pd.Timestamp("2024-02-27", tz="UTC").timestamp())
+
+        self.assertEqual(
+            market_chart_windows("2024-02-27", "2024-03-01", 1),
+            [(start + i * day, start + (i + 1) * day) for i in range(4)],
+        )
+        self.assertEqual(
+            market_chart_windows("2024-02-27", "2024-03-01", 3),
+            [(start, start + 3 * day), (start + 3 * day, start + 4 * day)],
+        )
+        # Con la ventana por defecto un año completo son pocas solicitudes por moneda
+        self.assertEqual(len(market_chart_windows("2024-01-01", "2024-12-31")), 5)
+
+    def test_market_chart_prices_become_candles(self) -> None:
+        # Precios cada 5 minutos de 23:50 a 01:00 UTC, con el punto de las 00:00 repetido entre ventanas
+        timestamps = pd.date_range("2024-02-27 23:50", "2024-02-28 01:00", freq="5min", tz="UTC")
+        prices = [[int(ts.timestamp() * 1000), float(i)] for i, ts in enumerate(timestamps)]
+        prices.append(prices[2])
+
+        candles = parse_market_chart_payload(prices, "bitcoin", ["2024-02-28"], "30min")
+
+        # Cada vela lleva el timestamp de su cierre y se fecha por él, como en /ohlc
+        self.assertEqual(candles["timestamp"].dt.strftime("%H:%M").tolist(), ["00:00", "00:30", "01:00"])
+        self.assertEqual(candles["open_price"].tolist(), [0.0, 3.0, 9.0])
+        self.assertEqual(candles["high_price"].tolist(), [2.0, 8.0, 14.0])
+        self.assertEqual(candles["low_price"].tolist(), [0.0, 3.0, 9.0])
+        self.assertEqual(candles["close_price"].tolist(), [2.0, 8.0, 14.0])
+        self.assertEqual(str(candles["timestamp"].dtype), "datetime64[ms, UTC]")
+
+    def test_candles_are_not_finer_than_the_prices(self) -> None:
+        # Precios históricos por hora: pedir velas de 30 minutos no genera velas de un solo punto
+        timestamps = pd.date_range("2024-02-28 01:00", "2024-02-28 04:00", freq="1h", tz="UTC")
+        prices = [[int(ts.timestamp() * 1000), float(i)] for i, ts in enumerate(timestamps)]
+
+        with patch("builtins.print"):
+            candles = parse_market_chart_payload(prices, "bitcoin", ["2024-02-28"], "30min")
+
+        self.assertEqual(candles["timestamp"].dt.strftime("%H:%M").tolist(), ["01:00", "02:00", "03:00", "04:00"])
+        self.assertEqual(candles["close_price"].tolist(), [0.0, 1.0, 2.0, 3.0])
+
+    def test_range_requests_each_window_and_reports_missing_dates(self) -> None:
+        def fake_request(provider, url, params):
+            start = pd.Timestamp(params["from"], unit="s", tz="UTC")
+            if start.strftime("%Y-%m-%d") == "2024-02-28":
+                return {"prices": []}
+            points = pd.date_range(start, periods=12, freq="2h")
+            return {"prices": [[int(ts.timestamp() * 1000), 1.0] for ts in points]}
+
+        with patch("staging.api_extract_data.request_json", side_effect=fake_request) as request, \
+                patch("builtins.print") as printed:
+            candles = get_crypto_ohlc_range("bitcoin", "2024-02-27", "2024-02-29", window_days=1)
+
+        self.assertEqual(request.call_count, 3)
+        self.assertTrue(request.call_args.args[1].endswith("/coins/bitcoin/market_chart/range"))
+        self.assertEqual(sorted(candles["date"].astype(str).unique()), ["2024-02-27", "2024-02-29"])
+        self.assertIn("2024-02-28", " ".join(str(call) for call in printed.call_args_list))
+
+if __name__ == '__main__':
+    unittest.main()
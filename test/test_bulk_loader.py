@@ -0,0 +1,57 @@
+import gzip
+from unittest.mock import patch, MagicMock
+import numpy as np
+import pandas as pd
+import pytest
+from Silver.bulk_loader import bulk_insert
+
+
+def _prices() -> pd.DataFrame:
+    return pd.DataFrame({
+        "date": pd.to_datetime(["2024-10-01", "2024-10-01", "2024-10-01"]).date,
+        "symbol": ["BTC", "BTC", "ETH"],
+        "open_price": [1.5, np.nan, 3.0],
+        "volume": np.array([1, 2, 3], dtype="int64"),
+    })
+
+
+def test_execute_values_pages_native_values():
+    """
+    Test that the execute_values backend sends every row in multi-row pages,
+    with native Python values and NaN converted to NULL.
+    """
+    connection = MagicMock()
+    with patch("Silver.bulk_loader.execute_values") as mock_execute_values:
+        loaded = bulk_insert(connection, _prices(), "daily_crypto_prices", schema="s", method="execute_values", page_size=2)
+
+    assert loaded == 3
+    _, sql, rows = mock_execute_values.call_args[0]
+    assert sql == 'INSERT INTO "s".daily_crypto_prices (date, symbol, open_price, volume) VALUES %s'
+    assert mock_execute_values.call_args[1]["page_size"] == 2
+    assert rows[1][2] is None
+    assert type(rows[0][3]) is int
+
+
+def test_copy_uploads_gzipped_csv_and_cleans_up():
+    """
+    Test that the copy backend uploads a gzipped CSV, runs a single COPY from it and
+    deletes the object afterwards.
+    """
+    connection = MagicMock()
+    client = MagicMock()
+    with patch("Silver.bulk_loader._s3_client", return_value=client), \
+            patch("Silver.bulk_loader.BULK_LOAD_S3_BUCKET", "bucket"):
+        bulk_insert(connection, _prices(), "daily_crypto_prices", schema="s", method="copy")
+
+    body = gzip.decompress(client.put_object.call_args[1]["Body"]).decode("utf-8").splitlines()
+    assert body[1] == "2024-10-01,BTC,\\N,2"
+    connection.execute.assert_called_once()
+    params = connection.execute.call_args[0][1]
+    key = client.put_object.call_args[1]["Key"]
+    assert params["source"] == f"s3://bucket/{key}"
+    client.delete_object.assert_called_once_with(Bucket="bucket", Key=key)
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        bulk_insert(MagicMock(), _prices(), "daily_crypto_prices", method="bcp")
@@ -0,0 +1,93 @@
+import os
+from datetime import date
+from unittest.mock import patch
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from Silver.incremental_writer import append_prices, compact_prices
+from staging import candle_schema
+from staging.candle_schema import candle_frame, read_candle_partitions, warehouse_candles, write_candle_partitions
+
+
+def _candles(coin: str = "bitcoin") -> pd.DataFrame:
+    timestamps = pd.to_datetime(["2024-10-01 00:00", "2024-10-01 04:00", "2024-10-02 00:00"], utc=True)
+    return pd.DataFrame({
+        "date": timestamps.date,
+        "timestamp": timestamps,
+        "stock_symbol": coin,
+        "open_price": [1.0, 2.0, 3.0],
+        "high_price": [1.5, 2.5, 3.5],
+        "low_price": [0.5, 1.5, 2.5],
+        "close_price": [1.25, 2.25, 3.25],
+    })
+
+
+def test_staging_files_store_the_compact_schema(tmp_path):
+    """
+    Test that the staging writer stores only the timestamp and the prices in the files
+    and that the reader returns native types instead of object columns.
+    """
+    write_candle_partitions(_candles(), str(tmp_path), "stock_symbol")
+
+    stored = pq.ParquetFile(os.path.join(tmp_path, "date=2024-10-01", "stock_symbol=bitcoin", "part-0.parquet"))
+    assert stored.schema_arrow.names == ["timestamp", "open_price", "high_price", "low_price", "close_price"]
+    assert stored.schema_arrow.field("timestamp").type == pa.timestamp("ms", tz="UTC")
+
+    result = read_candle_partitions(str(tmp_path), "stock_symbol", start_date="2024-10-01", end_date="2024-10-01")
+    assert isinstance(result["stock_symbol"].dtype, pd.CategoricalDtype)
+    assert str(result["timestamp"].dtype) == "datetime64[ms, UTC]"
+    assert result["timestamp"].dt.strftime("%H:%M").tolist() == ["00:00", "04:00"]
+    assert result["close_price"].tolist() == [1.25, 2.25]
+
+
+def test_float32_prices(tmp_path):
+    with patch.object(candle_schema, "CANDLE_PRICE_DTYPE", "float32"):
+        write_candle_partitions(_candles(), str(tmp_path), "stock_symbol")
+        result = read_candle_partitions(str(tmp_path), "stock_symbol")
+    assert (result[["open_price", "close_price"]].dtypes == "float32").all()
+
+    with pytest.raises(ValueError):
+        candle_frame(_candles(), "stock_symbol", price_dtype="float16")
+
+
+def test_legacy_partitions_are_read_with_new_ones(tmp_path):
+    """
+    Test that partitions written with the legacy 'time' string column are read together
+    with compact partitions, with the time converted to the candle timestamp.
+    """
+    write_candle_partitions(_candles(), str(tmp_path), "stock_symbol")
+    legacy_dir = os.path.join(tmp_path, "date=2024-10-01", "stock_symbol=ethereum")
+    os.makedirs(legacy_dir)
+    pd.DataFrame({
+        "time": ["08:00:00"], "open_price": [10.0], "high_price": [11.0], "low_price": [9.0], "close_price": [10.5],
+    }).to_parquet(os.path.join(legacy_dir, "part-0.parquet"), index=False)
+
+    result = read_candle_partitions(str(tmp_path), "stock_symbol", start_date="2024-10-01", end_date="2024-10-01")
+    ethereum = result[result["stock_symbol"] == "ethereum"]
+    assert "time" not in result.columns
+    assert ethereum["timestamp"].tolist() == [pd.Timestamp("2024-10-01 08:00", tz="UTC")]
+    assert sorted(result["stock_symbol"].astype(str).unique()) == ["bitcoin", "ethereum"]
+
+
+def test_compaction_merges_legacy_and_compact_fragments(tmp_path):
+    silver = candle_frame(_candles().rename(columns={"stock_symbol": "symbol"}))
+    append_prices(silver[silver["date"] == date(2024, 10, 1)], str(tmp_path))
+    partition_dir = os.path.join(tmp_path, "date=2024-10-01", "symbol=bitcoin")
+    # Fragmento anterior al esquema: repite la vela de las 04:00 y agrega la de las 08:00
+    pd.DataFrame({
+        "time": ["04:00:00", "08:00:00"], "open_price": [2.0, 4.0], "high_price": [2.5, 4.5],
+        "low_price": [1.5, 3.5], "close_price": [2.25, 4.25],
+    }).to_parquet(os.path.join(partition_dir, "part-legacy.parquet"), index=False)
+
+    assert compact_prices(str(tmp_path), min_fragments=2) == 1
+    result = read_candle_partitions(str(tmp_path), "symbol")
+    assert result["timestamp"].dt.strftime("%H:%M").tolist() == ["00:00", "04:00", "08:00"]
+
+
+def test_warehouse_candles_derive_the_time_column():
+    candles = candle_frame(_candles().rename(columns={"stock_symbol": "symbol"}), price_dtype="float32")
+    result = warehouse_candles(candles)
+    assert result["time"].tolist() == ["00:00:00", "04:00:00", "00:00:00"]
+    assert result["symbol"].dtype == object
+    assert result["close_price"].dtype == "float64"
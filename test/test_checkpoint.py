@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from staging.checkpoint import StagingCheckpoint, completeness_ratio, prune_checkpoints
+
+DATES = ["2024-10-01", "2024-10-02"]
+
+
+class TestStagingCheckpoint(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = self.tmp_dir.name
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_completed_coins_are_recorded_per_run(self) -> None:
+        """
+        Test that a coin marked as done is returned by a new checkpoint of the same run
+        (a retry) and not by the checkpoint of another date range.
+        """
+        checkpoint = StagingCheckpoint(DATES, self.base_dir)
+        entry = {"path": "staging_prices-abc.arrow", "sha256": "abc", "bytes": 10, "rows": 12}
+        checkpoint.mark_done("bitcoin", {"2024-10-01": 6, "2024-10-02": 6}, entry)
+
+        retry = StagingCheckpoint(DATES, self.base_dir)
+        records = retry.completed(["bitcoin", "ethereum"])
+        self.assertEqual(list(records), ["bitcoin"])
+        self.assertEqual(records["bitcoin"]["rows_by_date"], {"2024-10-01": 6, "2024-10-02": 6})
+        self.assertEqual(records["bitcoin"]["handoff"], entry)
+
+        self.assertEqual(StagingCheckpoint(["2024-10-02"], self.base_dir).completed(["bitcoin"]), {})
+        self.assertFalse([name for name in os.listdir(retry.path) if name.endswith(".tmp")])
+
+    def test_expired_or_corrupt_records_are_extracted_again(self) -> None:
+        checkpoint = StagingCheckpoint(DATES, self.base_dir, ttl_hours=1)
+        checkpoint.mark_done("bitcoin", {"2024-10-01": 6}, None)
+        checkpoint.mark_done("ethereum", {"2024-10-01": 6}, None)
+
+        expired = time.time() - 2 * 3600
+        path = os.path.join(checkpoint.path, "bitcoin.json")
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content.replace('"completed_at": ', f'"completed_at": {expired}, "previous": '))
+        with open(os.path.join(checkpoint.path, "ethereum.json"), "w", encoding="utf-8") as f:
+            f.write("{")
+
+        with patch("builtins.print"):
+            self.assertEqual(checkpoint.completed(["bitcoin", "ethereum"]), {})
+
+    def test_prune_removes_old_records_and_runs(self) -> None:
+        old_run = StagingCheckpoint(["2024-09-01"], self.base_dir)
+        old_run.mark_done("bitcoin", {"2024-09-01": 6}, None)
+        new_run = StagingCheckpoint(DATES, self.base_dir)
+        new_run.mark_done("bitcoin", {"2024-10-01": 6}, None)
+
+        expired = time.time() - 48 * 3600
+        os.utime(os.path.join(old_run.path, "bitcoin.json"), (expired, expired))
+        self.assertEqual(prune_checkpoints(self.base_dir, ttl_hours=24), 1)
+        self.assertTrue(os.path.isdir(new_run.path))
+
+        # El directorio vacío se elimina cuando también supera el TTL
+        os.utime(old_run.path, (expired, expired))
+        self.assertEqual(prune_checkpoints(self.base_dir, ttl_hours=24), 0)
+        self.assertEqual(os.listdir(self.base_dir), [os.path.basename(new_run.path)])
+
+    def test_completeness_ratio(self) -> None:
+        self.assertEqual(completeness_ratio(5, 6), 5 / 6)
+        self.assertEqual(completeness_ratio(0, 6), 0.0)
+        self.assertEqual(completeness_ratio(0, 0), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import json
+import pandas as pd
+import pytest
+from variables.coin_registry import Coin, CoinRegistry, load_coin_registry
+
+
+def test_shipped_registry_is_valid():
+    """
+    Test that the registry file shipped with the pipeline loads, with one entry per coin
+    and lookups by slug, CoinMarketCap id and symbol.
+    """
+    registry = load_coin_registry()
+
+    assert registry.symbols == ["BTC", "ETH", "ADA", "DOGE", "AXS", "SLP"]
+    assert len(set(registry.cmc_ids)) == len(registry.coins)
+    assert registry.by_slug("dogecoin").cmc_id == "74"
+    assert registry.by_cmc_id(1027).symbol == "ETH"
+    assert registry.by_symbol("SLP").slug == "smooth-love-potion"
+
+
+@pytest.mark.parametrize("coins", [
+    # El mismo símbolo con dos ids de CoinMarketCap (como el DOGE duplicado de la lista anterior)
+    [Coin("dogecoin", "74", "DOGE", "Dogecoin"), Coin("dogecoin-v2", "31093", "DOGE", "Dogecoin V2")],
+    [Coin("bitcoin", "1", "BTC", "Bitcoin"), Coin("bitcoin", "2", "XBT", "Bitcoin")],
+    [Coin("bitcoin", "BTC", "BTC", "Bitcoin")],
+    [Coin("bitcoin", "1", "", "Bitcoin")],
+    [],
+])
+def test_invalid_registries_fail_on_load(coins):
+    with pytest.raises(ValueError):
+        CoinRegistry(coins)
+
+
+def test_entry_without_field_fails_on_load(tmp_path):
+    path = tmp_path / "coins.json"
+    path.write_text(json.dumps({"coins": [{"slug": "bitcoin", "cmc_id": "1", "name": "Bitcoin"}]}))
+    with pytest.raises(ValueError):
+        load_coin_registry(str(path))
+
+
+def test_slug_symbols_maps_categories():
+    registry = load_coin_registry()
+    slugs = pd.Series(["bitcoin", "dogecoin", "bitcoin"], dtype="category")
+
+    symbols = registry.slug_symbols(slugs)
+
+    assert isinstance(symbols.dtype, pd.CategoricalDtype)
+    assert symbols.tolist() == ["BTC", "DOGE", "BTC"]
+    with pytest.raises(ValueError):
+        registry.slug_symbols(pd.Series(["bitcoin", "shiba-inu"]))
+
+
+def test_profile_mismatches():
+    registry = load_coin_registry()
+    profiles = pd.DataFrame({"id": [1, 74, 31093], "symbol": ["BTC", "DOGEV1", "DOGE"]})
+
+    mismatches = registry.profile_mismatches(profiles)
+
+    assert len(mismatches) == 2
+    assert "74" in mismatches[0] and "31093" in mismatches[1]
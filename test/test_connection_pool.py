@@ -0,0 +1,35 @@
+from unittest.mock import patch, MagicMock
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from variables import connection_redshift
+from variables.connection_redshift import get_redshift_engine, transaction
+
+
+def test_get_redshift_engine_is_memoized():
+    """
+    Test that the engine is created once per process and reused afterwards.
+    """
+    get_redshift_engine.cache_clear()
+    mock_engine = MagicMock(spec=Engine)
+    try:
+        with patch.object(connection_redshift, 'create_redshift_engine', return_value=mock_engine) as mock_create, \
+                patch.object(connection_redshift.event, 'listens_for', return_value=lambda fn: fn):
+            assert get_redshift_engine() is get_redshift_engine()
+        mock_create.assert_called_once()
+    finally:
+        get_redshift_engine.cache_clear()
+
+
+def test_transaction_reuses_an_open_connection():
+    """
+    Test that transaction() runs on the given connection and commits the block.
+    """
+    engine = create_engine('sqlite://')
+    with engine.connect() as connection:
+        with transaction(connection) as tx_connection:
+            assert tx_connection is connection
+            tx_connection.execute(text("CREATE TABLE t (x INTEGER)"))
+            tx_connection.execute(text("INSERT INTO t VALUES (1)"))
+        assert not connection.in_transaction()
+        with transaction(engine) as other:
+            assert other.execute(text("SELECT COUNT(*) FROM t")).scalar() == 1
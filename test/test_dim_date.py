@@ -0,0 +1,33 @@
+import unittest
+from datetime import date
+import pandas as pd
+from Silver.parquet_Silver import build_dim_date, generate_calendar
+
+
+class TestDimDate(unittest.TestCase):
+
+    def test_build_dim_date_attributes(self) -> None:
+        result = build_dim_date([date(2024, 12, 29), date(2024, 6, 3), date(2024, 12, 29)])
+
+        self.assertEqual(result['date'].tolist(), [pd.Timestamp('2024-06-03'), pd.Timestamp('2024-12-29')])
+        row = result.iloc[1]
+        self.assertEqual(row['yearmonth'], '202412')
+        self.assertEqual(row['month_name'], 'December')
+        self.assertEqual(row['day_of_week'], 7)
+        self.assertEqual(row['day_of_year'], 364)
+        self.assertEqual(row['week_number'], 52)
+        self.assertEqual(row['quarter'], 4)
+        self.assertEqual(row['semester'], 2)
+        self.assertTrue(row['is_weekend'])
+        self.assertEqual(result.iloc[0]['semester'], 1)
+
+    def test_generate_calendar_covers_range(self) -> None:
+        calendar = generate_calendar('2024-01-01', '2024-12-31')
+
+        self.assertEqual(len(calendar), 366)
+        self.assertEqual(calendar['week_of_year'].iloc[-1], 1)  # ISO: 2024-12-31 pertenece a la semana 1 de 2025
+        self.assertEqual(calendar['is_weekend'].sum(), 104)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import json
+import gc
+import threading
+import time
+import unittest
+import weakref
+from datetime import datetime, timezone
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from staging.api_extract_data import get_crypto_ohlc_data, create_crypto_table
+from staging.extraction_engine import PROVIDER_QUOTAS, RATE_LIMITERS, TokenBucket, run_concurrently, split_rate_limit
+
+TARGET_DATE = "2024-10-01"
+TARGET_TS = int(datetime(2024, 10, 1, 12, 0, tzinfo=timezone.utc).timestamp()) * 1000
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    """Servidor stub que imita las respuestas de CoinGecko y CoinMarketCap."""
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        if parsed.path.startswith("/coins/") and parsed.path.endswith("/ohlc"):
+            body = [[TARGET_TS, 1.0, 2.0, 0.5, 1.5]]
+        elif parsed.path == "/v1/cryptocurrency/info":
+            cid = parse_qs(parsed.query)["id"][0]
+            body = {
+                "data": {
+                    cid: {
+                        "symbol": f"C{cid}",
+                        "id": int(cid),
+                        "name": f"Coin {cid}",
+                        "description": "stub",
+                        "logo": "logo.png",
+                        "urls": {"website": ["https://example.com"], "reddit": []},
+                    }
+                }
+            }
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class TestExtractionEngine(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubApiHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_token_bucket_limits_rate(self) -> None:
+        # 600 solicitudes por minuto = 10 por segundo, sin ráfaga
+        bucket = TokenBucket(600, 1)
+        start = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.25)
+
+    def test_split_rate_limit_shares_the_quota(self) -> None:
+        # Las instancias mapeadas de un pool con 2 lugares usan cada una la mitad de la cuota
+        original = RATE_LIMITERS["coingecko"]
+        requests_per_minute, burst = PROVIDER_QUOTAS["coingecko"]
+        try:
+            limiter = split_rate_limit("coingecko", 2)
+            self.assertIs(RATE_LIMITERS["coingecko"], limiter)
+            self.assertAlmostEqual(limiter.rate, requests_per_minute / 60.0 / 2)
+            self.assertEqual(limiter.capacity, max(burst // 2, 1))
+            self.assertEqual(split_rate_limit("coingecko", 0).rate, requests_per_minute / 60.0)
+        finally:
+            RATE_LIMITERS["coingecko"] = original
+
+    def test_run_concurrently_against_stub_server(self) -> None:
+        coins = ["bitcoin", "ethereum", "cardano"]
+        ids = ["1", "1027"]
+        tasks = {f"prices:{c}": partial(get_crypto_ohlc_data, c, TARGET_DATE, self.base_url) for c in coins}
+        tasks.update({f"profile:{i}": partial(create_crypto_table, i, "fake_api_key", self.base_url) for i in ids})
+
+        results = {label: (data, error) for label, data, error in run_concurrently(tasks, max_workers=4)}
+
+        self.assertEqual(set(results), set(tasks))
+        for coin in coins:
+            data, error = results[f"prices:{coin}"]
+            self.assertIsNone(error)
+            self.assertEqual(data["stock_symbol"].tolist(), [coin])
+            self.assertEqual(data["close_price"].tolist(), [1.5])
+        for cid in ids:
+            data, error = results[f"profile:{cid}"]
+            self.assertIsNone(error)
+            self.assertEqual(data["symbol"].tolist(), [f"C{cid}"])
+
+    def test_run_concurrently_reports_errors(self) -> None:
+        def failing_task() -> None:
+            raise RuntimeError("boom")
+
+        results = list(run_concurrently({"ok": lambda: 1, "fail": failing_task}))
+        by_label = {label: (data, error) for label, data, error in results}
+
+        self.assertEqual(by_label["ok"], (1, None))
+        self.assertIsNone(by_label["fail"][0])
+        self.assertIsInstance(by_label["fail"][1], RuntimeError)
+
+    def test_run_concurrently_bounds_results_in_memory(self) -> None:
+        class Payload:
+            pass
+
+        started = []
+        lock = threading.Lock()
+
+        def task(i: int) -> Payload:
+            with lock:
+                started.append(i)
+            return Payload()
+
+        results = run_concurrently({f"task:{i}": partial(task, i) for i in range(6)}, max_workers=2)
+        label, payload, error = next(results)
+        self.assertIsNone(error)
+        first = weakref.ref(payload)
+        del payload
+
+        # Con el consumidor detenido no se envían más tareas que las de los hilos disponibles
+        time.sleep(0.2)
+        self.assertLessEqual(len(started), 3)
+
+        # Un resultado ya consumido no queda retenido por el generador
+        next(results)
+        gc.collect()
+        self.assertIsNone(first())
+
+        self.assertEqual(len(list(results)), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import math
+import statistics
+from functools import partial
+import pandas as pd
+from unittest.mock import patch
+import pytest
+from sqlalchemy import create_engine, event, text
+from gold import crypto_volability_and_performance as gold
+from Silver.bulk_loader import bulk_insert
+from gold.interval_kpis import save_daily_state, load_daily_state
+from staging.handoff import read_handoff, write_handoff
+from staging.partitioned_dataset import read_partitions, write_partitions
+
+
+class _StddevSamp:
+    """STDDEV_SAMP aggregate for SQLite."""
+
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        return statistics.stdev(self.values) if len(self.values) > 1 else None
+
+
+class _VarPop(_StddevSamp):
+    """VAR_POP aggregate for SQLite."""
+
+    def finalize(self):
+        return statistics.pvariance(self.values) if self.values else None
+
+
+@pytest.fixture
+def engine():
+    """SQLite engine with a 's' schema holding small prices and profiles tables."""
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def _setup(dbapi_connection, _):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS s")
+        dbapi_connection.create_aggregate("STDDEV_SAMP", 1, _StddevSamp)
+        dbapi_connection.create_aggregate("VAR_POP", 1, _VarPop)
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE s.daily_crypto_prices (date TEXT, time TEXT, symbol TEXT, open_price REAL, high_price REAL, low_price REAL, close_price REAL)"))
+        connection.execute(text("CREATE TABLE s.crypto_description (symbol TEXT, category TEXT, is_current INTEGER)"))
+        connection.execute(text(
+            "CREATE TABLE s.crypto_volatility_and_performance (date TEXT, symbol TEXT, category TEXT, time_interval TEXT, "
+            "low_price REAL, high_price REAL, volatility REAL, open_price REAL, close_price REAL, \"return\" REAL, "
+            "\"range\" REAL, average_price REAL, standard_desviation REAL)"
+        ))
+        connection.execute(text("INSERT INTO s.crypto_description VALUES ('BTC', 'coin', 1), ('ETH', 'coin', 1)"))
+        # Inserted out of time order so first/last must follow the time column
+        candles = [
+            ("12:00:00", "BTC", 12, 15, 11, 14), ("00:00:00", "BTC", 10, 13, 9, 12), ("23:30:00", "BTC", 14, 16, 13, 15),
+            ("08:00:00", "ETH", 2, 3, 1, 2.5), ("04:00:00", "ETH", 1.5, 2.2, 1.4, 2),
+        ]
+        for time, symbol, o, h, l, c in candles:
+            connection.execute(
+                text("INSERT INTO s.daily_crypto_prices VALUES ('2024-10-01', :t, :s, :o, :h, :l, :c)"),
+                {"t": time, "s": symbol, "o": o, "h": h, "l": l, "c": c},
+            )
+    return engine
+
+
+def _kpis(engine, gold_engine, state_dir, candles_df=None):
+    with patch.object(gold, "REDSHIFT_SCHEMA", "s"), \
+            patch.object(gold, "bulk_insert", partial(bulk_insert, schema="s", method="to_sql")), \
+            patch.object(gold, "save_daily_state", partial(save_daily_state, base_dir=state_dir)), \
+            patch.object(gold, "load_daily_state", partial(load_daily_state, base_dir=state_dir)):
+        gold.calculate_crypto_volability_and_performance(engine, "2024-10-01", gold_engine=gold_engine, candles_df=candles_df)
+    with engine.begin() as connection:
+        rows = connection.execute(text("SELECT * FROM s.crypto_volatility_and_performance ORDER BY symbol, time_interval")).mappings().all()
+        connection.execute(text("DELETE FROM s.crypto_volatility_and_performance"))
+    return [dict(row) for row in rows]
+
+
+def test_warehouse_engine_matches_pandas_engine(engine, tmp_path):
+    """
+    Test that the in-warehouse INSERT ... SELECT produces the same KPIs as the pandas path,
+    for the daily row and for the multi-day intervals.
+    """
+    pandas_rows = _kpis(engine, "pandas", str(tmp_path / "pandas"))
+    warehouse_rows = _kpis(engine, "warehouse", str(tmp_path / "warehouse"))
+
+    # daily, monthly, rolling_30d, rolling_7d and weekly for each of the two coins
+    assert len(pandas_rows) == len(warehouse_rows) == 10
+    btc = next(row for row in warehouse_rows if row["symbol"] == "BTC" and row["time_interval"] == "daily")
+    assert (btc["open_price"], btc["close_price"]) == (10, 15)
+    for expected, actual in zip(pandas_rows, warehouse_rows):
+        for column, value in expected.items():
+            if isinstance(value, float):
+                assert math.isclose(value, actual[column], rel_tol=1e-9), column
+            else:
+                assert value == actual[column], column
+
+
+def test_parquet_engine_matches_pandas_engine(engine, tmp_path):
+    """
+    Test that the local Parquet engine, reading the silver dataset instead of the
+    warehouse candles, produces the same KPIs as the pandas path.
+    """
+    silver_dir = str(tmp_path / "silver")
+    with engine.begin() as connection:
+        candles = pd.read_sql_query(text("SELECT * FROM s.daily_crypto_prices"), connection)
+    candles["date"] = pd.to_datetime(candles["date"]).dt.date
+    write_partitions(candles, silver_dir, "symbol")
+
+    def read_silver(start_date=None, end_date=None, symbols=None, columns=None):
+        return read_partitions(silver_dir, "symbol", start_date, end_date, symbols, columns)
+
+    categories = pd.DataFrame({"symbol": ["BTC", "ETH"], "category": ["coin", "coin"]})
+    pandas_rows = _kpis(engine, "pandas", str(tmp_path / "pandas"))
+    with patch.object(gold, "read_silver_prices", read_silver), \
+            patch.object(gold, "read_silver_categories", return_value=categories):
+        parquet_rows = _kpis(engine, "parquet", str(tmp_path / "parquet"))
+
+    assert len(parquet_rows) == len(pandas_rows) == 10
+    for expected, actual in zip(pandas_rows, parquet_rows):
+        for column, value in expected.items():
+            if isinstance(value, float):
+                assert math.isclose(value, actual[column], rel_tol=1e-9), column
+            else:
+                assert value == actual[column], column
+
+
+def test_handed_off_candles_match_warehouse_read(engine, tmp_path):
+    """
+    Test that the KPIs computed from candles handed off by silver (memory-mapped from
+    an Arrow IPC file) equal the ones computed from the candles read from the warehouse.
+    """
+    with engine.begin() as connection:
+        candles = pd.read_sql_query(text("SELECT * FROM s.daily_crypto_prices"), connection)
+    candles["date"] = pd.to_datetime(candles["date"]).dt.date
+    # A stale category in the handoff must not replace the current one of the warehouse
+    candles["category"] = "stale"
+    # Another date in the handoff must not leak into the KPIs of 2024-10-01
+    other_day = candles.assign(date=pd.Timestamp("2024-10-02").date(), close_price=1000.0)
+    entry = write_handoff(pd.concat([candles, other_day], ignore_index=True), "silver_candles", str(tmp_path / "handoff"))
+
+    with patch.object(gold.pd, "read_sql_query", wraps=pd.read_sql_query) as read_sql:
+        pandas_rows = _kpis(engine, "pandas", str(tmp_path / "pandas"))
+        warehouse_reads = read_sql.call_count
+        read_sql.reset_mock()
+        handoff_rows = _kpis(engine, "pandas", str(tmp_path / "handoff_state"), candles_df=read_handoff(entry))
+
+    # The candles query is replaced by the one of the current categories; the window states
+    # are still recovered from the warehouse
+    assert read_sql.call_count == warehouse_reads
+    assert len(handoff_rows) == len(pandas_rows) == 10
+    for expected, actual in zip(pandas_rows, handoff_rows):
+        for column, value in expected.items():
+            if isinstance(value, float):
+                assert math.isclose(value, actual[column], rel_tol=1e-9), column
+            else:
+                assert value == actual[column], column
+
+
+def test_days_without_candles_are_recovered_once(engine, tmp_path):
+    """
+    Test that the window days without candles are persisted as markers, so a second
+    run does not query the warehouse for them again and yields the same KPIs.
+    """
+    state_dir = str(tmp_path / "state")
+    with patch.object(gold.pd, "read_sql_query", wraps=pd.read_sql_query) as read_sql:
+        first_rows = _kpis(engine, "pandas", state_dir)
+        first_reads = read_sql.call_count
+        read_sql.reset_mock()
+        second_rows = _kpis(engine, "pandas", state_dir)
+
+    # The second run only reads the candles of the day: the whole window is already in the state
+    assert read_sql.call_count == first_reads - 1
+    assert first_rows == second_rows
+    assert set(load_daily_state("2024-09-01", "2024-10-01", base_dir=state_dir)["symbol"]) == {"BTC", "ETH"}
+
+
+def test_unknown_gold_engine_is_rejected(engine):
+    with pytest.raises(ValueError):
+        gold.calculate_crypto_volability_and_performance(engine, "2024-10-01", gold_engine="spark")
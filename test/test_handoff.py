@@ -0,0 +1,137 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import date
+from unittest.mock import MagicMock
+import pandas as pd
+from staging.handoff import (
+    HandoffWriter,
+    prune_handoffs,
+    pull_manifest,
+    read_handoff,
+    read_handoffs,
+    write_handoff,
+)
+
+
+def _prices(coin: str, close: float) -> pd.DataFrame:
+    return pd.DataFrame({
+        "date": [date(2024, 10, 1), date(2024, 10, 2)],
+        "time": ["00:00:00", "04:00:00"],
+        "stock_symbol": coin,
+        "open_price": [close - 1, close],
+        "high_price": [close + 1, close + 2],
+        "low_price": [close - 2, close - 1],
+        "close_price": [close, close + 1],
+    })
+
+
+class TestHandoff(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = self.tmp_dir.name
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_streamed_frames_round_trip(self) -> None:
+        """
+        Test that frames appended one coin at a time are read back as one frame,
+        with the dates and prices unchanged.
+        """
+        writer = HandoffWriter("staging_prices", self.base_dir)
+        writer.write(_prices("bitcoin", 100.0))
+        writer.write(pd.DataFrame())
+        writer.write(_prices("ethereum", 10.0))
+        entry = writer.close()
+
+        self.assertEqual(entry["rows"], 4)
+        self.assertEqual(entry["bytes"], os.path.getsize(entry["path"]))
+        expected = pd.concat([_prices("bitcoin", 100.0), _prices("ethereum", 10.0)], ignore_index=True)
+        pd.testing.assert_frame_equal(read_handoff(entry), expected)
+
+    def test_categorical_frames_with_different_categories(self) -> None:
+        """
+        Test that coins written one at a time with categorical symbols (one dictionary per
+        frame) are read back with every symbol.
+        """
+        writer = HandoffWriter("staging_prices", self.base_dir)
+        for coin, close in [("bitcoin", 100.0), ("ethereum", 10.0), ("bitcoin", 101.0)]:
+            writer.write(_prices(coin, close).astype({"stock_symbol": "category"}))
+        df = read_handoff(writer.close())
+
+        self.assertEqual(
+            df["stock_symbol"].astype(str).tolist(),
+            ["bitcoin"] * 2 + ["ethereum"] * 2 + ["bitcoin"] * 2,
+        )
+        self.assertEqual(df["close_price"].tolist(), [100.0, 101.0, 10.0, 11.0, 101.0, 102.0])
+
+    def test_handoff_files_are_content_addressed(self) -> None:
+        """
+        Test that identical outputs share one file and different outputs do not.
+        """
+        first = write_handoff(_prices("bitcoin", 100.0), "staging_prices", self.base_dir)
+        again = write_handoff(_prices("bitcoin", 100.0), "staging_prices", self.base_dir)
+        other = write_handoff(_prices("bitcoin", 101.0), "staging_prices", self.base_dir)
+
+        self.assertEqual(first, again)
+        self.assertEqual(os.path.basename(first["path"]), f"staging_prices-{first['sha256'][:16]}.arrow")
+        self.assertNotEqual(other["path"], first["path"])
+        self.assertEqual(
+            sorted(os.listdir(self.base_dir)),
+            sorted([os.path.basename(first["path"]), os.path.basename(other["path"])]),
+        )
+        self.assertIsNone(write_handoff(pd.DataFrame(), "staging_prices", self.base_dir))
+
+    def test_unavailable_handoff_falls_back(self) -> None:
+        """
+        Test that a missing or rewritten handoff file is reported as unavailable, so the
+        reader falls back to the regular read instead of using the wrong data.
+        """
+        entry = write_handoff(_prices("bitcoin", 100.0), "staging_prices", self.base_dir)
+        self.assertIsNone(read_handoff(None))
+        self.assertIsNone(read_handoff({**entry, "bytes": entry["bytes"] + 1}))
+        os.remove(entry["path"])
+        self.assertIsNone(read_handoff(entry))
+
+    def test_pull_manifest_from_xcom_or_context(self) -> None:
+        ti = MagicMock()
+        ti.xcom_pull.return_value = {"candles": None}
+        self.assertEqual(pull_manifest({"ti": ti}, "silver_run"), {"candles": None})
+        ti.xcom_pull.assert_called_once_with(task_ids="silver_run")
+
+        manifests = {"manifests": {"staging_run": {"dates": ["2024-10-01"]}}}
+        self.assertEqual(pull_manifest(manifests, "staging_run"), {"dates": ["2024-10-01"]})
+        self.assertEqual(pull_manifest({}, "staging_run"), {})
+
+    def test_shard_handoffs_are_read_together(self) -> None:
+        """
+        Test that the handoffs of the staging shards are read as one frame, and that a
+        single missing shard makes the reader fall back for all of them.
+        """
+        entries = [
+            write_handoff(_prices("bitcoin", 100.0), "staging_prices", self.base_dir),
+            write_handoff(_prices("ethereum", 10.0), "staging_prices", self.base_dir),
+        ]
+        expected = pd.concat([_prices("bitcoin", 100.0), _prices("ethereum", 10.0)], ignore_index=True)
+        pd.testing.assert_frame_equal(read_handoffs(entries), expected)
+
+        self.assertIsNone(read_handoffs([]))
+        self.assertIsNone(read_handoffs(None))
+        os.remove(entries[1]["path"])
+        self.assertIsNone(read_handoffs(entries))
+
+    def test_prune_removes_expired_files(self) -> None:
+        entry = write_handoff(_prices("bitcoin", 100.0), "staging_prices", self.base_dir)
+        expired = time.time() - 3 * 3600
+        os.utime(entry["path"], (expired, expired))
+
+        self.assertEqual(prune_handoffs(self.base_dir, ttl_hours=4), 0)
+        self.assertEqual(prune_handoffs(self.base_dir, ttl_hours=2), 1)
+        self.assertFalse(os.path.exists(entry["path"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import requests
+from staging.http_client import request_json, get_session, _backoff_seconds, REQUEST_METRICS
+
+
+def make_response(status_code: int, body=None, headers=None) -> MagicMock:
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = body
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(f"{status_code} Error")
+    return response
+
+
+class TestHttpClient(unittest.TestCase):
+
+    def setUp(self) -> None:
+        REQUEST_METRICS.reset()
+        # Aislar los tests del rate limiter compartido del proceso
+        limiter_patch = patch('staging.http_client.get_rate_limiter')
+        limiter_patch.start()
+        self.addCleanup(limiter_patch.stop)
+
+    def test_session_is_shared(self) -> None:
+        self.assertIs(get_session(), get_session())
+
+    @patch('staging.http_client.time.sleep')
+    @patch('staging.http_client.requests.Session.get')
+    def test_retries_throttled_request_honoring_retry_after(self, mock_get: MagicMock, mock_sleep: MagicMock) -> None:
+        mock_get.side_effect = [
+            make_response(429, headers={"Retry-After": "2"}),
+            make_response(200, body={"ok": True}),
+        ]
+
+        result = request_json("coinmarketcap", "http://stub/v1/cryptocurrency/info")
+
+        self.assertEqual(result, {"ok": True})
+        self.assertEqual(mock_get.call_count, 2)
+        mock_sleep.assert_called_once_with(2.0)
+        metrics = REQUEST_METRICS.summary()["coinmarketcap"]
+        self.assertEqual(metrics["requests"], 2)
+        self.assertEqual(metrics["retries"], 1)
+
+    @patch('staging.http_client.time.sleep')
+    @patch('staging.http_client.requests.Session.get')
+    def test_retries_are_bounded(self, mock_get: MagicMock, mock_sleep: MagicMock) -> None:
+        mock_get.return_value = make_response(503)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            request_json("coingecko", "http://stub/coins/bitcoin/ohlc", max_retries=3)
+
+        self.assertEqual(mock_get.call_count, 4)
+        self.assertEqual(mock_sleep.call_count, 3)
+
+    def test_backoff_is_capped(self) -> None:
+        for attempt in range(10):
+            self.assertLessEqual(_backoff_seconds(attempt, base=1, cap=5), 5)
+        self.assertEqual(_backoff_seconds(0, base=1, cap=5, retry_after=120), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
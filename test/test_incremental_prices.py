@@ -0,0 +1,36 @@
+from unittest.mock import patch, MagicMock
+from datetime import date
+import pandas as pd
+from sqlalchemy.engine import Engine
+from Silver.table_insert_sql import insert_daily_crypto_prices
+
+
+def test_prices_are_deduplicated_by_key_within_the_loaded_window():
+    """
+    Test that the prices load stages the frame deduplicated on (date, time, symbol)
+    and anti-joins only against the loaded date window.
+    """
+    prices = pd.DataFrame({
+        "date": ["2024-10-01", "2024-10-01", "2024-10-02"],
+        "time": ["00:00:00", "00:00:00", "00:00:00"],
+        "symbol": ["BTC", "BTC", "BTC"],
+        "open_price": [1.0, 2.0, 3.0],
+        "high_price": [1.0, 2.0, 3.0],
+        "low_price": [1.0, 2.0, 3.0],
+        "close_price": [1.0, 2.0, 3.0],
+    })
+    engine = MagicMock(spec=Engine)
+    connection = engine.begin.return_value.__enter__.return_value
+    connection.execute.return_value.rowcount = 2
+
+    with patch("Silver.table_insert_sql.bulk_insert") as mock_bulk_insert:
+        insert_daily_crypto_prices(engine, prices)
+
+    staged = mock_bulk_insert.call_args[0][1]
+    assert len(staged) == 2
+    assert staged["open_price"].tolist() == [2.0, 3.0]
+
+    statements = [str(call.args[0]) for call in connection.execute.call_args_list]
+    assert not any("SELECT DISTINCT date" in statement for statement in statements)
+    insert_params = connection.execute.call_args_list[1].args[1]
+    assert insert_params == {"start_date": date(2024, 10, 1), "end_date": date(2024, 10, 2)}
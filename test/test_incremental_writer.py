@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from Silver.incremental_writer import append_prices, compact_prices, load_manifest
+from staging.candle_schema import candle_frame, fragment_schema
+from staging.partitioned_dataset import read_partitions
+
+
+class TestIncrementalSilverWriter(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.base_dir = os.path.join(self.tmp_dir.name, "daily_crypto_prices")
+
+    def prices(self, symbol: str, times: list, day: date = date(2024, 10, 1)) -> pd.DataFrame:
+        prices = [float(i) for i in range(len(times))]
+        return candle_frame(pd.DataFrame({
+            'date': [day] * len(times),
+            'time': times,
+            'symbol': [symbol] * len(times),
+            **{column: prices for column in ['open_price', 'high_price', 'low_price', 'close_price']},
+        }))
+
+    def partition_dir(self, symbol: str = 'BTC') -> str:
+        return os.path.join(self.base_dir, 'date=2024-10-01', f'symbol={symbol}')
+
+    def test_append_skips_loaded_candles(self) -> None:
+        first = append_prices(self.prices('BTC', ['00:00:00', '00:30:00']), self.base_dir)
+        self.assertEqual(len(first), 2)
+
+        # Un día parcial se completa: las velas de BTC ya cargadas se omiten, la nueva y ETH se agregan
+        day = pd.concat([self.prices('BTC', ['00:00:00', '00:30:00', '01:00:00']), self.prices('ETH', ['00:00:00'])])
+        second = append_prices(day, self.base_dir)
+
+        self.assertEqual(second['symbol'].astype(str).tolist(), ['BTC', 'ETH'])
+        self.assertEqual(second['timestamp'].dt.strftime('%H:%M').tolist(), ['01:00', '00:00'])
+        self.assertEqual(load_manifest(self.base_dir), {('2024-10-01', 'BTC'), ('2024-10-01', 'ETH')})
+        self.assertEqual(len(read_partitions(self.base_dir, 'symbol')), 4)
+        self.assertTrue(append_prices(day, self.base_dir).empty)
+
+        # Solo quedan archivos definitivos, sin temporales visibles; la vela nueva es un fragmento más
+        files = os.listdir(self.partition_dir())
+        self.assertEqual(len(files), 2)
+        self.assertTrue(all(name.startswith('part-') and name.endswith('.parquet') for name in files))
+
+    def test_manifest_is_rebuilt_from_layout(self) -> None:
+        append_prices(self.prices('BTC', ['00:00:00']), self.base_dir)
+        os.remove(os.path.join(self.base_dir, '_manifest.json'))
+
+        self.assertEqual(load_manifest(self.base_dir), {('2024-10-01', 'BTC')})
+
+    def test_compaction_merges_fragments(self) -> None:
+        append_prices(self.prices('BTC', ['00:00:00']), self.base_dir)
+        # Una carga posterior del mismo día trae una vela tardía, que queda en un fragmento nuevo
+        append_prices(self.prices('BTC', ['00:00:00', '00:30:00']), self.base_dir)
+        self.assertEqual(len(os.listdir(self.partition_dir())), 2)
+
+        self.assertEqual(compact_prices(self.base_dir, min_fragments=2), 1)
+        files = os.listdir(self.partition_dir())
+        self.assertEqual(len(files), 1)
+        result = read_partitions(self.base_dir, 'symbol')
+        self.assertEqual(result['timestamp'].dt.strftime('%H:%M').tolist(), ['00:00', '00:30'])
+        # La compactación conserva el esquema de velas en lugar de los tipos que infiere pandas
+        self.assertEqual(pq.ParquetFile(os.path.join(self.partition_dir(), files[0])).schema_arrow, fragment_schema())
+
+    def test_fragments_store_the_candle_schema(self) -> None:
+        append_prices(self.prices('BTC', ['00:00:00', '00:30:00']), self.base_dir)
+
+        fragment = pq.ParquetFile(os.path.join(self.partition_dir(), os.listdir(self.partition_dir())[0]))
+        self.assertEqual(fragment.schema_arrow, fragment_schema())
+        self.assertEqual(fragment.schema_arrow.field('timestamp').type, pa.timestamp('ms', tz='UTC'))
+
+    def test_candles_are_deduplicated_across_layouts(self) -> None:
+        # Un fragmento anterior al esquema de velas ('time') y una carga nueva con 'timestamp'
+        os.makedirs(self.partition_dir())
+        pd.DataFrame({'time': ['00:00:00'], 'close_price': [0.0]}).to_parquet(
+            os.path.join(self.partition_dir(), 'part-legacy.parquet'), index=False
+        )
+
+        appended = append_prices(self.prices('BTC', ['00:00:00', '00:30:00']), self.base_dir)
+        self.assertEqual(appended['timestamp'].dt.strftime('%H:%M').tolist(), ['00:30'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+from gold.interval_kpis import (
+    daily_state_from_candles, interval_kpis, kpis_from_state, load_daily_state, save_daily_state, window_start,
+)
+
+
+def _candles() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    days = pd.date_range("2024-09-25", "2024-10-02", freq="D").date
+    rows = []
+    for day in days:
+        for hour in (0, 4, 8, 12, 16, 20):
+            close = float(rng.uniform(90, 110))
+            rows.append({
+                "date": day, "time": f"{hour:02d}:00:00", "symbol": "BTC", "category": "coin",
+                "open_price": close - 1, "high_price": close + 2, "low_price": close - 3, "close_price": close,
+            })
+    # Out of time order, as an unordered query result would be
+    return pd.DataFrame(rows).sample(frac=1, random_state=1).reset_index(drop=True)
+
+
+def test_window_start():
+    day = date(2024, 10, 2)  # Wednesday
+    assert window_start("weekly", day) == date(2024, 9, 30)
+    assert window_start("monthly", day) == date(2024, 10, 1)
+    assert window_start("rolling_7d", day) == date(2024, 9, 26)
+    assert window_start("rolling_30d", day) == date(2024, 9, 3)
+
+
+def test_intervals_from_state_match_raw_candles(tmp_path):
+    """
+    Test that KPIs merged from persisted daily states equal the ones computed
+    directly from all the candles of the window.
+    """
+    candles = _candles()
+    save_daily_state(daily_state_from_candles(candles), base_dir=str(tmp_path))
+    state = load_daily_state("2024-09-01", "2024-10-02", base_dir=str(tmp_path))
+
+    kpis = interval_kpis(state, "2024-10-02").set_index("time_interval")
+    assert set(kpis.index) == {"weekly", "monthly", "rolling_7d", "rolling_30d"}
+
+    rolling = candles[candles["date"] >= date(2024, 9, 26)].sort_values(["date", "time"])
+    row = kpis.loc["rolling_7d"]
+    assert np.isclose(row["average_price"], rolling["close_price"].mean())
+    assert np.isclose(row["standard_desviation"], rolling["close_price"].std())
+    assert row["open_price"] == rolling["open_price"].iloc[0]
+    assert row["close_price"] == rolling["close_price"].iloc[-1]
+    assert row["low_price"] == rolling["low_price"].min()
+
+    daily = kpis_from_state(state, "2024-10-02", "daily").iloc[0]
+    day_candles = candles[candles["date"] == date(2024, 10, 2)]
+    assert np.isclose(daily["standard_desviation"], day_candles["close_price"].std())
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from gold.kpi_kernel import candle_state, group_first_last
+
+
+def test_group_first_last_breaks_ties_by_position():
+    """
+    Test that the earliest and latest rows are found per group without sorting, with
+    ties resolved to the first (earliest) and last (latest) row position.
+    """
+    codes = np.array([0, 1, 0, 1, 0, 1])
+    order = np.array([5.0, 3.0, 1.0, 3.0, 9.0, 2.0])
+    first, last = group_first_last(codes, 2, order)
+    assert first.tolist() == [2, 5]
+    assert last.tolist() == [4, 3]
+
+
+def test_candle_state_is_independent_of_row_order():
+    """
+    Test that the kernel matches a sort-then-aggregate reference for any row order.
+    """
+    rng = np.random.default_rng(3)
+    n = 500
+    candles = pd.DataFrame({
+        "date": rng.choice(pd.date_range("2024-10-01", periods=3).date, n),
+        "symbol": rng.choice(["BTC", "ETH", "ADA"], n),
+        "time": [f"{h:02d}:{m:02d}:00" for h, m in zip(rng.integers(0, 24, n), rng.integers(0, 60, n))],
+        "category": "coin",
+        "open_price": rng.uniform(1, 2, n),
+        "high_price": rng.uniform(2, 3, n),
+        "low_price": rng.uniform(0, 1, n),
+        "close_price": rng.uniform(1, 2, n),
+    }).drop_duplicates(subset=["date", "symbol", "time"])
+    candles.loc[candles.index[0], "low_price"] = np.nan
+
+    reference = candles.sort_values(["date", "symbol", "time"]).groupby(["date", "symbol"]).agg(
+        open_price=("open_price", "first"),
+        close_price=("close_price", "last"),
+        low_price=("low_price", "min"),
+        high_price=("high_price", "max"),
+        mean_close=("close_price", "mean"),
+        std_close=("close_price", "std"),
+    ).reset_index()
+
+    for seed in (0, 1):
+        state = candle_state(candles.sample(frac=1, random_state=seed), ["date", "symbol"])
+        std = np.sqrt(state["m2_close"] / (state["count"] - 1))
+        for column in ["open_price", "close_price", "low_price", "high_price", "mean_close"]:
+            assert np.allclose(state[column], reference[column]), column
+        assert np.allclose(std, reference["std_close"])
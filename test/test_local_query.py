@@ -0,0 +1,52 @@
+import logging
+import pandas as pd
+from Silver.incremental_writer import append_prices
+from Silver.local_query import query
+from staging.candle_schema import candle_frame
+
+
+def test_query_joins_partitioned_prices_with_flat_tables(tmp_path, caplog, capsys):
+    """
+    Test that the partitioned silver prices and the flat silver tables can be queried
+    and joined with SQL, with the partition keys exposed as columns.
+    """
+    prices_dir = str(tmp_path / "daily_crypto_prices")
+    prices = pd.DataFrame({
+        "date": pd.to_datetime(["2024-10-01", "2024-10-01", "2024-10-02"]).date,
+        "time": ["00:00:00", "04:00:00", "00:00:00"],
+        "symbol": ["BTC", "BTC", "ETH"],
+        "open_price": [1.0, 2.0, 3.0],
+        "high_price": [1.5, 2.5, 3.5],
+        "low_price": [0.5, 1.5, 2.5],
+        "close_price": [1.2, 2.2, 3.2],
+    })
+    append_prices(candle_frame(prices), prices_dir)
+
+    profiles_path = str(tmp_path / "crypto_table_silver.parquet")
+    pd.DataFrame({"symbol": ["BTC", "ETH"], "category": ["coin", "token"]}).to_parquet(profiles_path, index=False)
+
+    tables = {
+        "daily_crypto_prices": prices_dir,
+        "crypto_description": profiles_path,
+        "dim_date": str(tmp_path / "missing.parquet"),
+    }
+    result = query(
+        """
+        SELECT p.symbol, c.category, COUNT(*) AS candles, MAX(p.high_price) AS high
+        FROM daily_crypto_prices p JOIN crypto_description c USING (symbol)
+        WHERE p.date >= ?
+        GROUP BY p.symbol, c.category
+        ORDER BY p.symbol
+        """,
+        ["2024-10-01"],
+        tables=tables,
+    )
+
+    assert result.to_dict("records") == [
+        {"symbol": "BTC", "category": "coin", "candles": 2, "high": 2.5},
+        {"symbol": "ETH", "category": "token", "candles": 1, "high": 3.5},
+    ]
+    # The missing table is reported on the logger, not on stdout
+    assert "dim_date" in caplog.text
+    assert all(record.levelno == logging.WARNING for record in caplog.records)
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from Silver import parquet_Silver
+from variables.coin_registry import get_coin_registry
+
+
+class TestLoadParquetFiles(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        base = self.tmp_dir.name
+        paths = {
+            "SILVER_PRICES_DIR": os.path.join(base, "daily_crypto_prices"),
+            "CRYPTO_SILVER_PATH": os.path.join(base, "crypto_table_silver.parquet"),
+            "DATE_SILVER_PATH": os.path.join(base, "date_table_silver.parquet"),
+            "LEGACY_SILVER_PRICES_PATH": os.path.join(base, "daily_crypto_prices_silver.parquet"),
+        }
+        for patcher in [patch.object(parquet_Silver, name, path) for name, path in paths.items()] + [patch("builtins.print")]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        coin = get_coin_registry().coins[0]
+        self.symbol = coin.symbol
+        timestamps = pd.date_range("2024-10-01 00:00", "2024-10-03 23:00", freq="4h", tz="UTC")
+        self.staging_prices = pd.DataFrame({
+            "date": timestamps.date,
+            "timestamp": timestamps,
+            "stock_symbol": coin.slug,
+            **{column: 1.0 for column in ["open_price", "high_price", "low_price", "close_price"]},
+        })
+        self.staging_crypto = pd.DataFrame([{
+            "id": int(coin.cmc_id), "symbol": coin.symbol, "name": coin.name, "category": "coin",
+            "description": "d", "logo": "l", "website": "w", "reddit": "r",
+        }])
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def load(self, dates):
+        return parquet_Silver.load_parquet_files(dates, self.staging_prices, self.staging_crypto)
+
+    def test_run_dates_are_loaded_in_one_pass(self) -> None:
+        dates = ["2024-10-01", "2024-10-02", "2024-10-03", "2024-10-04"]
+        prices, crypto, dim_date = self.load(dates)
+
+        self.assertEqual(sorted(prices["date"].astype(str).unique()), dates[:3])
+        self.assertEqual(prices["symbol"].astype(str).unique().tolist(), [self.symbol])
+        self.assertEqual(crypto["bk_crypto"].tolist(), self.staging_crypto["id"].tolist())
+        # El calendario cubre todo el rango de la corrida, una fila por día
+        self.assertEqual(dim_date["date"].dt.strftime("%Y-%m-%d").tolist(), dates)
+        self.assertEqual(len(parquet_Silver.read_silver_prices("2024-10-01", "2024-10-03")), len(self.staging_prices))
+
+    def test_date_independent_tables_are_read_once_per_run(self) -> None:
+        self.load(["2024-10-01"])
+
+        with patch.object(parquet_Silver.pd, "read_parquet", wraps=pd.read_parquet) as read_parquet, \
+                patch.object(parquet_Silver, "build_dim_date", wraps=parquet_Silver.build_dim_date) as build_dim_date:
+            _, _, dim_date = self.load(["2024-10-01", "2024-10-02", "2024-10-03"])
+
+        # Una lectura de la tabla de perfiles y otra del calendario, no una por fecha
+        self.assertEqual(read_parquet.call_count, 2)
+        build_dim_date.assert_called_once()
+        self.assertEqual(len(pd.read_parquet(parquet_Silver.DATE_SILVER_PATH)), 3)
+        self.assertEqual(len(dim_date), 3)
+
+    def test_run_without_staging_prices_fails(self) -> None:
+        with self.assertRaises(FileNotFoundError):
+            self.load(["2024-09-01"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+import pandas as pd
+from staging.partitioned_dataset import (
+    has_prices_partition,
+    read_partitions,
+    write_partitions,
+)
+
+
+class TestPartitionedDataset(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.base_dir = os.path.join(self.tmp_dir.name, "daily_crypto_prices")
+
+    def prices(self, day: date, symbol: str, close: float) -> pd.DataFrame:
+        return pd.DataFrame({
+            'date': [day, day],
+            'time': ['00:00:00', '00:30:00'],
+            'symbol': [symbol, symbol],
+            'close_price': [close, close + 1],
+        })
+
+    def test_layout_and_pruned_reads(self) -> None:
+        write_partitions(self.prices(date(2024, 10, 1), 'BTC', 1.0), self.base_dir, 'symbol')
+        write_partitions(self.prices(date(2024, 10, 1), 'ETH', 5.0), self.base_dir, 'symbol')
+        write_partitions(self.prices(date(2024, 10, 2), 'BTC', 2.0), self.base_dir, 'symbol')
+
+        self.assertTrue(os.path.isdir(os.path.join(self.base_dir, 'date=2024-10-01', 'symbol=ETH')))
+        self.assertTrue(has_prices_partition(self.base_dir, '2024-10-02'))
+        self.assertFalse(has_prices_partition(self.base_dir, '2024-10-03'))
+
+        result = read_partitions(self.base_dir, 'symbol', start_date='2024-10-01', end_date='2024-10-01',
+                                 keys=['BTC'])
+        self.assertEqual(result['close_price'].tolist(), [1.0, 2.0])
+        self.assertEqual(set(result['date']), {date(2024, 10, 1)})
+
+        self.assertEqual(len(read_partitions(self.base_dir, 'symbol')), 6)
+
+    def test_rewriting_a_partition_replaces_it(self) -> None:
+        write_partitions(self.prices(date(2024, 10, 1), 'BTC', 1.0), self.base_dir, 'symbol')
+        write_partitions(self.prices(date(2024, 10, 1), 'BTC', 3.0), self.base_dir, 'symbol')
+
+        result = read_partitions(self.base_dir, 'symbol')
+        self.assertEqual(result['close_price'].tolist(), [3.0, 4.0])
+
+    def test_missing_dataset_reads_empty(self) -> None:
+        self.assertTrue(read_partitions(self.base_dir, 'symbol').empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import math
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from staging.checkpoint import StagingCheckpoint
+from staging.price_staging import (
+    StagingIncompleteError,
+    check_completeness,
+    finalize_shards,
+    merge_records,
+    retry_delay,
+    stage_prices,
+    staging_shards,
+)
+from variables.coin_registry import get_coin_registry
+from variables.config import STAGING_MIN_COMPLETENESS
+
+DATES = ["2024-10-01"]
+
+
+def _fake_stage_coin(coin, data, dates, checkpoint):
+    """Record the coin in the checkpoint without writing its staging partitions."""
+    if data is None or data.empty:
+        return None
+    return checkpoint.mark_done(coin, {dates[0]: len(data)}, None)
+
+
+class TestPriceStaging(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint_dir = self.tmp_dir.name
+        self.candles = pd.DataFrame({"close_price": [1.0, 2.0]})
+        for patcher in (patch("staging.price_staging.stage_coin", _fake_stage_coin), patch("builtins.print")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        sleep_patcher = patch("staging.price_staging.time.sleep")
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_failed_coin_is_retried_alone_with_backoff(self) -> None:
+        calls = []
+
+        def fetch_prices(coin):
+            calls.append(coin)
+            # ethereum falla en los dos primeros intentos
+            if coin == "ethereum" and calls.count("ethereum") < 3:
+                raise ConnectionError("timeout")
+            return self.candles
+
+        records = stage_prices(["bitcoin", "ethereum"], DATES, fetch_prices, retries=3, checkpoint_dir=self.checkpoint_dir)
+
+        self.assertEqual(set(records), {"bitcoin", "ethereum"})
+        self.assertEqual(sorted(calls), ["bitcoin", "ethereum", "ethereum", "ethereum"])
+        self.assertEqual([call.args[0] for call in self.sleep.call_args_list], [retry_delay(1), retry_delay(2)])
+
+    def test_coin_without_prices_stops_after_the_retry_rounds(self) -> None:
+        calls = []
+
+        def fetch_prices(coin):
+            calls.append(coin)
+            return self.candles if coin == "bitcoin" else pd.DataFrame()
+
+        records = stage_prices(["bitcoin", "ethereum"], DATES, fetch_prices, retries=2, checkpoint_dir=self.checkpoint_dir)
+
+        self.assertEqual(list(records), ["bitcoin"])
+        self.assertEqual(calls.count("ethereum"), 3)
+        self.assertEqual(calls.count("bitcoin"), 1)
+
+    def test_checkpointed_coin_is_not_extracted_again(self) -> None:
+        StagingCheckpoint(DATES, self.checkpoint_dir).mark_done("bitcoin", {DATES[0]: 6}, None)
+        calls = []
+
+        def fetch_prices(coin):
+            calls.append(coin)
+            return self.candles
+
+        records = stage_prices(["bitcoin", "ethereum"], DATES, fetch_prices, checkpoint_dir=self.checkpoint_dir)
+
+        self.assertEqual(calls, ["ethereum"])
+        self.assertEqual(merge_records(DATES, records.values())[0], {DATES[0]: 8})
+        self.sleep.assert_not_called()
+
+    def test_retry_delay_is_exponential_and_capped(self) -> None:
+        self.assertEqual([retry_delay(attempt, 5, 60) for attempt in range(1, 6)], [5, 10, 20, 40, 60])
+
+    def test_completeness_gate(self) -> None:
+        coins = [f"coin-{i}" for i in range(10)]
+        record = {"rows_by_date": {DATES[0]: 1}, "handoff": None}
+        # Una moneda menos que el mínimo exigido
+        below = math.ceil(STAGING_MIN_COMPLETENESS * len(coins)) - 1
+
+        with self.assertRaises(StagingIncompleteError):
+            check_completeness(coins, {coin: record for coin in coins[:below]})
+        with self.assertRaises(StagingIncompleteError):
+            check_completeness(coins, {})
+        self.assertEqual(check_completeness(coins, {coin: record for coin in coins}), 1.0)
+
+
+class TestStagingShards(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint_dir = self.tmp_dir.name
+        patcher = patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_every_coin_is_in_exactly_one_shard(self) -> None:
+        coins = get_coin_registry().slugs
+        for shard_size in (1, 2, 3, len(coins) + 1):
+            shards = staging_shards(shard_size)
+
+            self.assertEqual(len(shards), math.ceil(len(coins) / shard_size))
+            self.assertTrue(all(0 < len(shard["coins"]) <= shard_size for shard in shards))
+            self.assertEqual([coin for shard in shards for coin in shard["coins"]], coins)
+
+    def test_fan_in_combines_partially_failed_shards(self) -> None:
+        coins = [f"coin-{i}" for i in range(10)]
+        dates = ["2024-10-01", "2024-10-02"]
+        checkpoint = StagingCheckpoint(dates, self.checkpoint_dir)
+        # El último shard falló tras sus reintentos: solo sus monedas faltan en el checkpoint
+        for coin in coins[:9]:
+            checkpoint.mark_done(coin, {"2024-10-01": 6, "2024-10-02": 4}, {"path": f"{coin}.arrow"})
+
+        rows_by_date, price_entries = finalize_shards(coins, dates, self.checkpoint_dir, min_ratio=0.8)
+
+        self.assertEqual(rows_by_date, {"2024-10-01": 54, "2024-10-02": 36})
+        self.assertEqual(len(price_entries), 9)
+        with self.assertRaises(StagingIncompleteError):
+            finalize_shards(coins, dates, self.checkpoint_dir, min_ratio=0.95)
+
+
+if __name__ == '__main__':
+    unittest.main()
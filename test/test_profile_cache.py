@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from staging.profile_cache import (
+    load_profile_cache,
+    save_profile_cache,
+    stale_profile_ids,
+    update_profile_cache,
+    cached_profiles_frame,
+    select_changed_profiles,
+    mark_profiles_loaded,
+)
+
+
+class TestProfileCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "profile_cache.json")
+        self.now = datetime(2024, 10, 1, tzinfo=timezone.utc)
+        self.profiles = pd.DataFrame([
+            {'symbol': 'BTC', 'id': 1, 'name': 'Bitcoin', 'category': 'coin', 'description': 'd',
+             'logo': 'l', 'website': 'w', 'reddit': 'r'},
+            {'symbol': 'ETH', 'id': 1027, 'name': 'Ethereum', 'category': 'coin', 'description': 'd',
+             'logo': 'l', 'website': 'w', 'reddit': 'r'},
+        ])
+
+    def test_only_missing_or_expired_ids_are_stale(self) -> None:
+        cache = update_profile_cache({}, self.profiles.iloc[[0]], now=self.now)
+
+        self.assertEqual(stale_profile_ids(cache, ['1', '1027'], ttl_hours=24, now=self.now), ['1027'])
+        later = self.now + timedelta(hours=25)
+        self.assertEqual(stale_profile_ids(cache, ['1', '1027'], ttl_hours=24, now=later), ['1', '1027'])
+
+    def test_cache_round_trip_builds_staging_table(self) -> None:
+        save_profile_cache(update_profile_cache({}, self.profiles, now=self.now), self.path)
+
+        frame = cached_profiles_frame(load_profile_cache(self.path), ['1027', '1', '74'])
+
+        self.assertEqual(frame['symbol'].tolist(), ['ETH', 'BTC'])
+        self.assertEqual(frame['content_hash'].str.len().tolist(), [64, 64])
+
+    def test_unchanged_profiles_are_skipped_after_load(self) -> None:
+        save_profile_cache(update_profile_cache({}, self.profiles, now=self.now), self.path)
+        silver_df = cached_profiles_frame(load_profile_cache(self.path), ['1', '1027']).rename(columns={'id': 'bk_crypto'})
+
+        self.assertEqual(len(select_changed_profiles(silver_df, self.path)), 2)
+        mark_profiles_loaded(silver_df, self.path)
+        self.assertTrue(select_changed_profiles(silver_df, self.path).empty)
+
+        # Un cambio en la descripción vuelve a habilitar el SCD2 solo para esa moneda
+        changed = self.profiles.copy()
+        changed.loc[1, 'description'] = 'nueva descripción'
+        cache = update_profile_cache(load_profile_cache(self.path), changed, now=self.now)
+        save_profile_cache(cache, self.path)
+        silver_df = cached_profiles_frame(cache, ['1', '1027']).rename(columns={'id': 'bk_crypto'})
+        self.assertEqual(select_changed_profiles(silver_df, self.path)['symbol'].tolist(), ['ETH'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from sqlalchemy.engine import Engine
+from Silver.table_insert_sql import insert_crypto_description_scd2
+
+
+def _profiles(count: int) -> pd.DataFrame:
+    return pd.DataFrame([
+        {
+            "name": f"Coin {i}", "symbol": f"C{i}", "category": "coin", "description": "d",
+            "bk_crypto": i, "logo": "l", "website": "w", "reddit": "r", "content_hash": f"hash{i}",
+        }
+        for i in range(count)
+    ])
+
+
+def test_scd2_statement_count_does_not_depend_on_rows():
+    """
+    Test that the SCD2 merge runs a fixed number of statements in one transaction
+    and stages every profile with its change hash in a single bulk insert.
+    """
+    for count in (1, 50):
+        engine = MagicMock(spec=Engine)
+        connection = engine.begin.return_value.__enter__.return_value
+        connection.execute.return_value.rowcount = 0
+
+        with patch("Silver.bulk_loader.execute_values") as mock_execute_values:
+            insert_crypto_description_scd2(engine, _profiles(count))
+
+        engine.begin.assert_called_once()
+        # CREATE TEMP, UPDATE, INSERT ... SELECT, DROP
+        assert connection.execute.call_count == 4
+        mock_execute_values.assert_called_once()
+        rows = mock_execute_values.call_args[0][2]
+        assert len(rows) == count
+        assert rows[0][-1] == "hash0"
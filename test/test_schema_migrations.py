@@ -0,0 +1,51 @@
+from unittest.mock import patch, MagicMock
+from sqlalchemy.engine import Connection
+from Silver import create_tables_redshift
+from Silver.create_tables_redshift import apply_migrations, create_tables, MIGRATIONS
+
+
+def _connection(catalog_rows):
+    """Mock connection whose catalog query returns `catalog_rows`."""
+    connection = MagicMock(spec=Connection)
+    connection.in_transaction.return_value = True
+    connection.execute.return_value.fetchall.return_value = catalog_rows
+    return connection
+
+
+def _executed_sql(connection):
+    return [str(call.args[0]) for call in connection.execute.call_args_list]
+
+
+def test_legacy_schema_only_runs_missing_ddl():
+    """
+    Test that a schema created before migrations were tracked gets only the missing
+    change_hash column, while every migration is recorded as applied.
+    """
+    legacy_columns = ["id_crypto", "name", "symbol", "bk_crypto"]
+    rows = [("crypto_description", column) for column in legacy_columns] + [
+        ("dim_date", "date"), ("daily_crypto_prices", "date"), ("crypto_volatility_and_performance", "date"),
+    ]
+    connection = _connection(rows)
+
+    executed = apply_migrations(connection, schema="s")
+
+    assert executed == [5]
+    sql = _executed_sql(connection)
+    assert sum("information_schema" in statement for statement in sql) == 1
+    assert sum("CREATE TABLE" in statement for statement in sql) == 1  # schema_migrations
+    assert any("ADD COLUMN change_hash" in statement for statement in sql)
+    assert sum("INSERT INTO" in statement for statement in sql) == len(MIGRATIONS)
+
+
+def test_create_tables_checks_the_schema_once_per_process():
+    """
+    Test that create_tables inspects the schema only on its first call.
+    """
+    create_tables_redshift._bootstrapped_schemas.clear()
+    try:
+        with patch.object(create_tables_redshift, "apply_migrations", return_value=[]) as mock_apply:
+            create_tables(MagicMock())
+            create_tables(MagicMock())
+        mock_apply.assert_called_once()
+    finally:
+        create_tables_redshift._bootstrapped_schemas.clear()
@@ -0,0 +1,148 @@
+import json
+from functools import lru_cache
+from typing import Dict, List, NamedTuple
+import pandas as pd
+from variables.config import COIN_REGISTRY_PATH
+
+
+class Coin(NamedTuple):
+    """A tracked coin: its CoinGecko slug, CoinMarketCap id and ticker symbol."""
+    slug: str
+    cmc_id: str
+    symbol: str
+    name: str
+
+
+class CoinRegistry:
+    """
+    Indexed set of the coins tracked by the pipeline.
+
+    Every coin is reachable by slug, CoinMarketCap id or symbol with a dictionary
+    lookup. The registry is validated when it is built, so a duplicate or incomplete
+    entry fails at startup instead of producing rows that never join downstream.
+    """
+
+    def __init__(self, coins: List[Coin]) -> None:
+        if not coins:
+            raise ValueError("The coin registry is empty.")
+        for coin in coins:
+            if not all(isinstance(value, str) and value for value in coin):
+                raise ValueError(f"Incomplete coin registry entry: {coin}.")
+            if not coin.cmc_id.isdigit():
+                raise ValueError(f"Invalid CoinMarketCap id '{coin.cmc_id}' for '{coin.slug}'.")
+
+        self.coins: List[Coin] = list(coins)
+        self._by_slug: Dict[str, Coin] = self._index("slug")
+        self._by_cmc_id: Dict[str, Coin] = self._index("cmc_id")
+        self._by_symbol: Dict[str, Coin] = self._index("symbol")
+
+    def _index(self, field: str) -> Dict[str, Coin]:
+        index: Dict[str, Coin] = {}
+        for coin in self.coins:
+            key = getattr(coin, field)
+            if key in index:
+                raise ValueError(f"Duplicate {field} '{key}' in the coin registry: {index[key].slug} and {coin.slug}.")
+            index[key] = coin
+        return index
+
+    @property
+    def slugs(self) -> List[str]:
+        """CoinGecko slugs, in registry order."""
+        return [coin.slug for coin in self.coins]
+
+    @property
+    def cmc_ids(self) -> List[str]:
+        """CoinMarketCap ids, in registry order."""
+        return [coin.cmc_id for coin in self.coins]
+
+    @property
+    def symbols(self) -> List[str]:
+        """Ticker symbols, in registry order."""
+        return [coin.symbol for coin in self.coins]
+
+    def by_slug(self, slug: str) -> Coin:
+        return self._by_slug[slug]
+
+    def by_cmc_id(self, cmc_id: str) -> Coin:
+        return self._by_cmc_id[str(cmc_id)]
+
+    def by_symbol(self, symbol: str) -> Coin:
+        return self._by_symbol[symbol]
+
+    def slug_symbols(self, slugs: pd.Series) -> pd.Series:
+        """
+        Map CoinGecko slugs to ticker symbols.
+
+        The mapping is done on the categories of the column, so its cost depends on the
+        number of coins, not on the number of rows.
+
+        Args:
+            slugs (pd.Series): Slugs, categorical or not.
+
+        Returns:
+            pd.Series: Categorical ticker symbols.
+
+        Raises:
+            ValueError: If a slug is not in the registry.
+        """
+        if not isinstance(slugs.dtype, pd.CategoricalDtype):
+            slugs = slugs.astype(str).astype("category")
+        slugs = slugs.cat.remove_unused_categories()
+        unknown = [slug for slug in slugs.cat.categories if slug not in self._by_slug]
+        if unknown:
+            raise ValueError(f"Slugs missing from the coin registry: {unknown}.")
+        return slugs.cat.rename_categories([self._by_slug[slug].symbol for slug in slugs.cat.categories])
+
+    def profile_mismatches(self, profiles_df: pd.DataFrame) -> List[str]:
+        """
+        Compare CoinMarketCap profiles with the registry.
+
+        Args:
+            profiles_df (pd.DataFrame): Profiles with 'id' and 'symbol' columns.
+
+        Returns:
+            List[str]: One message per profile whose id is unknown or whose symbol differs
+            from the registry (empty if everything matches).
+        """
+        mismatches: List[str] = []
+        for cmc_id, symbol in zip(profiles_df["id"].astype(str), profiles_df["symbol"]):
+            coin = self._by_cmc_id.get(cmc_id)
+            if coin is None:
+                mismatches.append(f"CoinMarketCap id {cmc_id} ({symbol}) is not in the coin registry.")
+            elif coin.symbol != symbol:
+                mismatches.append(f"CoinMarketCap id {cmc_id} has symbol '{symbol}', the registry expects '{coin.symbol}'.")
+        return mismatches
+
+
+def load_coin_registry(path: str = COIN_REGISTRY_PATH) -> CoinRegistry:
+    """
+    Load and validate the coin registry from its JSON file.
+
+    Args:
+        path (str): Location of the registry file, with a 'coins' list of objects with
+            'slug', 'cmc_id', 'symbol' and 'name'.
+
+    Returns:
+        CoinRegistry: The indexed registry.
+
+    Raises:
+        ValueError: If an entry is incomplete or a slug, id or symbol is duplicated.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)["coins"]
+    try:
+        coins = [Coin(str(entry["slug"]), str(entry["cmc_id"]), str(entry["symbol"]), str(entry["name"])) for entry in entries]
+    except KeyError as e:
+        raise ValueError(f"Coin registry entry without {e} in '{path}'.") from e
+    return CoinRegistry(coins)
+
+
+@lru_cache(maxsize=1)
+def get_coin_registry() -> CoinRegistry:
+    """
+    Return the process-wide coin registry, loading it on first use.
+
+    Returns:
+        CoinRegistry: The registry loaded from `COIN_REGISTRY_PATH`.
+    """
+    return load_coin_registry()
@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from typing import List, Optional
+from typing import Optional
 from datetime import datetime, timedelta
 import pytz
 
@@ -19,26 +19,8 @@ YESTERDAY_FECHA: datetime = HORA_BUENOS_AIRES - timedelta(days=1)
 # Format the date as a string in 'YYYY-MM-DD' format
 DATE_STR: str = YESTERDAY_FECHA.strftime('%Y-%m-%d')
 
-# List of cryptocurrencies -  CoinGecko - Public and Free API
-COINS_LIST: List[str] = [
-    "bitcoin",
-    "ethereum",
-    "cardano",
-    "dogecoin",
-    "axie-infinity",  # AXS
-    "smooth-love-potion"  # SLP
-]
-
-# List of cryptocurrencies CoinMarketCap - API
-coin_id: List[str] = [
-    '1', #BTC (Bitcoin)
-    '74', #DOGE (Dogecoin)
-    '1027', #ETH (Ethereum)
-    '2010', #ADA (Cardano)
-    '5824', #SLP (Smooth Love Potion)
-    '6783', #AXS (Axie Infinity)
-    '31093' #DOGE (Dogecoin V2)
-]
+# Registro de monedas (slug de CoinGecko, id de CoinMarketCap y símbolo); ver variables/coin_registry.py
+COIN_REGISTRY_PATH: str = os.getenv('COIN_REGISTRY_PATH', os.path.join(DIR_PATH, 'variables', 'coins.json'))
 
 # API_COINMARKET_CAP # Cargar variables de entorno desde .env
 load_dotenv()
@@ -51,3 +33,83 @@ PASSWORD_REDSHIFT: Optional[str] = os.getenv('PASSWORD_REDSHIFT')
 HOST_REDSHIFT: Optional[str] = os.getenv('HOST_REDSHIFT')
 PORT_REDSHIFT: Optional[str] = os.getenv('PORT_REDSHIFT')
 REDSHIFT_SCHEMA: Optional[str] = os.getenv('REDSHIFT_SCHEMA')
+
+# API base URLs - Se pueden sobrescribir (por ejemplo, para apuntar a un servidor stub local en los tests)
+COINGECKO_API_URL: str = os.getenv('COINGECKO_API_URL', 'https://api.coingecko.com/api/v3')
+COINMARKETCAP_API_URL: str = os.getenv('COINMARKETCAP_API_URL', 'https://pro-api.coinmarketcap.com')
+
+# Rate limits per provider (requests per minute) and burst size of each token bucket
+COINGECKO_REQUESTS_PER_MINUTE: float = float(os.getenv('COINGECKO_REQUESTS_PER_MINUTE', '30'))
+COINGECKO_BURST: int = int(os.getenv('COINGECKO_BURST', '5'))
+COINMARKETCAP_REQUESTS_PER_MINUTE: float = float(os.getenv('COINMARKETCAP_REQUESTS_PER_MINUTE', '30'))
+COINMARKETCAP_BURST: int = int(os.getenv('COINMARKETCAP_BURST', '5'))
+
+# Backfills read CoinGecko /market_chart/range in windows of this many days: historical windows of up to
+# 90 days return hourly prices (5-minute prices only exist for the last day), so a year is ~5 requests per coin
+BACKFILL_WINDOW_DAYS: int = int(os.getenv('BACKFILL_WINDOW_DAYS', '90'))
+# Interval of the candles built from the backfill prices, the granularity of the historical prices
+BACKFILL_CANDLE_INTERVAL: str = os.getenv('BACKFILL_CANDLE_INTERVAL', '1h')
+
+# Maximum number of concurrent extraction workers in staging
+EXTRACTION_MAX_WORKERS: int = int(os.getenv('EXTRACTION_MAX_WORKERS', '8'))
+
+# Airflow pools that cap the mapped staging tasks running at once against each provider
+COINGECKO_POOL: str = os.getenv('COINGECKO_POOL', 'coingecko_api')
+COINGECKO_POOL_SLOTS: int = int(os.getenv('COINGECKO_POOL_SLOTS', '2'))
+COINMARKETCAP_POOL: str = os.getenv('COINMARKETCAP_POOL', 'coinmarketcap_api')
+COINMARKETCAP_POOL_SLOTS: int = int(os.getenv('COINMARKETCAP_POOL_SLOTS', '1'))
+# Coins extracted by each mapped staging task (1 = one task, and one retry, per coin)
+STAGING_COIN_SHARD_SIZE: int = int(os.getenv('STAGING_COIN_SHARD_SIZE', '1'))
+
+# Rounds in which a staging task re-extracts only its missing coins, with exponential backoff between rounds
+STAGING_COIN_RETRIES: int = int(os.getenv('STAGING_COIN_RETRIES', '3'))
+STAGING_RETRY_BACKOFF_SECONDS: float = float(os.getenv('STAGING_RETRY_BACKOFF_SECONDS', '5'))
+STAGING_RETRY_BACKOFF_MAX_SECONDS: float = float(os.getenv('STAGING_RETRY_BACKOFF_MAX_SECONDS', '60'))
+# Hours the per-coin completion records of a staging run are trusted when the run is retried
+STAGING_CHECKPOINT_TTL_HOURS: float = float(os.getenv('STAGING_CHECKPOINT_TTL_HOURS', '24'))
+# Minimum fraction of the registry coins with prices for staging to succeed
+STAGING_MIN_COMPLETENESS: float = float(os.getenv('STAGING_MIN_COMPLETENESS', '0.8'))
+
+# HTTP client settings shared by the API clients (pooled session, retries and backoff)
+HTTP_TIMEOUT_SECONDS: float = float(os.getenv('HTTP_TIMEOUT_SECONDS', '30'))
+HTTP_MAX_RETRIES: int = int(os.getenv('HTTP_MAX_RETRIES', '5'))
+HTTP_BACKOFF_BASE_SECONDS: float = float(os.getenv('HTTP_BACKOFF_BASE_SECONDS', '1'))
+HTTP_BACKOFF_MAX_SECONDS: float = float(os.getenv('HTTP_BACKOFF_MAX_SECONDS', '60'))
+
+# Maximum number of CoinMarketCap ids requested in a single /v1/cryptocurrency/info call
+CMC_PROFILE_BATCH_SIZE: int = int(os.getenv('CMC_PROFILE_BATCH_SIZE', '100'))
+
+# Hours a cached CoinMarketCap profile is considered fresh before it is fetched again
+PROFILE_CACHE_TTL_HOURS: float = float(os.getenv('PROFILE_CACHE_TTL_HOURS', '168'))
+
+# Number of fragments a silver date/symbol partition may accumulate before it is compacted
+SILVER_COMPACTION_MIN_FRAGMENTS: int = int(os.getenv('SILVER_COMPACTION_MIN_FRAGMENTS', '4'))
+
+# Bulk-load backend used to insert frames into Redshift: 'copy' (S3 + COPY), 'execute_values' or 'to_sql' (legacy)
+BULK_LOAD_METHOD: str = os.getenv('BULK_LOAD_METHOD', 'execute_values')
+# Rows per multi-row INSERT statement of the 'execute_values' backend
+BULK_LOAD_PAGE_SIZE: int = int(os.getenv('BULK_LOAD_PAGE_SIZE', '1000'))
+# S3-compatible bucket used by the 'copy' backend (an endpoint URL allows a local stand-in such as MinIO)
+BULK_LOAD_S3_BUCKET: Optional[str] = os.getenv('BULK_LOAD_S3_BUCKET')
+BULK_LOAD_S3_PREFIX: str = os.getenv('BULK_LOAD_S3_PREFIX', 'bulk-load')
+BULK_LOAD_S3_ENDPOINT_URL: Optional[str] = os.getenv('BULK_LOAD_S3_ENDPOINT_URL')
+# Credentials Redshift uses to read the bucket: an IAM role, or else the access keys in the environment
+BULK_LOAD_IAM_ROLE: Optional[str] = os.getenv('BULK_LOAD_IAM_ROLE')
+
+# Connection pool of the process-wide Redshift engine
+REDSHIFT_POOL_SIZE: int = int(os.getenv('REDSHIFT_POOL_SIZE', '2'))
+REDSHIFT_MAX_OVERFLOW: int = int(os.getenv('REDSHIFT_MAX_OVERFLOW', '2'))
+REDSHIFT_POOL_RECYCLE_SECONDS: int = int(os.getenv('REDSHIFT_POOL_RECYCLE_SECONDS', '1800'))
+REDSHIFT_CONNECT_TIMEOUT_SECONDS: int = int(os.getenv('REDSHIFT_CONNECT_TIMEOUT_SECONDS', '10'))
+# Maximum duration of a single statement in milliseconds (0 disables the limit)
+REDSHIFT_STATEMENT_TIMEOUT_MS: int = int(os.getenv('REDSHIFT_STATEMENT_TIMEOUT_MS', '900000'))
+
+# Where the gold KPIs are computed: 'pandas' (in the worker, reading Redshift), 'warehouse' (INSERT ... SELECT
+# inside Redshift) or 'parquet' (in the worker, reading the local silver dataset)
+GOLD_ENGINE: str = os.getenv('GOLD_ENGINE', 'pandas')
+
+# Hours an Arrow IPC handoff file between pipeline tasks is kept before it is pruned
+HANDOFF_TTL_HOURS: float = float(os.getenv('HANDOFF_TTL_HOURS', '48'))
+
+# Tipo de los precios de las velas en staging/silver: 'float64' (exacto) o 'float32' (la mitad de memoria y disco)
+CANDLE_PRICE_DTYPE: str = os.getenv('CANDLE_PRICE_DTYPE', 'float64')
@@ -1,9 +1,13 @@
 import urllib.parse
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, Union
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, Engine
 from variables.config import (
     DBNAME_REDSHIFT, USER_REDSHIFT, PASSWORD_REDSHIFT,
-    HOST_REDSHIFT, PORT_REDSHIFT
+    HOST_REDSHIFT, PORT_REDSHIFT, REDSHIFT_POOL_SIZE, REDSHIFT_MAX_OVERFLOW,
+    REDSHIFT_POOL_RECYCLE_SECONDS, REDSHIFT_CONNECT_TIMEOUT_SECONDS, REDSHIFT_STATEMENT_TIMEOUT_MS
 )
 
 # Connection variables for Redshift
@@ -14,12 +18,18 @@ password: str = urllib.parse.quote_plus(str(PASSWORD_REDSHIFT))
 host: str = HOST_REDSHIFT
 port: str = PORT_REDSHIFT
 
+# Engine o conexión: las funciones de carga aceptan cualquiera de los dos
+Bind = Union[Engine, Connection]
+
+
 def create_redshift_engine() -> Engine:
     """
     Create a SQLAlchemy engine for connecting to a Redshift database.
 
     This function builds a connection string using the provided credentials
     and returns a SQLAlchemy engine that can be used to interact with the database.
+    The pool checks connections before handing them out, recycles them before the
+    server drops idle sessions, and enables TCP keepalives on every connection.
 
     Returns:
         Engine: A SQLAlchemy Engine object connected to the Redshift database.
@@ -27,6 +37,66 @@ def create_redshift_engine() -> Engine:
 
     # Create a SQLAlchemy engine for Redshift connection
     engine: Engine = create_engine(
-        f'postgresql+psycopg2://{user}:{password}@{host}:{port}/{dbname}'
+        f'postgresql+psycopg2://{user}:{password}@{host}:{port}/{dbname}',
+        pool_size=REDSHIFT_POOL_SIZE,
+        max_overflow=REDSHIFT_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=REDSHIFT_POOL_RECYCLE_SECONDS,
+        connect_args={
+            "connect_timeout": REDSHIFT_CONNECT_TIMEOUT_SECONDS,
+            "keepalives": 1,
+            "keepalives_idle": 30,
+            "keepalives_interval": 10,
+            "keepalives_count": 5,
+        },
     )
     return engine
+
+
+@lru_cache(maxsize=1)
+def get_redshift_engine() -> Engine:
+    """
+    Return the process-wide Redshift engine, creating it on the first call.
+
+    Reusing the engine keeps its connection pool alive between tasks of the same
+    worker process, so they do not pay the connect and authentication latency again.
+    Every new connection gets the configured statement timeout.
+
+    Returns:
+        Engine: The shared SQLAlchemy engine.
+    """
+    engine = create_redshift_engine()
+
+    # Redshift no admite el parámetro de arranque 'options', así que el timeout se fija por sesión
+    @event.listens_for(engine, "connect")
+    def set_statement_timeout(dbapi_connection, connection_record) -> None:
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f"SET statement_timeout TO {int(REDSHIFT_STATEMENT_TIMEOUT_MS)}")
+        dbapi_connection.commit()
+
+    return engine
+
+
+@contextmanager
+def transaction(bind: Bind) -> Iterator[Connection]:
+    """
+    Open a transaction on an engine or on an already open connection.
+
+    With an engine a pooled connection is checked out for the duration of the block;
+    with a connection the same connection is reused, so a task can run all of its
+    statements over a single session.
+
+    Args:
+        bind (Bind): SQLAlchemy engine or connection.
+
+    Yields:
+        Connection: Connection with an active transaction, committed when the block exits.
+    """
+    if isinstance(bind, Engine):
+        with bind.begin() as connection:
+            yield connection
+    elif bind.in_transaction():
+        yield bind
+    else:
+        with bind.begin():
+            yield bind